@@ -0,0 +1,142 @@
+"""Benchmark the slotted PrivacyDecision_v2 against the previous dataclass
+
+Run from the repository root:
+
+    python -m benchmarks.bench_decision --count 200000
+"""
+import argparse
+import gc
+import hashlib
+import json
+import time
+import tracemalloc
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from protocols import privacy_protocol
+from protocols.privacy_protocol import PrivacyDecision_v2, canonical_json
+
+
+@dataclass
+class LegacyDecision:
+    """The dataclass PrivacyDecision_v2 used to be"""
+
+    content: Optional[Dict] = None
+    error: Optional[str] = None
+    requires_additional_processing: bool = False
+    confidence_score: float = 0.0
+    data_sources: List[str] = field(default_factory=list)
+    input_digest: Optional[str] = None
+    processing_signature: Optional[str] = None
+    compliance_status: Dict = field(default_factory=lambda: {
+        "gdpr": {"article32": False, "recital75": False},
+        "hipaa": {"safe_harbor": False, "expert_determination": False}
+    })
+    privacy_controls: Dict = field(default_factory=lambda: {
+        "applied_techniques": [],
+        "residual_risk": "low/medium/high"
+    })
+    audit_records: Dict = field(default_factory=lambda: {
+        "processing_steps": [],
+        "risk_mitigations": [],
+        "validation_checksum": None
+    })
+
+    def validate_integrity(self) -> bool:
+        if not self.input_digest or not self.content:
+            return False
+        generated_hash = hashlib.sha256(json.dumps(self.content).encode()).hexdigest()
+        return generated_hash == self.input_digest.split(":")[-1]
+
+    def to_dict(self) -> Dict:
+        return {
+            "content": self.content,
+            "error": self.error,
+            "processing_metadata": {
+                "requires_additional_processing": self.requires_additional_processing,
+                "confidence_score": self.confidence_score
+            },
+            "provenance": {
+                "data_sources": self.data_sources,
+                "input_digest": self.input_digest,
+                "processing_signature": self.processing_signature
+            },
+            "compliance_status": self.compliance_status,
+            "privacy_controls": self.privacy_controls,
+            "audit_records": self.audit_records
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+CONTENT = {"summary": "aggregate LDL trend", "values": [112, 118, 121], "region": "north"}
+# Each type validates against the digest form it computes itself
+DIGESTS = {
+    LegacyDecision: "sha256:" + hashlib.sha256(json.dumps(CONTENT).encode()).hexdigest(),
+    PrivacyDecision_v2: "sha256:" + hashlib.sha256(canonical_json(CONTENT).encode()).hexdigest(),
+}
+
+
+def build(cls, count: int) -> list:
+    digest = DIGESTS[cls]
+    return [cls(content=CONTENT, confidence_score=0.8, input_digest=digest) for _ in range(count)]
+
+
+def allocated(cls, count: int) -> int:
+    """Bytes still allocated after building ``count`` decisions"""
+    gc.collect()
+    tracemalloc.start()
+    decisions = build(cls, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del decisions
+    return current
+
+
+def timed(func, repeat: int) -> float:
+    """Best of ``repeat`` runs with the cyclic GC paused, as timeit does"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    count = args.count
+    backend = "orjson" if privacy_protocol.orjson is not None else "json"
+    print(f"{count} decisions, to_json backend: {backend}")
+
+    for label, cls in (("legacy dataclass", LegacyDecision), ("slotted", PrivacyDecision_v2)):
+        memory = allocated(cls, count)
+        decisions = build(cls, count)
+        results = {
+            "construct": timed(lambda: build(cls, count), args.repeat),
+            "to_dict": timed(lambda: [d.to_dict() for d in decisions], args.repeat),
+            "to_json": timed(lambda: [d.to_json() for d in decisions], args.repeat),
+            "validate_integrity": timed(lambda: [d.validate_integrity() for d in decisions], args.repeat),
+        }
+        # The slotted type caches digests and JSON; include cold passes too
+        cold = build(cls, count)
+        results["to_json (cold)"] = timed(lambda: [d.to_json() for d in cold], 1)
+        results["validate_integrity (cold)"] = timed(lambda: [d.validate_integrity() for d in cold], 1)
+        print(f"{label}: {memory / count:.0f} bytes/decision")
+        for operation, seconds in results.items():
+            print(f"  {operation:<26} {seconds * 1e6 / count:.2f}us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Throughput, latency and memory of the protocols against fake LLM backends
+
+Run from the repository root:
+
+    python -m benchmarks.bench_protocol --requests 100 --concurrency 1,4,16
+    python -m benchmarks.bench_protocol --output new.json --compare old.json
+
+Both LLMs are in-process FakeLLMs with seeded latency distributions, so a
+run measures the protocol's own overhead and concurrency behaviour rather
+than the network. Results are written as JSON (with the git revision) so
+runs from different versions can be compared with ``--compare``.
+"""
+import argparse
+import datetime
+import gc
+import json
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from protocols.clients import FakeLLM, LatencyModel, supervisor_script, worker_script
+from protocols.privacy_protocol import PrivacyProtocol_v1, PrivacyProtocol_v2
+from protocols.tracing import LatencyHistogram
+
+SENSITIVE_PROMPT = "Summarise the medical history for patient SSN 123-45-6789"
+PLAIN_PROMPT = "Summarise the quarterly cholesterol trend across the cohort"
+CONTEXT = ["\n\n".join(f"Sample {i}: LDL {100 + i % 80} mg/dL, HDL {40 + i % 30} mg/dL" for i in range(200))]
+
+
+def make_llms(args: argparse.Namespace, seed: int) -> Dict[str, FakeLLM]:
+    scale = args.latency_scale
+    return {
+        "local": FakeLLM(
+            model="fake-local",
+            responses=worker_script(words=48),
+            latency=LatencyModel.lognormal(0.004 * scale, 0.4),
+            tokens_per_second=args.local_tps,
+            seed=seed,
+        ),
+        "remote": FakeLLM(
+            model="fake-remote",
+            responses=supervisor_script(finalize_at=args.finalize_at),
+            latency=LatencyModel.lognormal(0.010 * scale, 0.6),
+            tokens_per_second=args.remote_tps,
+            seed=seed + 1,
+        ),
+    }
+
+
+def scenarios(args: argparse.Namespace) -> Dict[str, Callable[[int], Callable[[int], Any]]]:
+    """Scenario name -> factory(seed) -> request(index)"""
+    def v1_process_query(seed: int) -> Callable[[int], Any]:
+        llms = make_llms(args, seed)
+        protocol = PrivacyProtocol_v1(llms["local"], llms["remote"])
+        return lambda i: protocol.process_query(SENSITIVE_PROMPT if i % 2 else PLAIN_PROMPT)
+
+    def v1_hybrid_generation(seed: int) -> Callable[[int], Any]:
+        llms = make_llms(args, seed)
+        protocol = PrivacyProtocol_v1(llms["local"], llms["remote"])
+        return lambda i: protocol.hybrid_generation(SENSITIVE_PROMPT)
+
+    def v2_process_query(seed: int) -> Callable[[int], Any]:
+        llms = make_llms(args, seed)
+        protocol = PrivacyProtocol_v2(
+            local_llm=llms["local"],
+            remote_llm=llms["remote"],
+            doc_metadata="Synthetic lab panel",
+            data_types=["medical"],
+            max_rounds=args.max_rounds,
+            chunk_tokens=args.chunk_tokens,
+            speculative=args.speculative,
+        )
+        return lambda i: protocol.process_query("Summarise the cohort", CONTEXT)
+
+    return {
+        "v1.process_query": v1_process_query,
+        "v1.hybrid_generation": v1_hybrid_generation,
+        "v2.process_query": v2_process_query,
+    }
+
+
+def run_load(request: Callable[[int], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Issue ``requests`` calls from ``concurrency`` threads; latencies in microseconds"""
+    histogram = LatencyHistogram()
+    errors = []
+    lock = threading.Lock()
+
+    def call(index: int) -> None:
+        start = time.perf_counter_ns()
+        try:
+            request(index)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+        histogram.record((time.perf_counter_ns() - start) // 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "seconds": elapsed,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "latency_us": histogram.to_dict(),
+    }
+
+
+def measure_memory(request: Callable[[int], Any], requests: int, concurrency: int) -> int:
+    """Peak traced allocation in bytes; run separately since tracing slows the timed run"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run_load(request, requests, concurrency)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    print(f"\nvs {baseline.get('revision') or 'baseline'} ({baseline.get('timestamp', '?')})")
+    for key, result in current["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        rps = result["throughput_rps"] / previous["throughput_rps"] if previous["throughput_rps"] else float("nan")
+        p99 = result["latency_us"]["p99"] / previous["latency_us"]["p99"] if previous["latency_us"]["p99"] else float("nan")
+        print(f"{key:<30} throughput x{rps:.2f}  p99 x{p99:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated thread counts")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply fake LLM latencies")
+    parser.add_argument("--local-tps", type=float, default=2000.0, help="fake local tokens/second")
+    parser.add_argument("--remote-tps", type=float, default=4000.0, help="fake remote tokens/second")
+    parser.add_argument("--max-rounds", type=int, default=3)
+    parser.add_argument("--finalize-at", type=int, default=2, help="round the fake supervisor finalizes")
+    parser.add_argument("--chunk-tokens", type=int, default=None)
+    parser.add_argument("--speculative", action="store_true")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_protocol.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    selected = scenarios(args)
+    if args.scenario:
+        selected = {name: selected[name] for name in args.scenario}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'scenario':<30} {'rps':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9}")
+    for name, factory in selected.items():
+        for concurrency in levels:
+            result = run_load(factory(args.seed), args.requests, concurrency)
+            if not args.no_memory:
+                result["peak_memory_bytes"] = measure_memory(factory(args.seed), args.requests, concurrency)
+            key = f"{name}@{concurrency}"
+            results[key] = {"scenario": name, "concurrency": concurrency, **result}
+            latency = result["latency_us"]
+            peak = f"{result['peak_memory_bytes'] / 1024:.0f}" if "peak_memory_bytes" in result else "-"
+            print(
+                f"{key:<30} {result['throughput_rps']:>9.1f} {latency['p50'] / 1000:>8.2f} "
+                f"{latency['p99'] / 1000:>8.2f} {peak:>9}"
+            )
+
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
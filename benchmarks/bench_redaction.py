@@ -0,0 +1,113 @@
+"""Benchmark the compiled RedactionEngine against the legacy sanitize_output
+
+Run from the repository root:
+
+    python -m benchmarks.bench_redaction --size-mb 4
+"""
+import argparse
+import random
+import re
+import time
+
+from protocols.redaction import DEFAULT_DETECTORS, default_engine
+from protocols.utils import SecurityUtils
+
+
+def legacy_sanitize_output(text: str) -> str:
+    """The per-call, multi-pass implementation SecurityUtils used to ship"""
+    patterns = [
+        r"\b\d{3}-\d{2}-\d{4}\b",  # SSN
+        r"\b(?:\d[ -]*?){13,16}\b"  # Credit cards
+    ]
+    for pattern in patterns:
+        text = re.sub(pattern, "[REDACTED]", text)
+    return text
+
+
+def multi_pass_redact(text: str) -> str:
+    """One re.sub per default detector, i.e. the legacy shape at full coverage"""
+    for detector in DEFAULT_DETECTORS:
+        pattern = (r"\b" if detector.word_start else "") + detector.pattern
+        text = re.sub(
+            pattern,
+            lambda m, d=detector: d.replacement if not d.validator or d.validator(m.group()) else m.group(),
+            text,
+        )
+    return text
+
+
+def lab_report(size_bytes: int, seed: int = 7) -> str:
+    """Digit-heavy synthetic text resembling lab report exports"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size_bytes:
+        line = (
+            f"Sample {rng.randint(10 ** 6, 10 ** 7)} "
+            f"LDL {rng.randint(60, 220)} mg/dL HDL {rng.randint(20, 90)} "
+            f"{' '.join(str(rng.randint(0, 9999)) for _ in range(8))} "
+            f"ref {rng.randint(10 ** 11, 10 ** 12)}-{rng.randint(1000, 9999)}"
+        )
+        if rng.random() < 0.01:
+            line += " patient SSN 123-45-6789 card 4111 1111 1111 1111"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def timed(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def timed_calls(func, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = lab_report(int(args.size_mb * 1024 * 1024))
+    engine = default_engine()
+
+    mb = len(text) / (1024 * 1024)
+    spans = len(engine.redact(text).spans)
+    print(f"input: {mb:.1f} MB, {spans} spans redacted by engine")
+
+    results = {
+        "legacy sanitize_output (2 patterns)": timed(legacy_sanitize_output, text, args.repeat),
+        "sanitize_output (default)": timed(SecurityUtils.sanitize_output, text, args.repeat),
+        "multi-pass, default detectors": timed(multi_pass_redact, text, args.repeat),
+        "RedactionEngine.redact": timed(engine.redact, text, args.repeat),
+    }
+    for label, seconds in results.items():
+        print(f"{label:<38} {seconds:.3f}s ({mb / seconds:.1f} MB/s)")
+
+    # LLM responses are usually small: measure per-call overhead separately
+    responses = text[:2 * 1024 * 1024].splitlines()
+    calls = {
+        "legacy sanitize_output (2 patterns)": timed_calls(legacy_sanitize_output, responses, args.repeat),
+        "sanitize_output (default)": timed_calls(SecurityUtils.sanitize_output, responses, args.repeat),
+        "RedactionEngine.redact": timed_calls(engine.redact, responses, args.repeat),
+    }
+    average = sum(map(len, responses)) // max(len(responses), 1)
+    print(f"small inputs: {len(responses)} calls of ~{average} bytes")
+    for label, seconds in calls.items():
+        print(f"{label:<38} {seconds * 1e6 / len(responses):.2f}us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from protocols.audit_index import AuditIndex
+
+FORMATS = ("jsonl", "binary")
+GENESIS_HASH = bytes(32)
+
+# Binary frame: body length, record hash, then the canonical JSON body
+_FRAME_HEADER = struct.Struct(">I32s")
+_EXTENSIONS = {"jsonl": "jsonl", "binary": "bin"}
+_STOP = object()
+
+
+def _canonical_body(record: Dict[str, Any], seq: int, ts: float) -> bytes:
+    return json.dumps(
+        {"record": record, "seq": seq, "ts": ts},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    ).encode()
+
+
+def _chain_hash(prev: bytes, body: bytes) -> bytes:
+    return hashlib.sha256(prev + body).digest()
+
+
+def _segment_pattern(prefix: str) -> "re.Pattern":
+    return re.compile(rf"^{re.escape(prefix)}-(\d+)\.(jsonl|bin)(\.gz)?$")
+
+
+def list_segments(directory: Union[str, os.PathLike], prefix: str = "audit") -> List[str]:
+    """Segment paths of an audit log, oldest first"""
+    pattern = _segment_pattern(prefix)
+    found: Dict[int, str] = {}
+    for name in sorted(os.listdir(directory)):
+        match = pattern.match(name)
+        # A crash after compressing but before removing the original leaves
+        # both; the gzip copy is complete by then, so it wins
+        if match and (int(match.group(1)) not in found or match.group(3)):
+            found[int(match.group(1))] = os.path.join(directory, name)
+    return [found[index] for index in sorted(found)]
+
+
+def _read_segment(path: str) -> Iterator[Tuple[int, bytes, bytes, Dict[str, Any]]]:
+    """Yield (end offset, body, stored hash, envelope) for each complete record"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        if ".bin" in os.path.basename(path):
+            offset = 0
+            while True:
+                header = f.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    return
+                length, stored = _FRAME_HEADER.unpack(header)
+                body = f.read(length)
+                if len(body) < length:
+                    return
+                offset += _FRAME_HEADER.size + length
+                yield offset, body, stored, json.loads(body)
+        else:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                offset += len(line)
+                envelope = json.loads(line)
+                body = _canonical_body(envelope["record"], envelope["seq"], envelope["ts"])
+                yield offset, body, bytes.fromhex(envelope["hash"]), envelope
+
+
+def iter_segment_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Every complete record of one segment, as {"seq", "ts", "hash", "record"}"""
+    for _, _, stored, envelope in _read_segment(path):
+        yield {"seq": envelope["seq"], "ts": envelope["ts"], "hash": stored.hex(), "record": envelope["record"]}
+
+
+def iter_audit_records(directory: Union[str, os.PathLike], prefix: str = "audit") -> Iterator[Dict[str, Any]]:
+    """Every audit record in order, as {"seq", "ts", "hash", "record"}"""
+    for path in list_segments(directory, prefix):
+        yield from iter_segment_records(path)
+
+
+def verify_audit_chain(directory: Union[str, os.PathLike], prefix: str = "audit") -> int:
+    """Check every record's hash links to its predecessor; returns the count"""
+    prev = GENESIS_HASH
+    count = 0
+    for path in list_segments(directory, prefix):
+        for _, body, stored, envelope in _read_segment(path):
+            if "prev" in envelope and bytes.fromhex(envelope["prev"]) != prev:
+                raise ValueError(f"Audit chain broken at seq {envelope['seq']} in {path}: prev mismatch")
+            if _chain_hash(prev, body) != stored:
+                raise ValueError(f"Audit chain broken at seq {envelope['seq']} in {path}: hash mismatch")
+            prev = stored
+            count += 1
+    return count
+
+
+class AuditLogWriter:
+    """Append-only, hash-chained audit log written from a background thread
+
+    ``write`` only enqueues, so callers never wait on disk I/O. The writer
+    thread drains everything queued (up to ``max_batch``), writes it and
+    issues one fsync for the whole batch (group commit). Each record's hash
+    is SHA-256 over the previous record's hash and its canonical body, and
+    the chain continues across segments and restarts. Segments rotate at
+    ``max_segment_bytes`` and closed segments are gzipped off the write path.
+    A torn record left by a crash is truncated away on startup. With an
+    ``index``, each committed batch is also indexed from the writer thread.
+    """
+
+    def __init__(
+            self,
+            directory: Union[str, os.PathLike],
+            prefix: str = "audit",
+            format: str = "jsonl",
+            max_segment_bytes: int = 64 * 1024 * 1024,
+            compress: bool = True,
+            max_batch: int = 1024,
+            fsync: bool = True,
+            index: Optional["AuditIndex"] = None
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}, got {format!r}")
+        self.directory = os.fspath(directory)
+        self.prefix = prefix
+        self.format = format
+        self.max_segment_bytes = max_segment_bytes
+        self.compress = compress
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.index = index
+        self.index_error: Optional[BaseException] = None
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._compressor = ThreadPoolExecutor(max_workers=1) if compress else None
+        self._state = threading.Condition()
+        self._submitted = 0
+        self._durable = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        self._prev, self._seq, self._segment_index = self._recover()
+        self._file: BinaryIO = self._open_segment()
+        if self._compressor is not None:
+            # Segments rotated out before a crash may not have been compressed yet
+            for path in list_segments(self.directory, self.prefix):
+                if not path.endswith(".gz") and path != self._segment_path(self._segment_index):
+                    self._compressor.submit(_compress_segment, path)
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def head(self) -> str:
+        """Hash of the last record written to disk"""
+        return self._prev.hex()
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{self.prefix}-{index:06d}.{_EXTENSIONS[self.format]}")
+
+    def _recover(self) -> Tuple[bytes, int, int]:
+        """Resume the chain from the newest segment, truncating a torn tail"""
+        segments = list_segments(self.directory, self.prefix)
+        if not segments:
+            return GENESIS_HASH, 0, 0
+        index = int(_segment_pattern(self.prefix).match(os.path.basename(segments[-1])).group(1))
+        prev, seq = GENESIS_HASH, 0
+        for path in reversed(segments):
+            end = 0
+            for end, _, stored, envelope in _read_segment(path):
+                prev, seq = stored, envelope["seq"] + 1
+            if path == segments[-1] and not path.endswith(".gz") and end < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            if end:
+                break
+        if segments[-1].endswith(".gz") or not segments[-1].endswith(_EXTENSIONS[self.format]):
+            # The newest segment is closed or in another format: start a new one
+            index += 1
+        return prev, seq, index
+
+    def _open_segment(self) -> BinaryIO:
+        return open(self._segment_path(self._segment_index), "ab")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Queue a record; returns immediately
+
+        The record is first converted to its JSON form (string keys, other
+        values via ``str``) on the caller's thread, so a record that can't be
+        encoded raises ``ValueError`` here instead of stopping the writer.
+        """
+        try:
+            record = json.loads(json.dumps(record, default=str))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Audit record is not JSON-serializable: {e}") from e
+        with self._state:
+            if self._error is not None:
+                raise RuntimeError(f"Audit log writer failed: {self._error}")
+            if self._closed:
+                raise RuntimeError("Audit log writer is closed")
+            self._submitted += 1
+        self._queue.put((record, time.time()))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything written so far is on disk"""
+        with self._state:
+            target = self._submitted
+            done = self._state.wait_for(
+                lambda: self._durable >= target or self._error is not None, timeout
+            )
+            if self._error is not None:
+                raise RuntimeError(f"Audit log writer failed: {self._error}")
+            return done
+
+    def close(self) -> None:
+        with self._state:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+        if self._error is not None:
+            raise RuntimeError(f"Audit log writer failed: {self._error}")
+
+    def __enter__(self) -> "AuditLogWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _encode(self, record: Dict[str, Any], ts: float) -> Tuple[bytes, Dict[str, Any]]:
+        body = _canonical_body(record, self._seq, ts)
+        digest = _chain_hash(self._prev, body)
+        if self.format == "binary":
+            data = _FRAME_HEADER.pack(len(body), digest) + body
+        else:
+            data = json.dumps(
+                {"seq": self._seq, "ts": ts, "prev": self._prev.hex(), "hash": digest.hex(), "record": record},
+                separators=(",", ":"),
+                default=str,
+            ).encode() + b"\n"
+        entry = {"seq": self._seq, "ts": ts, "hash": digest.hex(), "record": record}
+        self._prev = digest
+        self._seq += 1
+        return data, entry
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(item is _STOP for item in batch):
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+            try:
+                self._commit(batch)
+            except Exception as e:
+                with self._state:
+                    self._error = e
+                    self._state.notify_all()
+                return
+        self._file.close()
+
+    def _commit(self, batch: List[Tuple[Dict[str, Any], float]]) -> None:
+        encoded = [self._encode(record, ts) for record, ts in batch]
+        if encoded:
+            self._file.write(b"".join(data for data, _ in encoded))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        with self._state:
+            self._durable += len(batch)
+            self._state.notify_all()
+        if self.index is not None and encoded:
+            try:
+                self.index.add([entry for _, entry in encoded], segment=self._segment_index)
+            except Exception as e:
+                # The log is the source of truth; AuditIndex.catch_up repairs the index
+                self.index_error = e
+        if self._file.tell() >= self.max_segment_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        closed = self._segment_path(self._segment_index)
+        self._segment_index += 1
+        self._file = self._open_segment()
+        if self._compressor is not None:
+            self._compressor.submit(_compress_segment, closed)
+
+
+def _compress_segment(path: str) -> None:
+    """Gzip a closed segment, replacing it only once the copy is durable"""
+    staging = path + ".gz.tmp"
+    with open(path, "rb") as src, gzip.open(staging, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    with open(staging, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(staging, path + ".gz")
+    os.remove(path)
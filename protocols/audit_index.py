@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from protocols.audit import iter_segment_records, list_segments
+
+_SEGMENT_INDEX = re.compile(r"-(\d+)\.(?:jsonl|bin)(?:\.gz)?$")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS records ("
+    "seq INTEGER PRIMARY KEY, ts REAL NOT NULL, hash TEXT NOT NULL, context_hash TEXT, "
+    "local_model TEXT, remote_model TEXT, termination_reason TEXT, record TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS records_context_hash ON records (context_hash, ts)",
+    "CREATE INDEX IF NOT EXISTS records_ts ON records (ts)",
+    "CREATE INDEX IF NOT EXISTS records_local_model ON records (local_model, ts)",
+    "CREATE INDEX IF NOT EXISTS records_remote_model ON records (remote_model, ts)",
+    "CREATE INDEX IF NOT EXISTS records_termination ON records (termination_reason, ts)",
+    "CREATE TABLE IF NOT EXISTS segments (segment INTEGER PRIMARY KEY, last_seq INTEGER NOT NULL)",
+)
+
+
+class AuditIndex:
+    """SQLite index over audit log records
+
+    Records are stored with B-tree indexes on context hash, timestamp, local
+    and remote model and termination reason (each also ordered by time), so
+    lookups and time-range scans are O(log n) plus the matches. Pass it to
+    ``AuditLogWriter(index=...)`` to index each batch as it is committed, or
+    call ``catch_up`` to index whatever was appended since the last run.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], timeout: float = 30.0):
+        self.path = os.fspath(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        # Every thread's connection, so close() can reach them all
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        with self._connection() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Each connection is only used by its own thread, but close() may
+            # run on another one
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def add(self, entries: Iterable[Dict[str, Any]], segment: Optional[int] = None) -> int:
+        """Index {"seq", "ts", "hash", "record"} entries; re-adding is a no-op"""
+        rows = [
+            (
+                entry["seq"],
+                entry["ts"],
+                entry["hash"],
+                entry["record"].get("context_hash"),
+                entry["record"].get("local_model"),
+                entry["record"].get("remote_model"),
+                entry["record"].get("termination_reason"),
+                json.dumps(entry["record"], separators=(",", ":"), default=str),
+            )
+            for entry in entries
+        ]
+        if not rows:
+            return 0
+        with self._connection() as conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            if segment is not None:
+                conn.execute(
+                    "INSERT INTO segments VALUES (?, ?) "
+                    "ON CONFLICT(segment) DO UPDATE SET last_seq = max(last_seq, excluded.last_seq)",
+                    (segment, rows[-1][0]),
+                )
+        return cursor.rowcount
+
+    @property
+    def last_seq(self) -> int:
+        """Highest indexed sequence number, or -1"""
+        row = self._connection().execute("SELECT max(seq) FROM records").fetchone()
+        return -1 if row[0] is None else row[0]
+
+    def catch_up(self, directory: Union[str, os.PathLike], prefix: str = "audit") -> int:
+        """Index records appended to an audit log since they were last indexed
+
+        Compressed segments already indexed to their end are skipped without
+        being read. Returns the number of records added.
+        """
+        conn = self._connection()
+        done = dict(conn.execute("SELECT segment, last_seq FROM segments").fetchall())
+        count, last_seq = conn.execute("SELECT count(*), coalesce(max(seq), -1) FROM records").fetchone()
+        # A gap (e.g. a failed live add) means recorded segments can't be trusted
+        complete = count == last_seq + 1
+        added = 0
+        for path in list_segments(directory, prefix):
+            segment = int(_SEGMENT_INDEX.search(path).group(1))
+            # Closed segments never grow; with no gaps and later records indexed,
+            # everything up to this segment's last record is already in
+            if complete and path.endswith(".gz") and done.get(segment, last_seq) < last_seq:
+                continue
+            entries = list(iter_segment_records(path))
+            if entries:
+                last_in_segment = entries[-1]["seq"]
+                if complete:
+                    entries = [entry for entry in entries if entry["seq"] > last_seq]
+                added += self.add(entries)
+                with self._connection() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO segments VALUES (?, ?)", (segment, last_in_segment)
+                    )
+        return added
+
+    def find(
+            self,
+            context_hash: Optional[str] = None,
+            since: Optional[float] = None,
+            until: Optional[float] = None,
+            model: Optional[str] = None,
+            termination_reason: Optional[str] = None,
+            limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Records matching every given filter, oldest first
+
+        ``since``/``until`` are Unix timestamps (inclusive/exclusive) and
+        ``model`` matches either the local or the remote model.
+        """
+        clauses, params = [], []
+        if context_hash is not None:
+            clauses.append("context_hash = ?")
+            params.append(context_hash)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if model is not None:
+            clauses.append("(local_model = ? OR remote_model = ?)")
+            params.extend([model, model])
+        if termination_reason is not None:
+            clauses.append("termination_reason = ?")
+            params.append(termination_reason)
+        query = "SELECT seq, ts, hash, record FROM records"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY ts, seq"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [
+            {"seq": seq, "ts": ts, "hash": digest, "record": json.loads(record)}
+            for seq, ts, digest, record in self._connection().execute(query, params)
+        ]
+
+    def close(self) -> None:
+        """Close the connections of every thread that used the index"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -1,13 +1,52 @@
+import asyncio
+import functools
+
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional
+
+from . import tracing
+from .cache import ResponseCache, cache_key
+from .metering import ModelPrice, UsageMeter, UsageStats, default_prices, usage_registry
+from .redaction import RedactionEngine, aredact_stream, redact_stream
+
+
+def cached_generation(method: Callable) -> Callable:
+    """Serve a client's generate/agenerate from its response cache, if any
+
+    Lookups are skipped for sampled (temperature > 0) generations unless the
+    client was created with ``cache_nondeterministic=True``.
+    """
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self: "BaseLLM", prompt: str) -> str:
+            key = self._response_cache_key(prompt)
+            if key is None:
+                return await method(self, prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            response = await method(self, prompt)
+            # A reply without text (tool calls, content filter) is not cached
+            if response is not None:
+                self.cache.set(key, response)
+            return response
 
+        return async_wrapper
 
-@dataclass
-class UsageStats:
-    prompt_tokens: int = 0
-    completion_tokens: int = 0
-    total_cost: float = 0.0
+    @functools.wraps(method)
+    def wrapper(self: "BaseLLM", prompt: str) -> str:
+        key = self._response_cache_key(prompt)
+        if key is None:
+            return method(self, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = method(self, prompt)
+        if response is not None:
+            self.cache.set(key, response)
+        return response
+
+    return wrapper
 
 
 class BaseLLM(ABC):
@@ -32,8 +71,14 @@ class BaseLLM(ABC):
         self.presence_penalty = presence_penalty
         self.stop = stop
         self.kwargs = kwargs
-        self.usage_stats = UsageStats()
-        self._cost_per_token = kwargs.get("cost_per_token", 0.0)
+        self.meter = UsageMeter()
+        if "cost_per_token" in kwargs:
+            # Legacy flat rate for input and output alike
+            self.price = ModelPrice(kwargs["cost_per_token"], kwargs["cost_per_token"])
+        else:
+            self.price = kwargs.get("prices", default_prices).lookup(model)
+        self.cache: Optional[ResponseCache] = kwargs.get("cache")
+        self.cache_nondeterministic = kwargs.get("cache_nondeterministic", False)
 
     @abstractmethod
     def generate(self, prompt: str) -> str:
@@ -53,9 +98,74 @@ class BaseLLM(ABC):
         raise NotImplementedError()
         # pass
 
+    async def agenerate(self, prompt: str) -> str:
+        """Generate text from the LLM without blocking the event loop
+
+        Clients with a native async transport override this; the default
+        runs the blocking ``generate`` in the loop's default executor.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, prompt)
+
+    async def astream(self, prompt: str) -> AsyncGenerator[str, None]:
+        """Stream response from the LLM without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        iterator = self.stream(prompt)
+        sentinel = object()
+        while True:
+            chunk = await loop.run_in_executor(None, next, iterator, sentinel)
+            if chunk is sentinel:
+                break
+            yield chunk
+
+    def stream_redacted(
+            self,
+            prompt: str,
+            engine: Optional[RedactionEngine] = None
+    ) -> Generator[str, None, None]:
+        """Stream response with PII redacted, even when split across chunks"""
+        yield from redact_stream(self.stream(prompt), engine)
+
+    async def astream_redacted(
+            self,
+            prompt: str,
+            engine: Optional[RedactionEngine] = None
+    ) -> AsyncGenerator[str, None]:
+        """Async counterpart of stream_redacted"""
+        async for chunk in aredact_stream(self.astream(prompt), engine):
+            yield chunk
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Calculate number of tokens for each of the given texts"""
+        return [self.get_num_tokens(text) for text in texts]
+
+    def sampling_params(self) -> Dict[str, Any]:
+        """Parameters that influence the generated text"""
+        return {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "top_p": self.top_p,
+            "frequency_penalty": self.frequency_penalty,
+            "presence_penalty": self.presence_penalty,
+            "stop": self.stop,
+        }
+
+    def _response_cache_key(self, prompt: str) -> Optional[str]:
+        """Cache key for a prompt, or None when the cache must be bypassed"""
+        if self.cache is None:
+            return None
+        if self.temperature > 0 and not self.cache_nondeterministic:
+            self.cache.record_bypass()
+            return None
+        return cache_key(type(self).__name__, self.model, self.sampling_params(), prompt)
+
+    @property
+    def usage_stats(self) -> UsageStats:
+        """Usage so far, summed across the threads that recorded it"""
+        return self.meter.snapshot()
+
     def _update_usage(self, prompt_tokens: int, completion_tokens: int):
-        self.usage_stats.prompt_tokens += prompt_tokens
-        self.usage_stats.completion_tokens += completion_tokens
-        self.usage_stats.total_cost += (
-                (prompt_tokens + completion_tokens) * self._cost_per_token
-        )
+        cost = self.price.cost(prompt_tokens, completion_tokens)
+        self.meter.record(prompt_tokens, completion_tokens, cost)
+        usage_registry.meter(self.model).record(prompt_tokens, completion_tokens, cost)
+        tracing.record_tokens(prompt_tokens, completion_tokens)
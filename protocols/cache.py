@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def cache_key(provider: str, model: str, params: Dict[str, Any], prompt: str) -> str:
+    """Digest identifying a generation by provider, model, params and prompt"""
+    prompt_digest = hashlib.sha256(prompt.encode()).hexdigest()
+    payload = json.dumps(
+        {"provider": provider, "model": model, "params": params, "prompt": prompt_digest},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Base class for generate() response caches"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def _load(self, key: str) -> Optional[str]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _store(self, key: str, value: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._load(key)
+        with self._stats_lock:
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self._store(key, value)
+
+    def record_bypass(self) -> None:
+        with self._stats_lock:
+            self.stats.bypasses += 1
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache with optional TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        super().__init__(ttl=ttl)
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self._expired(created):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _store(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(ResponseCache):
+    """File-backed cache that several processes can share
+
+    Uses one SQLite connection per thread in WAL mode, so readers in other
+    processes are not blocked by writers.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], ttl: Optional[float] = None, timeout: float = 30.0):
+        super().__init__(ttl=ttl)
+        self.path = os.fspath(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT value, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if self._expired(created):
+            with self._connection() as conn:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        return value
+
+    def _store(self, key: str, value: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        if self.ttl is None:
+            return 0
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,255 @@
+import mmap
+import os
+import re
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar, Union
+
+from protocols import tracing
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_PARAGRAPH_BREAK_BYTES = re.compile(rb"\n\s*\n")
+
+CountTokensBatch = Callable[[List[str]], List[int]]
+ContextSource = Union[str, os.PathLike]
+Context = Union[ContextSource, Iterable[ContextSource]]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def is_streaming(context: Context) -> bool:
+    """Whether a context has to be read lazily rather than held as a list"""
+    if isinstance(context, (str, os.PathLike)):
+        return isinstance(context, os.PathLike)
+    return not isinstance(context, (list, tuple)) or any(
+        isinstance(source, os.PathLike) for source in context
+    )
+
+
+def _sources(context: Context) -> Iterable[ContextSource]:
+    return [context] if isinstance(context, (str, os.PathLike)) else context
+
+
+def _cut_point(buffer: Union[bytes, mmap.mmap], start: int, limit: int) -> int:
+    """Where to cut an oversized span: a newline, a space, else a UTF-8 boundary"""
+    for separator in (b"\n", b" "):
+        cut = buffer.rfind(separator, start + 1, limit)
+        if cut > start:
+            return cut
+    # Never split inside a multi-byte character (continuation bytes are 10xxxxxx)
+    cut = limit
+    while cut > start + 1 and buffer[cut] & 0xC0 == 0x80:
+        cut -= 1
+    return cut
+
+
+def _iter_file_paragraphs(path: os.PathLike, max_bytes: Optional[int], encoding: str) -> Iterator[str]:
+    """Paragraphs of a file, scanned through mmap without reading it whole"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            size = len(mm)
+            while start < size:
+                match = _PARAGRAPH_BREAK_BYTES.search(mm, start)
+                end = match.start() if match else size
+                # Exports without blank lines would otherwise become one paragraph
+                while max_bytes and end - start > max_bytes:
+                    cut = _cut_point(mm, start, start + max_bytes)
+                    text = mm[start:cut].decode(encoding, errors="replace").strip()
+                    if text:
+                        yield text
+                    start = cut
+                text = mm[start:end].decode(encoding, errors="replace").strip()
+                if text:
+                    yield text
+                start = match.end() if match else size
+
+
+def iter_paragraphs(
+        context: Context,
+        max_paragraph_bytes: Optional[int] = None,
+        encoding: str = "utf-8"
+) -> Iterator[str]:
+    """Blank-line separated paragraphs from strings and file paths
+
+    ``context`` is a document string, an ``os.PathLike`` file, or an iterable
+    of either. Files are memory-mapped; ``max_paragraph_bytes`` bounds how
+    much of a file a single paragraph may span.
+    """
+    for source in _sources(context):
+        if isinstance(source, os.PathLike):
+            yield from _iter_file_paragraphs(source, max_paragraph_bytes, encoding)
+            continue
+        for paragraph in _PARAGRAPH_BREAK.split(source):
+            paragraph = paragraph.strip()
+            if paragraph:
+                yield paragraph
+
+
+def join_context(context: Context, encoding: str = "utf-8") -> str:
+    """The whole context as one blank-line joined string, reading any files"""
+    def read(source: ContextSource) -> str:
+        if isinstance(source, os.PathLike):
+            with open(source, encoding=encoding, errors="replace") as f:
+                return f.read()
+        return source
+
+    return "\n\n".join(read(source) for source in _sources(context))
+
+
+def _split_oversized(text: str, max_tokens: int, count_tokens: CountTokensBatch) -> List[str]:
+    """Halve a paragraph on whitespace until every piece fits"""
+    pending = [text]
+    pieces = []
+    while pending:
+        piece = pending.pop()
+        if count_tokens([piece])[0] <= max_tokens:
+            pieces.append(piece)
+            continue
+        middle = len(piece) // 2
+        cut = piece.rfind(" ", 0, middle)
+        if cut <= 0:
+            cut = piece.find(" ", middle)
+        if cut <= 0:
+            # A single unbreakable token run: split on characters instead
+            cut = middle
+        left, right = piece[:cut].strip(), piece[cut:].strip()
+        if not left or not right:
+            pieces.append(piece)
+            continue
+        pending.extend([right, left])
+    return pieces
+
+
+def _batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_chunks(
+        paragraphs: Iterable[str],
+        max_tokens: int,
+        count_tokens: CountTokensBatch,
+        batch_size: int = 64
+) -> Iterator[str]:
+    """Greedily pack paragraphs into chunks of at most ``max_tokens`` tokens
+
+    Paragraphs are consumed lazily and counted ``batch_size`` at a time, so
+    only about one chunk plus one batch is held in memory.
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+
+    # A blank-line separator costs roughly one token between paragraphs
+    separator_tokens = 1
+    current: List[str] = []
+    current_tokens = 0
+    for batch in _batched(paragraphs, batch_size):
+        for paragraph, tokens in zip(batch, count_tokens(batch)):
+            pieces = [(paragraph, tokens)]
+            if tokens > max_tokens:
+                split = _split_oversized(paragraph, max_tokens, count_tokens)
+                pieces = list(zip(split, count_tokens(split)))
+            for piece, piece_tokens in pieces:
+                needed = piece_tokens + (separator_tokens if current else 0)
+                if current and current_tokens + needed > max_tokens:
+                    yield "\n\n".join(current)
+                    current, current_tokens = [], 0
+                    needed = piece_tokens
+                current.append(piece)
+                current_tokens += needed
+    if current:
+        yield "\n\n".join(current)
+
+
+def split_into_chunks(
+        documents: Context,
+        max_tokens: int,
+        count_tokens: CountTokensBatch
+) -> List[str]:
+    """Pack documents into chunks of at most ``max_tokens`` tokens
+
+    Paragraphs (blank-line separated) are kept whole where possible and
+    greedily packed, joined by blank lines as in the unchunked context.
+    Paragraphs larger than ``max_tokens`` are split on whitespace.
+    ``count_tokens`` takes a batch of texts, e.g. ``BaseLLM.count_tokens_batch``.
+    """
+    return list(iter_chunks(iter_paragraphs(documents), max_tokens, count_tokens))
+
+
+class SpilledChunks(Sequence[str]):
+    """Chunks spilled to an anonymous temp file and read back through mmap
+
+    Digests are computed while spilling, so the full context never has to
+    be in memory at once: only the chunk being read and one digest and
+    offset per chunk.
+    """
+
+    def __init__(self, chunks: Iterable[str], digest: Callable[[str], str]):
+        self._file = tempfile.TemporaryFile()
+        self._offsets: List[int] = [0]
+        self.digests: List[str] = []
+        for chunk in chunks:
+            data = chunk.encode()
+            self._file.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+            self.digests.append(digest(chunk))
+        self._file.flush()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._offsets[-1] else None
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def __getitem__(self, index: int) -> str:
+        if not -len(self) <= index < len(self):
+            raise IndexError("chunk index out of range")
+        index %= len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._mmap[start:end].decode() if start != end else ""
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "SpilledChunks":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def map_bounded(fn: Callable[[T], R], items: Iterable[T], max_workers: int) -> Iterator[R]:
+    """Ordered ``map`` on a thread pool that only reads a bounded window ahead"""
+    window = max_workers * 2
+    # Keep spans started by fn parented to the caller's span
+    fn = tracing.run_in_context(fn)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = []
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def merge_worker_outputs(outputs: List[str]) -> str:
+    """Default reducer: label each chunk's worker output in context order"""
+    if len(outputs) == 1:
+        return outputs[0]
+    total = len(outputs)
+    return "\n\n".join(
+        f"[Chunk {index}/{total}]\n{output}" for index, output in enumerate(outputs, 1)
+    )
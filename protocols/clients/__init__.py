@@ -1,4 +1,20 @@
-from .ollama_client import OllamaClient
+from .fake_client import FakeLLM, LatencyModel, supervisor_script, worker_script
+from .ollama_client import OllamaClient, OllamaSession, PrefillStats
+from .ollama_pool import OllamaPool
 from .openai_client import OpenAIClient
+from .transport import TransportConfig, TransportRegistry, default_registry
 
-__all__ = ["OllamaClient", "OpenAIClient"]
+__all__ = [
+    "FakeLLM",
+    "LatencyModel",
+    "OllamaClient",
+    "OllamaPool",
+    "OllamaSession",
+    "OpenAIClient",
+    "PrefillStats",
+    "TransportConfig",
+    "TransportRegistry",
+    "default_registry",
+    "supervisor_script",
+    "worker_script",
+]
@@ -1,6 +1,98 @@
 import ollama
-from typing import Any, Generator
-from ..base import BaseLLM
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, Generator, List, Mapping, Optional, Sequence, Union
+from .. import tracing
+from ..base import BaseLLM, cached_generation
+from ..tracing import traced
+from .transport import default_registry
+
+
+@dataclass
+class PrefillStats:
+    """Prompt tokens Ollama evaluated versus tokens reused from its KV cache
+
+    ``saved_ratio`` is the share of session prompt tokens that did not have
+    to be prefilled again.
+    """
+
+    prefill_tokens: int = 0
+    reused_tokens: int = 0
+    calls: int = 0
+    cache_misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def saved_ratio(self) -> float:
+        total = self.prefill_tokens + self.reused_tokens
+        return self.reused_tokens / total if total else 0.0
+
+    def add(self, prefill_tokens: int, reused_tokens: int, cache_miss: bool = False) -> None:
+        with self._lock:
+            self.prefill_tokens += prefill_tokens
+            self.reused_tokens += reused_tokens
+            self.calls += 1
+            self.cache_misses += int(cache_miss)
+
+    def to_dict(self) -> Dict:
+        return {
+            "prefill_tokens": self.prefill_tokens,
+            "reused_tokens": self.reused_tokens,
+            "calls": self.calls,
+            "cache_misses": self.cache_misses,
+            "saved_ratio": self.saved_ratio,
+        }
+
+
+class OllamaSession:
+    """Multi-turn generation that continues from Ollama's cached state
+
+    Every response carries ``context``, the token ids of the conversation so
+    far. Sending it back with the next prompt lets the runner reuse the KV
+    cache it still holds for those tokens and prefill only the new prompt,
+    provided the model stayed loaded (``keep_alive``) and the conversation
+    fits in ``num_ctx``. A session is one conversation: use it from one
+    thread at a time.
+    """
+
+    def __init__(self, client: "OllamaClient", keep_alive: Optional[Union[float, str]] = None):
+        self.client = client
+        self.keep_alive = keep_alive if keep_alive is not None else client.keep_alive
+        self.context: Optional[Sequence[int]] = None
+        self.stats = PrefillStats()
+
+    @property
+    def started(self) -> bool:
+        return self.context is not None
+
+    def generate(self, prompt: str) -> str:
+        client = self.client
+        cached = len(self.context or ())
+        with tracing.span("llm.generate", provider=type(client).__name__, model=client.model, session=True) as span:
+            try:
+                response = client.client.generate(
+                    model=client.model,
+                    prompt=prompt,
+                    context=self.context,
+                    options=client._options(),
+                    keep_alive=self.keep_alive,
+                )
+            except Exception as e:
+                raise RuntimeError(f"Ollama generation failed: {str(e)}")
+            client._record_usage(response, prompt, response["response"])
+            prefill = response.get("prompt_eval_count")
+            if prefill is None:
+                prefill = client.get_num_tokens(prompt) + cached
+            # Evaluating at least the whole context means the cache was gone
+            # (model reloaded, or the slot was reused) and nothing was saved
+            miss = bool(cached) and prefill >= cached
+            reused = 0 if miss else cached
+            self.stats.add(prefill, reused, miss)
+            client.prefill_stats.add(prefill, reused, miss)
+            span.set_attribute("reused_tokens", reused)
+            self.context = response.get("context") or None
+            return response["response"]
 
 
 class OllamaClient(BaseLLM):
@@ -13,28 +105,45 @@ class OllamaClient(BaseLLM):
             **kwargs: Any
     ):
         super().__init__(model=model, **kwargs)
-        self.client = ollama.Client(host=base_url)
+        self.base_url = base_url
+        # How long Ollama keeps the model (and its KV cache) loaded after a call
+        self.keep_alive: Optional[Union[float, str]] = kwargs.get("keep_alive")
+        self.prefill_stats = PrefillStats()
+        # Monotonic time of this client's last completed call; unlike usage,
+        # never shared with an OllamaPool
+        self.last_activity: Optional[float] = None
+        if kwargs.get("shared_transport", True):
+            registry = kwargs.get("transport_registry", default_registry)
+            self.client = ollama.Client(host=base_url, transport=registry.get(base_url))
+            self.async_client = ollama.AsyncClient(host=base_url, transport=registry.get_async(base_url))
+        else:
+            self.client = ollama.Client(host=base_url)
+            self.async_client = ollama.AsyncClient(host=base_url)
+
+    def _options(self) -> Dict[str, Any]:
+        return {
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_tokens,
+            "stop": self.stop,
+        }
 
+    @traced("llm.generate")
+    @cached_generation
     def generate(self, prompt: str) -> str:
         try:
             response = self.client.generate(
                 model=self.model,
                 prompt=prompt,
-                options={
-                    "temperature": self.temperature,
-                    "top_p": self.top_p,
-                    "max_tokens": self.max_tokens,
-                    "stop": self.stop,
-                },
-            )
-            self._update_usage(
-                self.get_num_tokens(prompt),
-                self.get_num_tokens(response["response"])
+                options=self._options(),
+                **self._keep_alive(),
             )
+            self._record_usage(response, prompt, response["response"])
             return response["response"]
         except Exception as e:
             raise RuntimeError(f"Ollama generation failed: {str(e)}")
 
+    @traced("llm.stream")
     def stream(self, prompt: str) -> Generator[str, None, None]:
         # Implement streaming with usage tracking
         total_response = []
@@ -43,25 +152,93 @@ class OllamaClient(BaseLLM):
                 model=self.model,
                 prompt=prompt,
                 stream=True,
-                options={
-                    "temperature": self.temperature,
-                    "top_p": self.top_p,
-                    "max_tokens": self.max_tokens,
-                    "stop": self.stop,
-                },
+                options=self._options(),
+                **self._keep_alive(),
             )
 
+            chunk = {}
             for chunk in stream:
                 total_response.append(chunk["response"])
                 yield chunk["response"]
 
-            self._update_usage(
-                self.get_num_tokens(prompt),
-                self.get_num_tokens("".join(total_response))
+            # The final (done) chunk carries the server-side token counts
+            self._record_usage(chunk, prompt, total_response)
+        except GeneratorExit:
+            # The caller stopped early: closing the HTTP stream makes Ollama
+            # abort the generation; count what was received locally
+            if hasattr(stream, "close"):
+                stream.close()
+            self._record_usage({}, prompt, total_response)
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Ollama streaming failed: {str(e)}")
+
+    @traced("llm.generate")
+    @cached_generation
+    async def agenerate(self, prompt: str) -> str:
+        try:
+            response = await self.async_client.generate(
+                model=self.model,
+                prompt=prompt,
+                options=self._options(),
+                **self._keep_alive(),
+            )
+            self._record_usage(response, prompt, response["response"])
+            return response["response"]
+        except Exception as e:
+            raise RuntimeError(f"Ollama generation failed: {str(e)}")
+
+    @traced("llm.stream")
+    async def astream(self, prompt: str) -> AsyncGenerator[str, None]:
+        total_response = []
+        try:
+            stream = await self.async_client.generate(
+                model=self.model,
+                prompt=prompt,
+                stream=True,
+                options=self._options(),
+                **self._keep_alive(),
             )
+
+            chunk = {}
+            async for chunk in stream:
+                total_response.append(chunk["response"])
+                yield chunk["response"]
+
+            self._record_usage(chunk, prompt, total_response)
+        except GeneratorExit:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+            self._record_usage({}, prompt, total_response)
+            raise
         except Exception as e:
             raise RuntimeError(f"Ollama streaming failed: {str(e)}")
 
+    def _keep_alive(self) -> Dict[str, Any]:
+        return {"keep_alive": self.keep_alive} if self.keep_alive is not None else {}
+
+    def session(self, keep_alive: Optional[Union[float, str]] = None) -> OllamaSession:
+        """A conversation whose later prompts reuse the server's KV cache"""
+        return OllamaSession(self, keep_alive)
+
+    def _record_usage(
+            self,
+            response: Mapping[str, Any],
+            prompt: str,
+            completion: Union[str, List[str]]
+    ) -> None:
+        """Update usage from Ollama's eval counts, counting locally if absent"""
+        self.last_activity = time.monotonic()
+        prompt_tokens = response.get("prompt_eval_count")
+        completion_tokens = response.get("eval_count")
+        if prompt_tokens is None:
+            prompt_tokens = self.get_num_tokens(prompt)
+        if completion_tokens is None:
+            if not isinstance(completion, str):
+                completion = "".join(completion)
+            completion_tokens = self.get_num_tokens(completion)
+        self._update_usage(prompt_tokens, completion_tokens)
+
     def get_num_tokens(self, text: str) -> int:
         # Simplified token counting for demonstration
         return len(text.split())
@@ -0,0 +1,267 @@
+import asyncio
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, Generator, Iterator, List, Optional, Sequence
+
+import httpx
+
+from ..base import BaseLLM
+from .ollama_client import OllamaClient
+
+STRATEGIES = ("least_outstanding", "latency")
+
+_HOST_ERRORS = (httpx.TransportError, ConnectionError, TimeoutError, asyncio.TimeoutError)
+
+
+def _is_host_failure(error: BaseException) -> bool:
+    """Whether an error means the host is unhealthy rather than the request bad
+
+    Connection failures, timeouts and 5xx responses count; 4xx responses
+    (missing model, bad options) and anything else would fail on every host.
+    Clients wrap errors in RuntimeError, so the whole chain is inspected.
+    """
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, _HOST_ERRORS):
+            return True
+        status = getattr(current, "status_code", None)
+        if isinstance(status, int) and status > 0:
+            return status >= 500
+        current = current.__cause__ or current.__context__
+    return False
+
+
+@dataclass
+class HostState:
+    """Passive health and load bookkeeping for one Ollama host"""
+
+    url: str
+    client: OllamaClient
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    ejections: int = 0
+    latency: Optional[float] = None
+    model_loaded: bool = False
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class OllamaPool(BaseLLM):
+    """Ollama client that spreads requests over several hosts
+
+    Each request goes to the healthy host with the lowest score: in-flight
+    requests for ``least_outstanding``, or EWMA latency scaled by in-flight
+    requests for ``latency``. Hosts without the model loaded pay
+    ``cold_penalty`` extra in-flight requests, so warm hosts are preferred
+    until they are noticeably busier. A host failing ``failure_threshold``
+    times in a row is ejected for ``ejection_time`` seconds (doubling on each
+    repeat), then gets traffic again and is restored by its first success.
+    Only connection failures, timeouts and 5xx responses fail over to another
+    host and count against it; an error caused by the request itself is
+    raised straight away.
+    """
+
+    def __init__(
+            self,
+            hosts: Sequence[str],
+            model: str = "llama3.2",
+            strategy: str = "least_outstanding",
+            failure_threshold: int = 3,
+            ejection_time: float = 30.0,
+            max_ejection_time: float = 300.0,
+            cold_penalty: float = 2.0,
+            latency_alpha: float = 0.3,
+            **kwargs: Any
+    ):
+        super().__init__(model=model, **kwargs)
+        if not hosts:
+            raise ValueError("OllamaPool requires at least one host")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, got {strategy!r}")
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.cold_penalty = cold_penalty
+        self.latency_alpha = latency_alpha
+        self.hosts: List[HostState] = []
+        for url in hosts:
+            client = OllamaClient(model=model, base_url=url, **kwargs)
+            # Members account into the pool's totals
+            client.meter = self.meter
+            self.hosts.append(HostState(url=url, client=client))
+        self._lock = threading.Lock()
+
+    def _score(self, host: HostState, fallback_latency: float) -> float:
+        load = host.outstanding + (0.0 if host.model_loaded else self.cold_penalty)
+        if self.strategy == "latency":
+            latency = host.latency if host.latency is not None else fallback_latency
+            return latency * (load + 1)
+        return load
+
+    def _acquire(self, exclude: Sequence[HostState] = ()) -> Optional[HostState]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [host for host in self.hosts if host not in exclude]
+            if not candidates:
+                return None
+            healthy = [host for host in candidates if host.available(now)]
+            if not healthy:
+                # Everything is ejected: fail open on the host due back first
+                healthy = [min(candidates, key=lambda host: host.ejected_until)]
+            known = [host.latency for host in healthy if host.latency is not None]
+            fallback_latency = min(known) if known else 1.0
+            host = min(healthy, key=lambda h: (self._score(h, fallback_latency), h.requests))
+            host.outstanding += 1
+            host.requests += 1
+            return host
+
+    def _abandon(self, host: HostState) -> None:
+        """End a request that failed through no fault of the host"""
+        with self._lock:
+            host.outstanding -= 1
+
+    def _release(self, host: HostState, started: float, error: Optional[BaseException]) -> None:
+        elapsed = time.monotonic() - started
+        with self._lock:
+            host.outstanding -= 1
+            if error is None:
+                host.consecutive_failures = 0
+                host.ejected_until = 0.0
+                host.model_loaded = True
+                host.latency = elapsed if host.latency is None else (
+                    self.latency_alpha * elapsed + (1 - self.latency_alpha) * host.latency
+                )
+                return
+            host.failures += 1
+            host.consecutive_failures += 1
+            if host.consecutive_failures >= self.failure_threshold:
+                repeats = host.consecutive_failures - self.failure_threshold
+                host.ejected_until = time.monotonic() + min(
+                    self.ejection_time * 2 ** repeats, self.max_ejection_time
+                )
+                host.ejections += 1
+                host.model_loaded = False
+
+    @contextmanager
+    def _route(self, host: HostState) -> Iterator[None]:
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Also runs when a caller abandons a stream (GeneratorExit)
+            if error is not None and not _is_host_failure(error):
+                self._abandon(host)
+            else:
+                self._release(host, started, error)
+
+    def _attempts(self) -> Iterator[HostState]:
+        """Hosts to try for one request, each at most once"""
+        tried: List[HostState] = []
+        while True:
+            host = self._acquire(exclude=tried)
+            if host is None:
+                return
+            tried.append(host)
+            yield host
+
+    def generate(self, prompt: str) -> str:
+        last_error: Optional[Exception] = None
+        for host in self._attempts():
+            try:
+                with self._route(host):
+                    return host.client.generate(prompt)
+            except Exception as e:
+                if not _is_host_failure(e):
+                    raise
+                last_error = e
+        raise RuntimeError(f"All Ollama hosts failed: {last_error}")
+
+    async def agenerate(self, prompt: str) -> str:
+        last_error: Optional[Exception] = None
+        for host in self._attempts():
+            try:
+                with self._route(host):
+                    return await host.client.agenerate(prompt)
+            except Exception as e:
+                if not _is_host_failure(e):
+                    raise
+                last_error = e
+        raise RuntimeError(f"All Ollama hosts failed: {last_error}")
+
+    def stream(self, prompt: str) -> Generator[str, None, None]:
+        last_error: Optional[Exception] = None
+        for host in self._attempts():
+            started = False
+            try:
+                with self._route(host):
+                    for chunk in host.client.stream(prompt):
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                # Chunks already reached the caller, so another host cannot resume
+                if started or not _is_host_failure(e):
+                    raise
+                last_error = e
+        raise RuntimeError(f"All Ollama hosts failed: {last_error}")
+
+    async def astream(self, prompt: str) -> AsyncGenerator[str, None]:
+        last_error: Optional[Exception] = None
+        for host in self._attempts():
+            started = False
+            try:
+                with self._route(host):
+                    async for chunk in host.client.astream(prompt):
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                if started or not _is_host_failure(e):
+                    raise
+                last_error = e
+        raise RuntimeError(f"All Ollama hosts failed: {last_error}")
+
+    def get_num_tokens(self, text: str) -> int:
+        return self.hosts[0].client.get_num_tokens(text)
+
+    def refresh_loaded_models(self) -> None:
+        """Actively ask every host which models it currently has loaded"""
+        for host in self.hosts:
+            try:
+                loaded = host.client.client.ps()
+                names = {entry["model"] for entry in loaded["models"]}
+            except Exception:
+                continue
+            with self._lock:
+                host.model_loaded = self.model in names or f"{self.model}:latest" in names
+
+    def host_stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": host.url,
+                    "healthy": host.available(now),
+                    "outstanding": host.outstanding,
+                    "requests": host.requests,
+                    "failures": host.failures,
+                    "ejections": host.ejections,
+                    "latency": host.latency,
+                    "model_loaded": host.model_loaded,
+                }
+                for host in self.hosts
+            ]
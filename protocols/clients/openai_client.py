@@ -1,10 +1,48 @@
+import asyncio
+import functools
 import httpx
 import openai
 import os
 import tiktoken
+import time
 
-from typing import Any, Generator, List, Optional
-from ..base import BaseLLM
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
+from ..base import BaseLLM, cached_generation
+from ..tracing import traced
+from ..ratelimit import RateLimiter, RetryPolicy, is_rate_limit
+from .transport import default_registry
+
+FALLBACK_ENCODING = "o200k_base"
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+@functools.lru_cache(maxsize=None)
+def encoder_for_model(model: str) -> tiktoken.Encoding:
+    """Resolve and cache the tiktoken encoding for a model name
+
+    Accepts model names (``gpt-4o``), encoding names (``cl100k_base``) and
+    falls back to FALLBACK_ENCODING for models tiktoken does not know.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    try:
+        return tiktoken.get_encoding(model)
+    except ValueError:
+        return tiktoken.get_encoding(FALLBACK_ENCODING)
+
+
+def _sdk_default_timeout() -> httpx.Timeout:
+    """The SDK's default timeout as an ``httpx.Timeout`` for our own clients
+
+    Some SDK releases define it with a vendored httpx, whose Timeout
+    the installed httpx cannot apply to sockets.
+    """
+    timeout = openai.DEFAULT_TIMEOUT
+    if isinstance(timeout, httpx.Timeout):
+        return timeout
+    return httpx.Timeout(**timeout.as_dict())
 
 
 class OpenAIClient(BaseLLM):
@@ -19,49 +57,196 @@ class OpenAIClient(BaseLLM):
             **kwargs: Any
     ):
         super().__init__(model=model, **kwargs)
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.organization = organization or os.getenv("OPENAI_ORG_ID")
+        self.base_url = base_url
+        self._stream_usage = kwargs.get("stream_usage", False)
+        self.rate_limiter: Optional[RateLimiter] = kwargs.get("rate_limiter")
+        self.retry_policy: Optional[RetryPolicy] = kwargs.get("retry_policy", RetryPolicy())
+        self._completion_estimate = kwargs.get("completion_token_estimate", 512)
+        # Our retry policy replaces the SDK's built-in retries
+        sdk_retries = 0 if self.retry_policy else openai.DEFAULT_MAX_RETRIES
+        http_client = async_http_client = None
+        if kwargs.get("shared_transport", True):
+            registry = kwargs.get("transport_registry", default_registry)
+            endpoint = base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL
+            http_client = httpx.Client(
+                transport=registry.get(endpoint),
+                timeout=_sdk_default_timeout(),
+                follow_redirects=True,
+            )
+            async_http_client = httpx.AsyncClient(
+                transport=registry.get_async(endpoint),
+                timeout=_sdk_default_timeout(),
+                follow_redirects=True,
+            )
         self.client = openai.OpenAI(
-            api_key=api_key or os.getenv("OPENAI_API_KEY"),
-            organization=organization or os.getenv("OPENAI_ORG_ID"),
+            api_key=self.api_key,
+            organization=self.organization,
+            base_url=base_url,
+            http_client=http_client,
+            max_retries=sdk_retries,
+        )
+        self.async_client = openai.AsyncOpenAI(
+            api_key=self.api_key,
+            organization=self.organization,
             base_url=base_url,
+            http_client=async_http_client,
+            max_retries=sdk_retries,
         )
 
+    def _completion_params(self, prompt: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "top_p": self.top_p,
+            "frequency_penalty": self.frequency_penalty,
+            "presence_penalty": self.presence_penalty,
+            "stop": self.stop,
+        }
+
+    def _stream_params(self, prompt: str) -> Dict[str, Any]:
+        params = self._completion_params(prompt)
+        params["stream"] = True
+        if self._stream_usage:
+            params["stream_options"] = {"include_usage": True}
+        return params
+
+    def _record_usage(self, usage: Any, prompt: str, completion: Optional[str], estimate: int = 0) -> None:
+        """Update usage from the API's reported counts, tokenizing only if absent"""
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            prompt_tokens, completion_tokens = self.count_tokens_batch([prompt, completion or ""])
+        self._update_usage(prompt_tokens, completion_tokens)
+        if self.rate_limiter and estimate:
+            self.rate_limiter.reconcile(estimate, prompt_tokens + completion_tokens)
+
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Pre-flight token cost used to charge the tokens-per-minute limit"""
+        if not self.rate_limiter or not self.rate_limiter.tokens:
+            return 0
+        return self.get_num_tokens(prompt) + (self.max_tokens or self._completion_estimate)
+
+    def _should_retry(self, error: Exception, attempt: int, estimate: int) -> Optional[float]:
+        """Delay before retrying a failed request, or None to give up"""
+        if self.rate_limiter:
+            # The failed request did not consume token quota, retried or not
+            self.rate_limiter.reconcile(estimate, 0)
+        policy = self.retry_policy
+        if policy is None or attempt >= policy.max_retries or not policy.is_retryable(error):
+            return None
+        delay = policy.delay(attempt, error)
+        if self.rate_limiter and is_rate_limit(error):
+            self.rate_limiter.pause(delay)
+        return delay
+
+    def _create(self, params: Dict[str, Any], estimate: int) -> Any:
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimate)
+            try:
+                return self.client.chat.completions.create(**params)
+            except Exception as e:
+                delay = self._should_retry(e, attempt, estimate)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    async def _acreate(self, params: Dict[str, Any], estimate: int) -> Any:
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                await self.rate_limiter.aacquire(estimate)
+            try:
+                return await self.async_client.chat.completions.create(**params)
+            except Exception as e:
+                delay = self._should_retry(e, attempt, estimate)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    @traced("llm.generate")
+    @cached_generation
     def generate(self, prompt: str) -> str:
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                top_p=self.top_p,
-                frequency_penalty=self.frequency_penalty,
-                presence_penalty=self.presence_penalty,
-                stop=self.stop,
-            )
-            return response.choices[0].message.content
+            estimate = self._estimate_tokens(prompt)
+            response = self._create(self._completion_params(prompt), estimate)
+            content = response.choices[0].message.content
+            self._record_usage(response.usage, prompt, content, estimate)
+            return content
         except Exception as e:
             raise RuntimeError(f"OpenAI generation failed: {str(e)}")
 
+    @traced("llm.stream")
     def stream(self, prompt: str) -> Generator[str, None, None]:
         try:
-            stream = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                top_p=self.top_p,
-                frequency_penalty=self.frequency_penalty,
-                presence_penalty=self.presence_penalty,
-                stop=self.stop,
-                stream=True,
-            )
+            estimate = self._estimate_tokens(prompt)
+            # Only opening the stream is retried; once chunks flow it is not idempotent
+            stream = self._create(self._stream_params(prompt), estimate)
+            total_response = []
+            usage = None
             for chunk in stream:
-                if chunk.choices[0].delta.content:
+                # With include_usage the last chunk has usage and no choices
+                usage = chunk.usage if not chunk.choices else usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    total_response.append(chunk.choices[0].delta.content)
                     yield chunk.choices[0].delta.content
+            self._record_usage(usage, prompt, "".join(total_response), estimate)
+        except GeneratorExit:
+            # The caller stopped early: drop the connection so the server stops
+            # generating, and account for what was received
+            if hasattr(stream, "close"):
+                stream.close()
+            self._record_usage(None, prompt, "".join(total_response), estimate)
+            raise
+        except Exception as e:
+            raise RuntimeError(f"OpenAI streaming failed: {str(e)}")
+
+    @traced("llm.generate")
+    @cached_generation
+    async def agenerate(self, prompt: str) -> str:
+        try:
+            estimate = self._estimate_tokens(prompt)
+            response = await self._acreate(self._completion_params(prompt), estimate)
+            content = response.choices[0].message.content
+            self._record_usage(response.usage, prompt, content, estimate)
+            return content
+        except Exception as e:
+            raise RuntimeError(f"OpenAI generation failed: {str(e)}")
+
+    @traced("llm.stream")
+    async def astream(self, prompt: str) -> AsyncGenerator[str, None]:
+        try:
+            estimate = self._estimate_tokens(prompt)
+            stream = await self._acreate(self._stream_params(prompt), estimate)
+            total_response = []
+            usage = None
+            async for chunk in stream:
+                usage = chunk.usage if not chunk.choices else usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    total_response.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+            self._record_usage(usage, prompt, "".join(total_response), estimate)
+        except GeneratorExit:
+            if hasattr(stream, "close"):
+                await stream.close()
+            self._record_usage(None, prompt, "".join(total_response), estimate)
+            raise
         except Exception as e:
             raise RuntimeError(f"OpenAI streaming failed: {str(e)}")
 
     def get_num_tokens(self, text: str) -> int:
         # Use OpenAI's tokenizer for accurate count
-        encoder = tiktoken.get_encoding(self.model)
+        encoder = encoder_for_model(self.model)
         tokens = encoder.encode(text)
         return len(tokens)
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        encoder = encoder_for_model(self.model)
+        return [len(tokens) for tokens in encoder.encode_batch(texts)]
@@ -0,0 +1,184 @@
+import threading
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import httpx
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Connection pool settings for one endpoint
+
+    ``http2`` needs the optional ``h2`` package (``pip install httpx[http2]``).
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    connections: int = 0
+    active_connections: int = 0
+    idle_connections: int = 0
+    http2_connections: int = 0
+
+
+class _PoolStatsMixin:
+    """Request counting and pool inspection shared by sync/async transports"""
+
+    def _init_stats(self) -> None:
+        self._requests = 0
+        self._stats_lock = threading.Lock()
+
+    def _count_request(self) -> None:
+        with self._stats_lock:
+            self._requests += 1
+
+    def stats(self) -> PoolStats:
+        connections = list(self._pool.connections)
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return PoolStats(
+            requests=self._requests,
+            connections=len(connections),
+            active_connections=len(connections) - idle,
+            idle_connections=idle,
+            http2_connections=sum(
+                1 for conn in connections
+                if type(getattr(conn, "_connection", None)).__name__ == "HTTP2Connection"
+            ),
+        )
+
+
+class PooledTransport(_PoolStatsMixin, httpx.HTTPTransport):
+    """Shared transport; closing one httpx client must not close the pool"""
+
+    def __init__(self, config: TransportConfig):
+        super().__init__(limits=config.limits(), http2=config.http2)
+        self._init_stats()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._count_request()
+        return super().handle_request(request)
+
+    def close(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        super().close()
+
+
+class AsyncPooledTransport(_PoolStatsMixin, httpx.AsyncHTTPTransport):
+    """Shared async transport; closing one client must not close the pool"""
+
+    def __init__(self, config: TransportConfig):
+        super().__init__(limits=config.limits(), http2=config.http2)
+        self._init_stats()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._count_request()
+        return await super().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        await super().aclose()
+
+
+def endpoint_key(base_url: Union[str, httpx.URL]) -> str:
+    """Normalise a base URL to the scheme://host:port its pool is keyed on"""
+    url = httpx.URL(str(base_url))
+    port = url.port or {"http": 80, "https": 443}.get(url.scheme)
+    return f"{url.scheme}://{url.host}:{port}"
+
+
+class TransportRegistry:
+    """Process-wide pool of httpx transports keyed by endpoint
+
+    Every client pointing at the same scheme/host/port gets the same
+    transport, and therefore the same connection pool, so keep-alive
+    connections and TLS sessions are reused across client instances. Async
+    transports hold connections bound to the event loop that opened them and
+    are meant for a single long-lived loop.
+    """
+
+    def __init__(self, default_config: Optional[TransportConfig] = None):
+        self.default_config = default_config or TransportConfig()
+        self._configs: Dict[str, TransportConfig] = {}
+        self._transports: Dict[Tuple[str, bool], _PoolStatsMixin] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, base_url: Union[str, httpx.URL], config: TransportConfig) -> None:
+        """Set pool settings for an endpoint; applies to transports created later"""
+        with self._lock:
+            self._configs[endpoint_key(base_url)] = config
+
+    def get(self, base_url: Union[str, httpx.URL]) -> PooledTransport:
+        return self._get(base_url, asynchronous=False)
+
+    def get_async(self, base_url: Union[str, httpx.URL]) -> AsyncPooledTransport:
+        return self._get(base_url, asynchronous=True)
+
+    def _get(self, base_url: Union[str, httpx.URL], asynchronous: bool):
+        key = (endpoint_key(base_url), asynchronous)
+        with self._lock:
+            transport = self._transports.get(key)
+            if transport is None:
+                config = self._configs.get(key[0], self.default_config)
+                transport_cls = AsyncPooledTransport if asynchronous else PooledTransport
+                transport = self._transports[key] = transport_cls(config)
+            return transport
+
+    def stats(self) -> Dict[str, PoolStats]:
+        """Pool statistics per endpoint, with sync and async pools combined"""
+        with self._lock:
+            transports = list(self._transports.items())
+        combined: Dict[str, PoolStats] = {}
+        for (endpoint, _), transport in transports:
+            stats = transport.stats()
+            total = combined.setdefault(endpoint, PoolStats())
+            total.requests += stats.requests
+            total.connections += stats.connections
+            total.active_connections += stats.active_connections
+            total.idle_connections += stats.idle_connections
+            total.http2_connections += stats.http2_connections
+        return combined
+
+    def close(self) -> None:
+        """Shut down synchronous pools and forget every transport
+
+        Async pools are forgotten too; use ``aclose`` from the event loop
+        that owns them to shut their connections down as well.
+        """
+        with self._lock:
+            transports = list(self._transports.values())
+            self._transports.clear()
+        for transport in transports:
+            if isinstance(transport, PooledTransport):
+                transport.shutdown()
+
+    async def aclose(self) -> None:
+        """Shut down every pool, awaiting the async ones"""
+        with self._lock:
+            transports = list(self._transports.values())
+            self._transports.clear()
+        for transport in transports:
+            if isinstance(transport, AsyncPooledTransport):
+                await transport.shutdown()
+            else:
+                transport.shutdown()
+
+
+default_registry = TransportRegistry()
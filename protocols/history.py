@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+RETENTION_POLICIES = ("full", "digests", "spill")
+
+# Round number stays in memory under every policy; everything else is payload
+_ROUND_KEY = "round"
+
+Encoder = Callable[[Any], Any]
+Decoder = Callable[[str, Any], Any]
+
+
+def field_digest(value: Any, encode: Encoder = lambda value: value) -> str:
+    """``sha256:<hex>`` of a field, serialising non-strings as canonical JSON"""
+    value = encode(value)
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return "sha256:" + hashlib.sha256(value.encode()).hexdigest()
+
+
+class SpillFile:
+    """Append-only record file shared by every history spilled into it
+
+    Appends are serialised under a lock and return an (offset, length) pair;
+    reads use ``os.pread`` so they never move the append position. Without a
+    path an anonymous temp file is used and removed on close.
+    """
+
+    def __init__(self, path: Optional[Union[str, os.PathLike]] = None):
+        if path is None:
+            self._file = tempfile.TemporaryFile()
+        else:
+            self._file = open(path, "ab+")
+        self._lock = threading.Lock()
+        self._file.seek(0, os.SEEK_END)
+        self._size = self._file.tell()
+
+    def append(self, data: bytes) -> Tuple[int, int]:
+        with self._lock:
+            offset = self._size
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> bytes:
+        return os.pread(self._file.fileno(), length, offset)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class LazyRecord(Mapping):
+    """History entry whose payload is read back from the spill file on access"""
+
+    def __init__(self, history: "ProcessingHistory", round_number: int, location: Tuple[int, int]):
+        self._history = history
+        self._round = round_number
+        self._location = location
+
+    def _payload(self) -> Dict[str, Any]:
+        # Not cached, so touching an entry does not pin it in memory
+        return self._history._load(self._location)
+
+    def __getitem__(self, key: str) -> Any:
+        if key == _ROUND_KEY:
+            return self._round
+        return self._payload()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield _ROUND_KEY
+        yield from self._history._spilled_keys(self._location)
+
+    def __len__(self) -> int:
+        return 1 + len(self._history._spilled_keys(self._location))
+
+    def load(self) -> Dict[str, Any]:
+        """Materialise the whole entry as a plain dict"""
+        return {_ROUND_KEY: self._round, **self._payload()}
+
+    def __repr__(self) -> str:
+        return f"LazyRecord(round={self._round}, offset={self._location[0]})"
+
+
+class ProcessingHistory(Sequence):
+    """Per-round processing history under a retention policy
+
+    ``full`` keeps every entry as given. ``digests`` keeps only the round
+    number and a SHA-256 of each other field. ``spill`` appends each entry's
+    payload as one JSON line to a ``SpillFile`` and keeps its offset, and
+    indexing returns a ``LazyRecord`` that reads the payload on access.
+    ``encode``/``decode`` convert field values to and from JSON-compatible
+    form, keyed by field name on decode.
+    """
+
+    def __init__(
+            self,
+            retention: str = "full",
+            spill_file: Optional[SpillFile] = None,
+            encode: Encoder = lambda value: value,
+            decode: Decoder = lambda key, value: value
+    ):
+        if retention not in RETENTION_POLICIES:
+            raise ValueError(f"retention must be one of {RETENTION_POLICIES}, got {retention!r}")
+        if retention == "spill" and spill_file is None:
+            raise ValueError("spill retention needs a SpillFile")
+        self.retention = retention
+        self.spill_file = spill_file
+        self._encode = encode
+        self._decode = decode
+        self._entries: List[Any] = []
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        round_number = entry.get(_ROUND_KEY)
+        payload = {key: value for key, value in entry.items() if key != _ROUND_KEY}
+        if self.retention == "full":
+            self._entries.append(entry)
+        elif self.retention == "digests":
+            self._entries.append({
+                _ROUND_KEY: round_number,
+                **{key: field_digest(value, self._encode) for key, value in payload.items()},
+            })
+        else:
+            line = json.dumps(
+                {key: self._encode(value) for key, value in payload.items()},
+                separators=(",", ":"),
+                default=str,
+            )
+            location = self.spill_file.append(line.encode() + b"\n")
+            self._entries.append((round_number, location))
+
+    def _load(self, location: Tuple[int, int]) -> Dict[str, Any]:
+        raw = json.loads(self.spill_file.read(*location))
+        return {key: self._decode(key, value) for key, value in raw.items()}
+
+    def _spilled_keys(self, location: Tuple[int, int]) -> List[str]:
+        return list(json.loads(self.spill_file.read(*location)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        entry = self._entries[index]
+        if self.retention == "spill":
+            round_number, location = entry
+            return LazyRecord(self, round_number, location)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"ProcessingHistory(retention={self.retention!r}, rounds={len(self)})"
@@ -0,0 +1,203 @@
+import os
+import threading
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+PathLike = Union[str, os.PathLike]
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    term: str
+    weight: float
+    start: int
+    end: int
+
+
+def _lower(text: str) -> str:
+    """``text.lower()`` that keeps offsets aligned with ``text``
+
+    A few characters lowercase to more than one (``"İ"`` becomes ``"i̇"``),
+    which would shift every later match offset; those keep only the first
+    character. Lowercasing never shortens a character, so equal lengths
+    mean a one-to-one mapping.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower()[0] for ch in text)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a weighted, case-insensitive term set
+
+    Built once from ``{term: weight}``; scanning is a single pass over the
+    input whose cost does not depend on the number of terms.
+    """
+
+    def __init__(self, terms: Mapping[str, float], whole_words: bool = True):
+        self.whole_words = whole_words
+        self._terms: List[Tuple[str, float]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for term, weight in terms.items():
+            if not 0.0 <= weight <= 1.0:
+                raise ValueError(f"Weight for {term!r} must be within [0, 1], got {weight}")
+            term = _lower(term.strip())
+            if not term:
+                continue
+            node = 0
+            for ch in term:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (len(self._terms),)
+            self._terms.append((term, weight))
+
+        # Breadth-first failure links; outputs are merged along them so a
+        # match never needs to walk the failure chain.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def find(self, text: str) -> Iterator[KeywordMatch]:
+        """Yield every term occurrence in ``text`` in order of its end offset"""
+        lowered = _lower(text)
+        goto, fail, out, terms = self._goto, self._fail, self._out, self._terms
+        size = len(lowered)
+        state = 0
+        for index, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for term_id in out[state]:
+                term, weight = terms[term_id]
+                start = index + 1 - len(term)
+                if self.whole_words and (
+                        (start > 0 and lowered[start - 1].isalnum())
+                        or (index + 1 < size and lowered[index + 1].isalnum())
+                ):
+                    continue
+                yield KeywordMatch(term, weight, start, index + 1)
+
+    def score(self, text: str, stop_at: Optional[float] = None) -> float:
+        """Combine distinct matched term weights as ``1 - prod(1 - w)``
+
+        Scanning stops early once the score reaches ``stop_at``.
+        """
+        seen = set()
+        remaining = 1.0
+        for match in self.find(text):
+            if match.term in seen:
+                continue
+            seen.add(match.term)
+            remaining *= 1.0 - match.weight
+            if stop_at is not None and 1.0 - remaining >= stop_at:
+                break
+        return 1.0 - remaining
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def load_terms(path: PathLike, default_weight: float = 1.0) -> Dict[str, float]:
+    """Read ``term[<TAB or comma>weight]`` lines; blank and ``#`` lines are skipped
+
+    A tab always separates the weight. Without one, text after the last comma
+    is a weight only if it is a number, so terms such as ``Doe, Jane`` load
+    whole.
+    """
+    terms = {}
+    with open(path, encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "\t" in line:
+                term, _, weight = line.rpartition("\t")
+            else:
+                term, _, weight = line.rpartition(",") if "," in line else (line, "", "")
+                if weight.strip() and not _is_number(weight):
+                    term, weight = line, ""
+            try:
+                terms[term.strip()] = float(weight) if weight.strip() else default_weight
+            except ValueError:
+                raise ValueError(f"{path}:{line_no}: invalid weight {weight!r}") from None
+    return terms
+
+
+class SensitiveTermDictionary:
+    """Reloadable weighted term dictionary backed by a KeywordAutomaton
+
+    Terms come from an inline mapping plus any number of dictionary files.
+    ``reload`` rebuilds the automaton off to the side and swaps it in, so
+    concurrent callers always see a complete automaton.
+    """
+
+    def __init__(
+            self,
+            terms: Optional[Mapping[str, float]] = None,
+            paths: Iterable[PathLike] = (),
+            whole_words: bool = True
+    ):
+        self.terms = dict(terms or {})
+        self.paths = list(paths)
+        self.whole_words = whole_words
+        self._lock = threading.Lock()
+        self._mtimes: Dict[str, float] = {}
+        self.automaton = self._build()
+
+    def _build(self) -> KeywordAutomaton:
+        merged = dict(self.terms)
+        mtimes = {}
+        for path in self.paths:
+            merged.update(load_terms(path))
+            mtimes[os.fspath(path)] = os.path.getmtime(path)
+        automaton = KeywordAutomaton(merged, whole_words=self.whole_words)
+        self._mtimes = mtimes
+        return automaton
+
+    def reload(self) -> None:
+        """Re-read dictionary files and atomically replace the automaton"""
+        with self._lock:
+            self.automaton = self._build()
+
+    def reload_if_changed(self) -> bool:
+        """Reload only when a dictionary file's mtime has changed"""
+        changed = any(
+            os.path.getmtime(path) != self._mtimes.get(os.fspath(path))
+            for path in self.paths
+        )
+        if changed:
+            self.reload()
+        return changed
+
+    def find(self, text: str) -> Iterator[KeywordMatch]:
+        return self.automaton.find(text)
+
+    def score(self, text: str, stop_at: Optional[float] = None) -> float:
+        return self.automaton.score(text, stop_at)
@@ -0,0 +1,62 @@
+import hashlib
+
+from typing import Iterable, List, Tuple
+
+# Domain separation keeps a leaf from ever colliding with an inner node
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def leaf_digest(chunk: str) -> str:
+    return hashlib.sha256(_LEAF_PREFIX + chunk.encode()).hexdigest()
+
+
+def _node_digest(left: str, right: str) -> str:
+    return hashlib.sha256(_NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+class MerkleTree:
+    """Binary SHA-256 Merkle tree over context chunks
+
+    An odd node at the end of a level is promoted unchanged, so appending a
+    chunk only rehashes one path. Editing one chunk changes its leaf and the
+    path to the root; every other leaf digest stays the same.
+    """
+
+    def __init__(self, leaves: Iterable[str]):
+        self.leaves: List[str] = list(leaves)
+        if not self.leaves:
+            self.leaves = [leaf_digest("")]
+        self.levels: List[List[str]] = [self.leaves]
+        level = self.leaves
+        while len(level) > 1:
+            level = [
+                _node_digest(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                for i in range(0, len(level), 2)
+            ]
+            self.levels.append(level)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[str]) -> "MerkleTree":
+        return cls(leaf_digest(chunk) for chunk in chunks)
+
+    @property
+    def root(self) -> str:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[Tuple[str, str]]:
+        """Sibling path for leaf ``index`` as (side, digest) pairs"""
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(("left" if sibling < index else "right", level[sibling]))
+            index //= 2
+        return path
+
+    @staticmethod
+    def verify(leaf: str, proof: List[Tuple[str, str]], root: str) -> bool:
+        digest = leaf
+        for side, sibling in proof:
+            digest = _node_digest(sibling, digest) if side == "left" else _node_digest(digest, sibling)
+        return digest == root
@@ -0,0 +1,173 @@
+import threading
+import time
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+
+@dataclass
+class UsageStats:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_cost: float = 0.0
+    calls: int = 0
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """Price per token, charged separately for input and output"""
+
+    input: float = 0.0
+    output: float = 0.0
+
+    @classmethod
+    def per_million(cls, input: float, output: float) -> "ModelPrice":
+        """From the per-million-token prices providers publish"""
+        return cls(input / 1_000_000, output / 1_000_000)
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return prompt_tokens * self.input + completion_tokens * self.output
+
+
+FREE = ModelPrice()
+
+
+class PriceTable:
+    """Per-model prices, matched on the longest model-name prefix
+
+    A prefix entry covers dated snapshots, so ``"gpt-4o"`` prices
+    ``"gpt-4o-2024-08-06"``, while a more specific ``"gpt-4o-mini"`` entry
+    still wins for that family. Unknown models use ``default``.
+    """
+
+    def __init__(self, prices: Optional[Mapping[str, ModelPrice]] = None, default: ModelPrice = FREE):
+        self._prices: Dict[str, ModelPrice] = dict(prices or {})
+        self.default = default
+        self._lock = threading.Lock()
+
+    def set(self, model: str, price: ModelPrice) -> None:
+        with self._lock:
+            self._prices[model] = price
+
+    def lookup(self, model: str) -> ModelPrice:
+        with self._lock:
+            if model in self._prices:
+                return self._prices[model]
+            matches = [name for name in self._prices if model.startswith(name)]
+        return self._prices[max(matches, key=len)] if matches else self.default
+
+
+# Empty by default: provider prices change, so deployments fill this in
+default_prices = PriceTable()
+
+
+class UsageMeter:
+    """Usage counters that never lose updates and never lock on record
+
+    Every thread records into its own counter, created on its first call,
+    so concurrent ``record`` calls never touch shared state. Reads sum all
+    counters; those of threads that have exited are folded into a retired
+    total, so short-lived pool threads don't accumulate.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._counters: List[Tuple[threading.Thread, List]] = []
+        self._retired = [0, 0, 0.0, 0]
+        self._lock = threading.Lock()
+        self.created = time.monotonic()
+
+    def _new_counter(self) -> List:
+        counter = [0, 0, 0.0, 0]
+        self._local.counter = counter
+        with self._lock:
+            self._counters.append((threading.current_thread(), counter))
+        return counter
+
+    def record(self, prompt_tokens: int, completion_tokens: int, cost: float = 0.0) -> None:
+        try:
+            counter = self._local.counter
+        except AttributeError:
+            counter = self._new_counter()
+        # Only this thread ever writes this counter
+        counter[0] += prompt_tokens
+        counter[1] += completion_tokens
+        counter[2] += cost
+        counter[3] += 1
+
+    def snapshot(self) -> UsageStats:
+        with self._lock:
+            live = []
+            for thread, counter in self._counters:
+                if thread.is_alive():
+                    live.append((thread, counter))
+                else:
+                    # The thread can no longer write, so folding it is safe
+                    for i in range(4):
+                        self._retired[i] += counter[i]
+            self._counters = live
+            totals = list(self._retired)
+            for _, counter in live:
+                for i in range(4):
+                    totals[i] += counter[i]
+        return UsageStats(
+            prompt_tokens=totals[0],
+            completion_tokens=totals[1],
+            total_cost=totals[2],
+            calls=totals[3],
+        )
+
+
+class UsageRegistry:
+    """Process-wide usage per model, with throughput and spend rates
+
+    Clients record here as well as into their own meter. ``report`` returns
+    totals plus tokens/s and cost/s over the interval since the previous
+    report (or since the model was first seen), so polling it periodically
+    gives current rates.
+    """
+
+    def __init__(self):
+        self._meters: Dict[str, UsageMeter] = {}
+        self._last: Dict[str, Tuple[float, UsageStats]] = {}
+        self._lock = threading.Lock()
+
+    def meter(self, model: str) -> UsageMeter:
+        meter = self._meters.get(model)
+        if meter is None:
+            with self._lock:
+                meter = self._meters.setdefault(model, UsageMeter())
+        return meter
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        now = time.monotonic()
+        with self._lock:
+            meters = dict(self._meters)
+        result = {}
+        for model, meter in sorted(meters.items()):
+            stats = meter.snapshot()
+            with self._lock:
+                since, previous = self._last.get(model, (meter.created, UsageStats()))
+                self._last[model] = (now, stats)
+            elapsed = max(now - since, 1e-9)
+            tokens = (stats.prompt_tokens + stats.completion_tokens) - (
+                previous.prompt_tokens + previous.completion_tokens
+            )
+            result[model] = {
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "total_cost": stats.total_cost,
+                "calls": stats.calls,
+                "tokens_per_second": tokens / elapsed,
+                "completion_tokens_per_second": (stats.completion_tokens - previous.completion_tokens) / elapsed,
+                "cost_per_second": (stats.total_cost - previous.total_cost) / elapsed,
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._meters.clear()
+            self._last.clear()
+
+
+usage_registry = UsageRegistry()
@@ -1,36 +1,65 @@
+import asyncio
+import contextlib
+import copy
+import dataclasses
 import hashlib
 import json
+import threading
 
-from typing import Optional, List, Dict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from types import MappingProxyType
+from typing import Any, AsyncGenerator, Callable, Generator, Iterable, Mapping, Optional, List, Dict, Sequence, Tuple
 from dataclasses import dataclass, field
 
 from .clients import OllamaClient, OpenAIClient
+from protocols.audit import AuditLogWriter
+from protocols.cache import ResponseCache
+from protocols.chunking import (
+    Context,
+    SpilledChunks,
+    is_streaming,
+    iter_chunks,
+    iter_paragraphs,
+    join_context,
+    map_bounded,
+    merge_worker_outputs,
+    split_into_chunks,
+)
+from protocols import tracing
+from protocols.history import RETENTION_POLICIES, ProcessingHistory, SpillFile
+from protocols.merkle import MerkleTree, leaf_digest
+from protocols.keywords import SensitiveTermDictionary
 from protocols.utils import SafeJSONParser
+from protocols.warmup import WarmupManager
 from protocols.prompts import core, interaction
 
-from dataclasses import dataclass, field
-from typing import Optional, Dict, List
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None
 
 
-@dataclass
-class PrivacyDecision_v2:
-    """Enhanced decision class with cryptographic validation and compliance tracking"""
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
 
-    # Core response data
-    content: Optional[Dict] = None
-    error: Optional[str] = None
 
-    # Processing metadata
-    requires_additional_processing: bool = False
-    confidence_score: float = 0.0
+def _json_default(value: Any) -> Any:
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
-    # Data provenance
-    data_sources: List[str] = field(default_factory=list)
-    input_digest: Optional[str] = None
-    processing_signature: Optional[str] = None
 
-    # Compliance tracking
-    compliance_status: Dict = field(default_factory=lambda: {
+def canonical_json(value: Any) -> str:
+    """Sorted-key, compact JSON: the form decision digests are computed over"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def _new_compliance_status() -> Dict:
+    return {
         "gdpr": {
             "article32": False,
             "recital75": False
@@ -39,20 +68,143 @@ class PrivacyDecision_v2:
             "safe_harbor": False,
             "expert_determination": False
         }
-    })
+    }
+
 
-    # Privacy metrics
-    privacy_controls: Dict = field(default_factory=lambda: {
+def _new_privacy_controls() -> Dict:
+    return {
         "applied_techniques": [],
         "residual_risk": "low/medium/high"
-    })
+    }
 
-    # Audit trail
-    audit_records: Dict = field(default_factory=lambda: {
+
+def _new_audit_records() -> Dict:
+    return {
         "processing_steps": [],
         "risk_mitigations": [],
         "validation_checksum": None
-    })
+    }
+
+
+# Read-only defaults shared by every decision instead of fresh dicts per
+# instance; to_dict hands out fresh mutable copies from the factories
+_DEFAULT_COMPLIANCE_STATUS = _freeze(_new_compliance_status())
+_DEFAULT_PRIVACY_CONTROLS = _freeze(_new_privacy_controls())
+_DEFAULT_AUDIT_RECORDS = _freeze(_new_audit_records())
+_DEFAULT_DATA_SOURCES: Tuple[str, ...] = ()
+
+_DECISION_FIELDS = (
+    "content",
+    "error",
+    "requires_additional_processing",
+    "confidence_score",
+    "data_sources",
+    "input_digest",
+    "processing_signature",
+    "compliance_status",
+    "privacy_controls",
+    "audit_records",
+    "decision_type",
+)
+
+
+_DECISION_DEFAULTS = {
+    "data_sources": _DEFAULT_DATA_SOURCES,
+    "compliance_status": _DEFAULT_COMPLIANCE_STATUS,
+    "privacy_controls": _DEFAULT_PRIVACY_CONTROLS,
+    "audit_records": _DEFAULT_AUDIT_RECORDS,
+}
+
+
+def _restore_decision(cls, fields: Dict[str, Any]) -> "PrivacyDecision_v2":
+    return cls(**fields)
+
+
+class PrivacyDecision_v2:
+    """Enhanced decision class with cryptographic validation and compliance tracking
+
+    Instances are slotted and immutable: fields cannot be reassigned (use
+    ``replace``) and ``content`` is treated as read-only once constructed,
+    which lets the canonical content digest and JSON form be cached.
+    Unset nested fields share read-only defaults.
+    """
+
+    __slots__ = _DECISION_FIELDS + ("_content_digest", "_json")
+
+    def __init__(
+            self,
+            content: Optional[Dict] = None,
+            error: Optional[str] = None,
+            requires_additional_processing: bool = False,
+            confidence_score: float = 0.0,
+            data_sources: Sequence[str] = _DEFAULT_DATA_SOURCES,
+            input_digest: Optional[str] = None,
+            processing_signature: Optional[str] = None,
+            compliance_status: Mapping = _DEFAULT_COMPLIANCE_STATUS,
+            privacy_controls: Mapping = _DEFAULT_PRIVACY_CONTROLS,
+            audit_records: Mapping = _DEFAULT_AUDIT_RECORDS,
+            decision_type: Optional[str] = None
+    ):
+        # Core response data
+        _set = object.__setattr__
+        _set(self, "content", content)
+        _set(self, "error", error)
+        # Processing metadata
+        _set(self, "requires_additional_processing", requires_additional_processing)
+        _set(self, "confidence_score", confidence_score)
+        _set(self, "decision_type", decision_type)
+        # Data provenance
+        _set(self, "data_sources", data_sources)
+        _set(self, "input_digest", input_digest)
+        _set(self, "processing_signature", processing_signature)
+        # Compliance tracking, privacy metrics and audit trail
+        _set(self, "compliance_status", compliance_status)
+        _set(self, "privacy_controls", privacy_controls)
+        _set(self, "audit_records", audit_records)
+        _set(self, "_content_digest", None)
+        _set(self, "_json", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable; use replace()")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        # Shared defaults are frozen, so compare in plain dict/list form
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in _DECISION_FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        # Shared defaults are mappingproxies, which cannot be pickled: omit them
+        changed = {
+            name: getattr(self, name)
+            for name in _DECISION_FIELDS
+            if getattr(self, name) is not _DECISION_DEFAULTS.get(name)
+        }
+        return _restore_decision, (self.__class__, changed)
+
+    def replace(self, **changes: Any) -> "PrivacyDecision_v2":
+        """Copy with some fields changed"""
+        values = {name: getattr(self, name) for name in _DECISION_FIELDS}
+        values.update(changes)
+        return self.__class__(**values)
+
+    @property
+    def content_digest(self) -> str:
+        """SHA-256 of the canonical JSON of ``content``, computed once"""
+        digest = self._content_digest
+        if digest is None:
+            digest = hashlib.sha256(canonical_json(self.content).encode()).hexdigest()
+            object.__setattr__(self, "_content_digest", digest)
+        return digest
 
     def is_compliant(self) -> bool:
         """Check if decision meets all compliance requirements"""
@@ -63,13 +215,17 @@ class PrivacyDecision_v2:
         )
 
     def validate_integrity(self) -> bool:
-        """Verify cryptographic data integrity"""
+        """Verify cryptographic data integrity
+
+        Digests over the legacy non-canonical ``json.dumps`` form are still
+        accepted, at the cost of one extra serialisation on mismatch.
+        """
         if not self.input_digest or not self.content:
             return False
-        generated_hash = hashlib.sha256(
-            json.dumps(self.content).encode()
-        ).hexdigest()
-        return generated_hash == self.input_digest.split(":")[-1]
+        expected = self.input_digest.split(":")[-1]
+        if self.content_digest == expected:
+            return True
+        return hashlib.sha256(json.dumps(self.content).encode()).hexdigest() == expected
 
     def to_dict(self) -> Dict:
         """Convert to dictionary with all metadata"""
@@ -78,143 +234,626 @@ class PrivacyDecision_v2:
             "error": self.error,
             "processing_metadata": {
                 "requires_additional_processing": self.requires_additional_processing,
-                "confidence_score": self.confidence_score
+                "confidence_score": self.confidence_score,
+                "decision_type": self.decision_type
             },
             "provenance": {
-                "data_sources": self.data_sources,
+                "data_sources": (
+                    [] if self.data_sources is _DEFAULT_DATA_SOURCES else self.data_sources
+                ),
                 "input_digest": self.input_digest,
                 "processing_signature": self.processing_signature
             },
-            "compliance_status": self.compliance_status,
-            "privacy_controls": self.privacy_controls,
-            "audit_records": self.audit_records
+            "compliance_status": (
+                _new_compliance_status() if self.compliance_status is _DEFAULT_COMPLIANCE_STATUS
+                else self.compliance_status
+            ),
+            "privacy_controls": (
+                _new_privacy_controls() if self.privacy_controls is _DEFAULT_PRIVACY_CONTROLS
+                else self.privacy_controls
+            ),
+            "audit_records": (
+                _new_audit_records() if self.audit_records is _DEFAULT_AUDIT_RECORDS
+                else self.audit_records
+            )
+        }
+
+    def to_json(self) -> str:
+        """to_dict() as compact JSON, cached; uses orjson when installed"""
+        encoded = self._json
+        if encoded is None:
+            # Shared defaults are serialised directly rather than thawed first
+            data = {
+                "content": self.content,
+                "error": self.error,
+                "processing_metadata": {
+                    "requires_additional_processing": self.requires_additional_processing,
+                    "confidence_score": self.confidence_score,
+                    "decision_type": self.decision_type
+                },
+                "provenance": {
+                    "data_sources": self.data_sources,
+                    "input_digest": self.input_digest,
+                    "processing_signature": self.processing_signature
+                },
+                "compliance_status": self.compliance_status,
+                "privacy_controls": self.privacy_controls,
+                "audit_records": self.audit_records
+            }
+            if orjson is not None:
+                encoded = orjson.dumps(data, default=_json_default).decode()
+            else:
+                encoded = json.dumps(data, separators=(",", ":"), default=_json_default)
+            object.__setattr__(self, "_json", encoded)
+        return encoded
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PrivacyDecision_v2":
+        """Inverse of to_dict"""
+        metadata = data.get("processing_metadata", {})
+        provenance = data.get("provenance", {})
+        return cls(
+            content=data.get("content"),
+            error=data.get("error"),
+            requires_additional_processing=metadata.get("requires_additional_processing", False),
+            confidence_score=metadata.get("confidence_score", 0.0),
+            decision_type=metadata.get("decision_type"),
+            data_sources=provenance.get("data_sources", _DEFAULT_DATA_SOURCES),
+            input_digest=provenance.get("input_digest"),
+            processing_signature=provenance.get("processing_signature"),
+            **{
+                key: data[key]
+                for key in ("compliance_status", "privacy_controls", "audit_records")
+                if key in data
+            }
+        )
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one (task, context) item of a batch run"""
+
+    index: int
+    task: str
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _BoundedLLM:
+    """Proxy that caps concurrent generate/stream calls on a shared LLM
+
+    Sessions opened through the proxy share its limit, and async calls wait
+    for a slot in an executor thread so the event loop never blocks.
+    """
+
+    def __init__(self, llm, semaphore: threading.Semaphore):
+        self._llm = llm
+        self._semaphore = semaphore
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+
+    @property
+    def session(self) -> Callable[..., "_BoundedLLM"]:
+        # Raises AttributeError, like the LLM itself, when it has no sessions
+        open_session = self._llm.session
+
+        def bounded_session(*args: Any, **kwargs: Any) -> "_BoundedLLM":
+            return _BoundedLLM(open_session(*args, **kwargs), self._semaphore)
+
+        return bounded_session
+
+    def generate(self, prompt: str) -> str:
+        with self._semaphore:
+            return self._llm.generate(prompt)
+
+    def stream(self, prompt: str) -> Generator[str, None, None]:
+        with self._semaphore:
+            yield from self._llm.stream(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        await asyncio.get_running_loop().run_in_executor(None, self._semaphore.acquire)
+        try:
+            return await self._llm.agenerate(prompt)
+        finally:
+            self._semaphore.release()
+
+    async def astream(self, prompt: str) -> AsyncGenerator[str, None]:
+        await asyncio.get_running_loop().run_in_executor(None, self._semaphore.acquire)
+        try:
+            async for chunk in self._llm.astream(prompt):
+                yield chunk
+        finally:
+            self._semaphore.release()
+
+
+@dataclass
+class SpeculationStats:
+    """Cost of speculative directive calls
+
+    ``wasted_call_ratio`` is the share of all supervisor calls whose result
+    was thrown away, i.e. the extra remote cost paid for the lower latency.
+    """
+
+    speculative_calls: int = 0
+    wasted_calls: int = 0
+    remote_calls: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def wasted_call_ratio(self) -> float:
+        return self.wasted_calls / self.remote_calls if self.remote_calls else 0.0
+
+    def add(self, other: "SpeculationStats") -> None:
+        with self._lock:
+            self.speculative_calls += other.speculative_calls
+            self.wasted_calls += other.wasted_calls
+            self.remote_calls += other.remote_calls
+
+    def to_dict(self) -> Dict:
+        return {
+            "speculative_calls": self.speculative_calls,
+            "wasted_calls": self.wasted_calls,
+            "remote_calls": self.remote_calls,
+            "wasted_call_ratio": self.wasted_call_ratio,
         }
 
 
+def _usage_dict(llm) -> Dict:
+    stats = getattr(llm, "usage_stats", None)
+    if dataclasses.is_dataclass(stats):
+        return dataclasses.asdict(stats)
+    return dict(stats or {})
+
+
+def _encode_history_field(value: Any) -> Any:
+    return value.to_dict() if isinstance(value, PrivacyDecision_v2) else value
+
+
+def _decode_history_field(key: str, value: Any) -> Any:
+    return PrivacyDecision_v2.from_dict(value) if key == "decision" else value
+
+
 class PrivacyProtocol_v2:
-    def __init__(self, local_llm, remote_llm, doc_metadata: str, data_types: List[str], max_rounds: int = 3):
+    def __init__(
+            self,
+            local_llm,
+            remote_llm,
+            doc_metadata: str,
+            data_types: List[str],
+            max_rounds: int = 3,
+            chunk_tokens: Optional[int] = None,
+            max_chunk_workers: int = 4,
+            merge_outputs: Callable[[List[str]], str] = merge_worker_outputs,
+            worker_cache: Optional[ResponseCache] = None,
+            history_retention: str = "full",
+            history_spill_path: Optional[str] = None,
+            audit_log: Optional[AuditLogWriter] = None,
+            early_stop_json: bool = False,
+            speculative: bool = False,
+            worker_sessions: bool = False,
+            warmup: Optional[WarmupManager] = None
+    ):
         self.local_llm = local_llm
         self.remote_llm = remote_llm
         self.doc_metadata = doc_metadata
         self.data_types = data_types
         self.max_rounds = max_rounds
+        self.chunk_tokens = chunk_tokens
+        self.max_chunk_workers = max_chunk_workers
+        self.merge_outputs = merge_outputs
+        self.worker_cache = worker_cache
+        if history_retention not in RETENTION_POLICIES:
+            raise ValueError(f"history_retention must be one of {RETENTION_POLICIES}")
+        self.history_retention = history_retention
+        self.audit_log = audit_log
+        self.early_stop_json = early_stop_json
+        self.speculative = speculative
+        # Reuse the local model's KV cache across rounds (clients with session())
+        self.worker_sessions = worker_sessions
+        # Preload local models now rather than on the first query
+        self.warmup = warmup.start() if warmup is not None else None
+        # Totals over every speculative query run through this instance
+        self.speculation_stats = SpeculationStats()
+        # One append-only file shared by every query (and process_batch copy)
+        self.history_spill = SpillFile(history_spill_path) if history_retention == "spill" else None
         self.parser = SafeJSONParser()
 
+    def close(self) -> None:
+        """Stop the warm-up manager and release the history spill file"""
+        if self.warmup is not None:
+            self.warmup.stop()
+        if self.history_spill is not None:
+            self.history_spill.close()
+
+    def __enter__(self) -> "PrivacyProtocol_v2":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def analyze_response(self, response: str) -> PrivacyDecision_v2:
         """Enhanced analysis with cryptographic validation"""
-        try:
-            parsed = self.parser.safe_parse(response)
-
-            # Validate cryptographic hashes
-            input_hash = parsed.get("provenance_verification", {}).get("input_digest", "")
-            if not self._validate_hash(parsed["data"], input_hash):
+        parsed = self.parser.safe_parse(response)
+        if not isinstance(parsed, dict):
+            return PrivacyDecision_v2(error="Invalid JSON: expected an object")
+        if "original" in parsed and "error" in parsed:
+            return PrivacyDecision_v2(error=parsed["error"])
+
+        # Validate cryptographic hashes when the response carries data and a digest
+        data = parsed.get("data")
+        input_hash = parsed.get("provenance_verification", {}).get("input_digest", "")
+        if data is not None and input_hash:
+            serialized = data if isinstance(data, str) else canonical_json(data)
+            if not self._validate_hash(serialized, input_hash):
                 raise ValueError("Data hash mismatch")
 
-            return PrivacyDecision_v2(
-                content=parsed.get("data", {}).get("content"),
-                confidence_score=parsed.get("compliance_metadata", {}).get("confidence_score", 0.0),
-                data_sources=parsed.get("provenance_verification", {}).get("data_sources", []),
-                compliance_status=parsed.get("compliance_metadata", {})
-            )
-        except json.JSONDecodeError as e:
-            return PrivacyDecision_v2(error=f"Invalid JSON: {str(e)}")
+        resolution = parsed.get("resolution", {})
+        compliance = parsed.get("compliance_metadata", {})
+        return PrivacyDecision_v2(
+            content=data.get("content") if isinstance(data, dict) else data,
+            confidence_score=resolution.get("confidence_score", compliance.get("confidence_score", 0.0)),
+            data_sources=parsed.get("provenance_verification", {}).get("data_sources", []),
+            compliance_status=compliance or _DEFAULT_COMPLIANCE_STATUS,
+            decision_type=resolution.get("type")
+        )
 
-    def process_query(self, task: str, context: List[str], risk_threshold: str = "medium") -> Dict:
-        """Enhanced multi-stage processing with audit trail"""
-        # Generate cryptographic context hash
-        context_str = "\n\n".join(context)
-        context_hash = hashlib.sha256(context_str.encode()).hexdigest()
+    def process_query(self, task: str, context: Context, risk_threshold: str = "medium") -> Dict:
+        """Enhanced multi-stage processing with audit trail
+
+        ``context`` is a list of documents, an ``os.PathLike`` file, or any
+        iterable of documents and files. Files and iterators are chunked
+        lazily and spilled to a temp file, so with ``chunk_tokens`` set peak
+        memory follows the chunk size rather than the corpus size.
+        """
+        with tracing.span("protocol.process_query", risk_threshold=risk_threshold) as root:
+            with self._prepare_context(context) as chunks:
+                result = self._run_rounds(task, chunks, risk_threshold)
+            root.set_attribute("rounds", result["processing_rounds"])
+            return result
+
+    def _prepare_context(self, context: Context) -> contextlib.AbstractContextManager:
+        """Chunks computed once per query and reused every round"""
+        if not self.chunk_tokens:
+            return contextlib.nullcontext([join_context(context)])
+        if not is_streaming(context):
+            return contextlib.nullcontext(self._chunk_context(context))
+        # ~16 bytes per token is generous, so longer spans need splitting anyway
+        paragraphs = iter_paragraphs(context, max_paragraph_bytes=self.chunk_tokens * 16)
+        chunks = iter_chunks(paragraphs, self.chunk_tokens, self.local_llm.count_tokens_batch)
+        spilled = SpilledChunks(chunks, leaf_digest)
+        if not len(spilled):
+            spilled.close()
+            return contextlib.nullcontext([""])
+        return spilled
+
+    def _run_rounds(self, task: str, chunks: Sequence[str], risk_threshold: str) -> Dict:
+        # Merkle root over the chunks serves as the cryptographic context hash
+        if isinstance(chunks, SpilledChunks):
+            context_tree = MerkleTree(chunks.digests)
+        else:
+            context_tree = MerkleTree.from_chunks(chunks)
+        context_hash = context_tree.root
 
-        # Initialize privacy-preserving worker
+        # Privacy-preserving worker instructions, sent with every worker call
+        # rather than set on the (possibly shared) client
         worker_prompt = core.WORKER_SYSTEM_PROMPT.format(
             doc_metadata=self.doc_metadata,
             context_hash=context_hash,
-            data_types=self.data_types
+            data_types=self.data_types,
+            processing_id=hashlib.sha256(f"{context_hash}\0{task}".encode()).hexdigest()[:16]
         )
-        self.local_llm.set_system_prompt(worker_prompt)
 
         # Initialize processing state
         current_round = 0
         final_output = None
-        processing_history = []
+        processing_history = self._new_history()
         requires_processing = True
+        speculation = SpeculationStats()
+        executor = ThreadPoolExecutor(max_workers=1) if self.speculative else None
+        # One conversation per chunk: later rounds only send the new directive
+        sessions: Optional[Dict[int, Any]] = (
+            {} if self.worker_sessions and hasattr(self.local_llm, "session") else None
+        )
+        next_directive: Optional[Future] = None
 
-        while requires_processing and current_round < self.max_rounds:
-            current_round += 1
-
-            # Supervisor Initial Directive
-            supervisor_initial = core.SUPERVISOR_INITIAL_PROMPT.format(
-                task=task,
-                doc_metadata=self.doc_metadata,
-                context_hash=context_hash,
-                risk_threshold=risk_threshold,
-                current_round=current_round
-            )
-            directive = self.remote_llm.generate(supervisor_initial)
-
-            # Worker Processing
-            worker_response = self.local_llm.generate(
-                f"Round {current_round} Directive: {directive}\nContext: {context_str}"
-            )
-
-            # Supervisor Validation
-            supervisor_convo = core.SUPERVISOR_CONVERSATION_PROMPT.format(
-                response=worker_response,
-                context_hash=context_hash,
-                remaining_rounds=self.max_rounds - current_round
-            )
-            validation = self.remote_llm.generate(supervisor_convo)
-
-            # Parse decision
-            decision = self.analyze_response(validation)
-            processing_history.append({
-                "round": current_round,
-                "directive": directive,
-                "worker_response": worker_response,
-                "validation": validation,
-                "decision": decision
-            })
-
-            # Check termination conditions
-            if decision.decision_type == "finalize" or current_round >= self.max_rounds:
-                requires_processing = False
-                final_output = self._finalize_output(
-                    validation,
-                    current_round,
-                    context_hash
+        try:
+            while requires_processing and current_round < self.max_rounds:
+                current_round += 1
+
+                # Supervisor Initial Directive (possibly already requested speculatively)
+                if next_directive is not None:
+                    directive = next_directive.result()
+                    next_directive = None
+                else:
+                    with tracing.span("protocol.directive", round=current_round):
+                        directive = self._supervise(
+                            self._directive_prompt(task, context_hash, risk_threshold, current_round)
+                        )
+                speculation.remote_calls += 1
+
+                # Worker Processing
+                with tracing.span("protocol.worker", round=current_round, chunks=len(chunks)):
+                    worker_response = self._run_worker(
+                        current_round, directive, chunks, context_tree.leaves,
+                        system_prompt=worker_prompt, sessions=sessions
+                    )
+
+                # The next directive does not depend on this round's validation,
+                # so it can be requested while the validation is in flight
+                if executor is not None and current_round < self.max_rounds:
+                    next_directive = executor.submit(
+                        tracing.run_in_context(self._speculative_directive),
+                        self._directive_prompt(task, context_hash, risk_threshold, current_round + 1),
+                        current_round + 1
+                    )
+                    speculation.speculative_calls += 1
+
+                # Supervisor Validation
+                supervisor_convo = core.SUPERVISOR_CONVERSATION_PROMPT.format(
+                    response=worker_response,
+                    context_hash=context_hash,
+                    remaining_rounds=self.max_rounds - current_round
                 )
-                break
-
-        return {
+                with tracing.span("protocol.validation", round=current_round):
+                    validation = self._supervise(supervisor_convo)
+                speculation.remote_calls += 1
+
+                # Parse decision
+                with tracing.span("protocol.analyze", round=current_round):
+                    decision = self.analyze_response(validation)
+                processing_history.append({
+                    "round": current_round,
+                    "directive": directive,
+                    "worker_response": worker_response,
+                    "validation": validation,
+                    "decision": decision
+                })
+
+                # Check termination conditions
+                if decision.decision_type == "finalize" or current_round >= self.max_rounds:
+                    requires_processing = False
+                    if next_directive is not None:
+                        # A call that never started costs nothing; one that did is wasted
+                        if next_directive.cancel():
+                            speculation.speculative_calls -= 1
+                        else:
+                            speculation.wasted_calls += 1
+                            speculation.remote_calls += 1
+                        next_directive = None
+                    with tracing.span("protocol.finalize", round=current_round):
+                        final_output = self._finalize_output(
+                            validation,
+                            current_round,
+                            context_hash
+                        )
+                    speculation.remote_calls += 1
+                    break
+        finally:
+            if executor is not None:
+                # A wasted speculative call may still be running; don't wait for it
+                executor.shutdown(wait=False)
+
+        result = {
             "final_output": final_output,
             "processing_rounds": current_round,
             "processing_history": processing_history,
             "audit_trail": self._create_audit_trail(context_hash, current_round),
             "termination_reason": "max_rounds" if current_round >= self.max_rounds else "final_decision"
         }
+        if self.speculative:
+            self.speculation_stats.add(speculation)
+            result["speculation"] = speculation.to_dict()
+        if sessions is not None:
+            result["prefill"] = self._prefill_summary(sessions.values())
+        if self.audit_log is not None:
+            self.audit_log.write(self._audit_record(result))
+        return result
+
+    def _directive_prompt(self, task: str, context_hash: str, risk_threshold: str, current_round: int) -> str:
+        return core.SUPERVISOR_INITIAL_PROMPT.format(
+            task=task,
+            doc_metadata=self.doc_metadata,
+            context_hash=context_hash,
+            risk_threshold=risk_threshold,
+            current_round=current_round
+        )
+
+    def process_batch(
+            self,
+            items: Iterable[Tuple[str, List[str]]],
+            risk_threshold: str = "medium",
+            max_workers: int = 8,
+            local_concurrency: Optional[int] = None,
+            remote_concurrency: Optional[int] = None
+    ) -> Generator[BatchResult, None, None]:
+        """Run process_query over many (task, context) pairs concurrently
+
+        Results are yielded in completion order. At most ``max_workers``
+        items are in flight, and the local/remote LLMs each see at most
+        ``local_concurrency``/``remote_concurrency`` simultaneous calls
+        (defaulting to ``max_workers``). A failing item produces a
+        BatchResult with ``error`` set instead of aborting the batch.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        runner = copy.copy(self)
+        runner.local_llm = _BoundedLLM(
+            self.local_llm, threading.BoundedSemaphore(local_concurrency or max_workers)
+        )
+        runner.remote_llm = _BoundedLLM(
+            self.remote_llm, threading.BoundedSemaphore(remote_concurrency or max_workers)
+        )
+
+        def run(index: int, task: str, context: List[str]) -> BatchResult:
+            try:
+                return BatchResult(
+                    index=index,
+                    task=task,
+                    result=runner.process_query(task, context, risk_threshold)
+                )
+            except Exception as e:
+                return BatchResult(index=index, task=task, error=f"{type(e).__name__}: {e}")
+
+        # Submit lazily so only a bounded window of items is held in memory
+        pending = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, (task, context) in enumerate(items):
+                if len(pending) >= max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(run, index, task, context))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def _supervise(self, prompt: str) -> str:
+        """Supervisor call; with early_stop_json, cut off once its JSON object closes"""
+        if not self.early_stop_json:
+            return self.remote_llm.generate(prompt)
+        _, text = self.parser.parse_stream(self.remote_llm.stream(prompt))
+        return text
+
+    def _speculative_directive(self, prompt: str, current_round: int) -> str:
+        with tracing.span("protocol.directive", round=current_round, speculative=True):
+            return self._supervise(prompt)
+
+    def _new_history(self) -> ProcessingHistory:
+        return ProcessingHistory(
+            self.history_retention,
+            spill_file=self.history_spill,
+            encode=_encode_history_field,
+            decode=_decode_history_field
+        )
+
+    def _chunk_context(self, context: List[str]) -> List[str]:
+        """Split context into chunks that fit the local model's budget"""
+        return split_into_chunks(context, self.chunk_tokens, self.local_llm.count_tokens_batch) or [""]
+
+    def _run_worker(
+            self,
+            current_round: int,
+            directive: str,
+            chunks: Sequence[str],
+            digests: Optional[List[str]] = None,
+            system_prompt: str = "",
+            sessions: Optional[Dict[int, Any]] = None
+    ) -> str:
+        """Map the directive over context chunks in parallel, then reduce
+
+        With a ``worker_cache``, outputs are content-addressed by (chunk
+        digest, digest of the rest of the prompt and the model settings), so
+        only chunks whose text changed since an earlier run of the same
+        prompt reach the local LLM. With
+        ``sessions``, a chunk whose session already holds its context is sent
+        only the new directive; the cache is bypassed then, since session
+        replies depend on the conversation so far.
+        """
+        total = len(chunks)
+        preamble = f"{system_prompt}\n\n" if system_prompt else ""
+
+        def prompt_head(index: int) -> str:
+            """The worker prompt up to the chunk text"""
+            if total == 1:
+                return f"{preamble}Round {current_round} Directive: {directive}\nContext: "
+            return f"{preamble}Round {current_round} Directive: {directive}\nContext (part {index + 1}/{total}): "
+
+        def generate(index: int) -> str:
+            session = None
+            if sessions is not None:
+                session = sessions.get(index) or sessions.setdefault(index, self.local_llm.session())
+                if session.started:
+                    return session.generate(f"Round {current_round} Directive: {directive}")
+            # Chunks are read here so only in-flight ones are held in memory
+            prompt = prompt_head(index) + chunks[index]
+            return session.generate(prompt) if session is not None else self.local_llm.generate(prompt)
+
+        outputs: List[Optional[str]] = [None] * total
+        keys: List[Optional[str]] = [None] * total
+        cache = self.worker_cache if sessions is None else None
+        if cache is not None:
+            digests = digests or [leaf_digest(chunk) for chunk in chunks]
+            for index, chunk_digest in enumerate(digests):
+                keys[index] = f"{chunk_digest}:{self._prompt_digest(prompt_head(index))}"
+                outputs[index] = cache.get(keys[index])
+
+        missing = [index for index, output in enumerate(outputs) if output is None]
+        if len(missing) == 1:
+            outputs[missing[0]] = generate(missing[0])
+        elif missing:
+            workers = min(self.max_chunk_workers, len(missing))
+            for index, output in zip(missing, map_bounded(generate, missing, workers)):
+                outputs[index] = output
+
+        if cache is not None:
+            for index in missing:
+                cache.set(keys[index], outputs[index])
+        return outputs[0] if total == 1 else self.merge_outputs(outputs)
+
+    @staticmethod
+    def _prefill_summary(sessions: Iterable[Any]) -> Dict:
+        """Prefill tokens and KV-cache reuse over a query's worker sessions"""
+        totals = {"prefill_tokens": 0, "reused_tokens": 0, "calls": 0, "cache_misses": 0}
+        for session in sessions:
+            stats = session.stats.to_dict()
+            for key in totals:
+                totals[key] += stats[key]
+        prompt_tokens = totals["prefill_tokens"] + totals["reused_tokens"]
+        totals["saved_ratio"] = totals["reused_tokens"] / prompt_tokens if prompt_tokens else 0.0
+        return totals
+
+    def _prompt_digest(self, prompt_head: str) -> str:
+        """Digest of everything that shapes a worker output except the chunk itself
+
+        Covers the model, its sampling parameters and the whole prompt before
+        the chunk: system prompt (document metadata, data types, context
+        hash), round, directive and chunk position.
+        """
+        model = getattr(self.local_llm, "model", "")
+        sampling_params = getattr(self.local_llm, "sampling_params", dict)()
+        settings = json.dumps(sampling_params, sort_keys=True, default=str)
+        return hashlib.sha256(f"{model}\0{settings}\0{prompt_head}".encode()).hexdigest()
 
     def _finalize_output(self, validation: str, rounds: int, context_hash: str) -> Dict:
         """Handle final output generation"""
         supervisor_final = core.SUPERVISOR_FINAL_PROMPT.format(
             response=validation,
-            query_count=rounds,
+            context_hash=context_hash,
+            step_count=rounds,
             mitigation_count=len(self.data_types),
             response_hash=hashlib.sha256(validation.encode()).hexdigest()
         )
-        return json.loads(self.remote_llm.generate(supervisor_final))
+        return self.parser.safe_parse(self.remote_llm.generate(supervisor_final))
 
     def _create_audit_trail(self, context_hash: str, rounds: int) -> Dict:
         """Generate comprehensive audit trail"""
         return {
             "context_hash": context_hash,
             "total_rounds": rounds,
-            "privacy_operations": self.local_llm.privacy_metrics,
-            "compliance_checks": self.remote_llm.compliance_metrics,
+            "privacy_operations": getattr(self.local_llm, "privacy_metrics", {}),
+            "compliance_checks": getattr(self.remote_llm, "compliance_metrics", {}),
             "final_validation": hashlib.sha256(
-                json.dumps(self.local_llm.usage_stats).encode()
+                json.dumps(_usage_dict(self.local_llm), sort_keys=True).encode()
             ).hexdigest()
         }
 
+    def _audit_record(self, result: Dict) -> Dict:
+        """Audit log entry for one query"""
+        return {
+            **result["audit_trail"],
+            "termination_reason": result["termination_reason"],
+            "local_model": getattr(self.local_llm, "model", None),
+            "remote_model": getattr(self.remote_llm, "model", None),
+        }
+
     def _validate_hash(self, data: str, stored_hash: str) -> bool:
         """Verify cryptographic data integrity"""
         generated_hash = hashlib.sha256(data.encode()).hexdigest()
@@ -224,16 +863,19 @@ class PrivacyProtocol_v2:
         """Enhanced usage statistics with privacy metrics"""
         return {
             "local": {
-                **self.local_llm.usage_stats,
-                "privacy_ops": self.local_llm.privacy_metrics
+                **_usage_dict(self.local_llm),
+                "privacy_ops": getattr(self.local_llm, "privacy_metrics", {})
             },
             "remote": {
-                **self.remote_llm.usage_stats,
-                "compliance_checks": self.remote_llm.compliance_metrics
+                **_usage_dict(self.remote_llm),
+                "compliance_checks": getattr(self.remote_llm, "compliance_metrics", {})
             }
         }
 
 
+DEFAULT_SENSITIVE_TERMS = {"ssn": 1.0, "credit card": 1.0, "medical": 1.0, "password": 1.0}
+
+
 class PrivacyProtocol_v1:
     """Core privacy protocol implementation"""
 
@@ -241,17 +883,26 @@ class PrivacyProtocol_v1:
             self,
             local_llm: OllamaClient,
             remote_llm: OpenAIClient,
-            sensitivity_threshold: float = 0.7
+            sensitivity_threshold: float = 0.7,
+            sensitive_terms: Optional[SensitiveTermDictionary] = None
     ):
         self.local_llm = local_llm
         self.remote_llm = remote_llm
         self.sensitivity_threshold = sensitivity_threshold
+        # Substring matching, so plurals and compounds ("passwords",
+        # "MedicalHistory") still route locally
+        self.sensitive_terms = sensitive_terms or SensitiveTermDictionary(
+            DEFAULT_SENSITIVE_TERMS, whole_words=False
+        )
+
+    def sensitivity_score(self, text: str) -> float:
+        """Score input sensitivity in [0, 1] from weighted dictionary terms"""
+        return self.sensitive_terms.score(text)
 
     def detect_sensitive_data(self, text: str) -> bool:
-        """Determine if input contains sensitive data (placeholder implementation)"""
-        # In practice, implement with regex/NLP model/classification
-        sensitive_keywords = ["ssn", "credit card", "medical", "password"]
-        return any(keyword in text.lower() for keyword in sensitive_keywords)
+        """Determine if input's sensitivity score reaches the threshold"""
+        score = self.sensitive_terms.score(text, stop_at=self.sensitivity_threshold)
+        return score >= self.sensitivity_threshold
 
     def process_query(self, prompt: str) -> str:
         """Route queries based on sensitivity detection"""
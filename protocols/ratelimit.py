@@ -0,0 +1,149 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import openai
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket using reservations
+
+    ``reserve`` always succeeds immediately and returns how long the caller
+    must wait before its reservation is covered, so waiters are served in
+    arrival order and the bucket never goes over its refill rate.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("capacity and refill rate must be positive")
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens, returning the seconds until they are available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.refill_per_second)
+
+    def credit(self, amount: float) -> None:
+        """Return tokens (or take more, if negative) after the fact"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """Client-side requests-per-minute and tokens-per-minute limiter
+
+    Share one instance between every client that draws on the same quota.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and ``tokens`` tokens, returning the wait in seconds"""
+        delay = 0.0
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        with self._lock:
+            return max(delay, self._paused_until - time.monotonic())
+
+    def acquire(self, tokens: int) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage is known"""
+        if not self.tokens:
+            return
+        # reserve() never takes more than the bucket holds
+        charged = min(estimated, self.tokens.capacity)
+        if actual != charged:
+            self.tokens.credit(charged - actual)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back, e.g. after the server returned a 429"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After(-Ms) headers"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # Malformed header: fall back to the policy's own backoff
+        return None
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+@dataclass
+class RetryPolicy:
+    """Jittered exponential backoff for transient API failures"""
+
+    max_retries: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 60.0
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+        status = getattr(error, "status_code", None)
+        return status in RETRYABLE_STATUS_CODES
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Wait before retry number ``attempt`` (0-based); Retry-After wins"""
+        requested = retry_after(error) if error is not None else None
+        if requested is not None:
+            return min(requested, self.max_delay)
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def is_rate_limit(error: Any) -> bool:
+    return getattr(error, "status_code", None) == 429
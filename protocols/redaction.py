@@ -0,0 +1,359 @@
+import re
+
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional,
+    Pattern, Sequence, Tuple
+)
+
+
+_SEPARATORS = b" -"
+_DIGIT_VALUE = bytes.maketrans(b"0123456789", bytes(range(10)))
+_DOUBLED_VALUE = bytes.maketrans(b"0123456789", bytes([0, 2, 4, 6, 8, 1, 3, 5, 7, 9]))
+
+
+def luhn_valid(candidate: str) -> bool:
+    """Check a card number (spaces/dashes allowed) against the Luhn checksum"""
+    digits = candidate.encode("ascii", "ignore").translate(None, _SEPARATORS)
+    if not 13 <= len(digits) <= 19 or not digits.isdigit():
+        return False
+    digits = digits[::-1]
+    checksum = (
+        sum(digits[::2].translate(_DIGIT_VALUE))
+        + sum(digits[1::2].translate(_DOUBLED_VALUE))
+    )
+    return checksum % 10 == 0
+
+
+def iban_valid(candidate: str) -> bool:
+    """Check an IBAN (spaces allowed) against the ISO 13616 mod-97 rule"""
+    compact = candidate.replace(" ", "").upper()
+    if not 15 <= len(compact) <= 34:
+        return False
+    rearranged = compact[4:] + compact[:4]
+    return int("".join(str(int(ch, 36)) for ch in rearranged)) % 97 == 1
+
+
+@dataclass(frozen=True)
+class Detector:
+    """A named PII pattern with an optional post-match validator
+
+    ``word_start`` detectors only match at a word boundary, which lets the
+    engine test that boundary once for all of them. ``required`` is a literal
+    every match contains; inputs without it skip the detector entirely.
+    ``trigger`` is a regex every match contains. When all detectors have
+    one, inputs in which no trigger occurs are returned without a scan.
+
+    ``max_length`` and ``alphabet`` (a regex character-class body covering
+    every character a match can contain) bound how much trailing text a
+    StreamRedactor must hold back. Detectors without them force the stream
+    to buffer everything until it is closed.
+    """
+
+    name: str
+    pattern: str
+    validator: Optional[Callable[[str], bool]] = None
+    replacement: str = "[REDACTED]"
+    word_start: bool = False
+    required: Optional[str] = None
+    max_length: Optional[int] = None
+    alphabet: Optional[str] = None
+    trigger: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RedactionSpan:
+    detector: str
+    start: int
+    end: int
+
+
+@dataclass
+class RedactionResult:
+    text: str
+    spans: List[RedactionSpan] = field(default_factory=list)
+
+    @property
+    def redacted(self) -> bool:
+        return bool(self.spans)
+
+
+# Order matters: at a given position the first detector that matches wins.
+SSN = Detector(
+    "ssn",
+    r"\d{3}-\d{2}-\d{4}\b",
+    word_start=True,
+    required="-",
+    max_length=11,
+    alphabet=r"\d-",
+    trigger=r"\d{4}",
+)
+PAN = Detector(
+    "pan",
+    r"(?:\d{13,19}"
+    r"|\d{4}(?:(?: \d{4}){3}(?: \d{3})?| \d{6} \d{5})"
+    r"|\d{4}(?:(?:-\d{4}){3}(?:-\d{3})?|-\d{6}-\d{5}))\b",
+    validator=luhn_valid,
+    word_start=True,
+    max_length=23,
+    alphabet=r"\d -",
+    trigger=r"\d{4}",
+)
+IBAN = Detector(
+    "iban",
+    r"[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,3})?\b",
+    validator=iban_valid,
+    word_start=True,
+    max_length=42,
+    alphabet=r"A-Z0-9 ",
+    trigger=r"[A-Z]{2}\d\d",
+)
+EMAIL = Detector(
+    "email",
+    r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b",
+    word_start=True,
+    required="@",
+    max_length=254,
+    alphabet=r"A-Za-z0-9._%+@-",
+    trigger="@",
+)
+MRN = Detector(
+    "mrn",
+    r"MRN[ \t:#-]{0,4}\d{6,10}\b",
+    word_start=True,
+    required="MRN",
+    max_length=17,
+    alphabet=r"MRN \t:#\d-",
+    trigger=r"\d{4}",
+)
+PHONE = Detector(
+    "phone",
+    r"(?<![\w+])(?:\+\d{1,3}[ .-]?)?(?:\(\d{3}\)[ .-]?|\d{3}[ .-])\d{3}[ .-]\d{4}\b",
+    max_length=19,
+    alphabet=r"\d+() .-",
+    trigger=r"\d{4}",
+)
+
+DEFAULT_DETECTORS = (SSN, PAN, IBAN, EMAIL, MRN, PHONE)
+
+
+class RedactionEngine:
+    """Compiled single-pass redactor over a fixed set of detectors
+
+    All detector patterns are combined into one alternation of named groups,
+    so redaction is a single ``finditer`` scan over the input regardless of
+    how many detectors are active. Detectors whose ``required`` literal is
+    absent from the input are left out of the scan; the regex for each such
+    subset is compiled once and reused. Inputs containing no detector
+    ``trigger`` are not scanned at all.
+    """
+
+    def __init__(self, detectors: Iterable[Detector] = DEFAULT_DETECTORS):
+        self.detectors: Sequence[Detector] = tuple(detectors)
+        if not self.detectors:
+            raise ValueError("RedactionEngine requires at least one detector")
+        self._by_group = {
+            f"d{index}": detector for index, detector in enumerate(self.detectors)
+        }
+        self._compiled: Dict[Tuple[str, ...], Pattern] = {}
+        self._required = [
+            (group, detector.required) for group, detector in self._by_group.items()
+            if detector.required is not None
+        ]
+        self._all = self._compile(tuple(self._by_group))
+        triggers = [detector.trigger for detector in self.detectors]
+        self._trigger: Optional[Pattern] = (
+            re.compile("|".join(dict.fromkeys(triggers))) if None not in triggers else None
+        )
+
+    def _compile(self, groups: Tuple[str, ...]) -> Pattern:
+        regex = self._compiled.get(groups)
+        if regex is None:
+            bounded = []
+            free = []
+            for group in groups:
+                detector = self._by_group[group]
+                branch = f"(?P<{group}>{detector.pattern})"
+                (bounded if detector.word_start else free).append(branch)
+            # Branch order is preserved within each half; boundary-anchored
+            # detectors share a single \b test ahead of their alternation.
+            branches = ([r"\b(?:" + "|".join(bounded) + ")"] if bounded else []) + free
+            regex = self._compiled[groups] = re.compile("|".join(branches))
+        return regex
+
+    def _regex_for(self, text: str) -> Optional[Pattern]:
+        absent = [group for group, required in self._required if required not in text]
+        if not absent:
+            return self._all
+        groups = tuple(group for group in self._by_group if group not in absent)
+        return self._compile(groups) if groups else None
+
+    def scan(self, text: str, pos: int = 0) -> Iterator[Tuple[Detector, int, int, bool]]:
+        """Yield (detector, start, end, valid) for every match from ``pos`` on
+
+        Matches rejected by their validator are reported with ``valid`` set
+        to False. Characters before ``pos`` are still visible to boundary and
+        lookbehind checks, which is what lets streams scan incrementally.
+        """
+        if self._trigger is not None and not self._trigger.search(text, pos):
+            return
+        regex = self._regex_for(text)
+        if regex is None:
+            return
+        for match in regex.finditer(text, pos):
+            detector = self._by_group[match.lastgroup]
+            valid = detector.validator is None or detector.validator(match.group())
+            yield detector, match.start(), match.end(), valid
+
+    def matches(self, text: str, pos: int = 0) -> Iterator[Tuple[Detector, int, int]]:
+        """Yield validated (detector, start, end) matches from ``pos`` onwards"""
+        for detector, start, end, valid in self.scan(text, pos):
+            if valid:
+                yield detector, start, end
+
+    def redact(self, text: str) -> RedactionResult:
+        """Replace every validated detector match and report its span"""
+        if self._trigger is not None and not self._trigger.search(text):
+            return RedactionResult(text)
+        regex = self._regex_for(text)
+        if regex is None:
+            return RedactionResult(text)
+        by_group = self._by_group
+        pieces = []
+        spans = []
+        last = 0
+        # scan() inlined: this is the per-response hot path
+        for match in regex.finditer(text):
+            detector = by_group[match.lastgroup]
+            if detector.validator is not None and not detector.validator(match.group()):
+                continue
+            start, end = match.span()
+            pieces.append(text[last:start])
+            pieces.append(detector.replacement)
+            spans.append(RedactionSpan(detector.name, start, end))
+            last = end
+        if not spans:
+            return RedactionResult(text)
+        pieces.append(text[last:])
+        return RedactionResult("".join(pieces), spans)
+
+    def stream(self) -> "StreamRedactor":
+        """Start an incremental redactor for chunked text"""
+        return StreamRedactor(self)
+
+
+class StreamRedactor:
+    """Incremental redactor that never emits a prefix of a possible match
+
+    Text is released as soon as no active detector could still match across
+    it. For each detector that is the start of the trailing run of its
+    ``alphabet``, capped at ``max_length`` characters back, so plain prose is
+    emitted almost immediately while a half-received SSN or card number is
+    held until it either completes (and is redacted) or is ruled out.
+    """
+
+    def __init__(self, engine: RedactionEngine):
+        self.engine = engine
+        self.spans: List[RedactionSpan] = []
+        self._bounded = all(
+            detector.max_length is not None and detector.alphabet is not None
+            for detector in engine.detectors
+        )
+        # Reversed-tail matchers: one per detector, measuring its trailing run
+        self._tails = [
+            (detector.max_length, re.compile(f"[{detector.alphabet}]*"))
+            for detector in engine.detectors
+        ] if self._bounded else []
+        self._buffer = ""
+        self._context = ""
+        self._offset = 0
+
+    def _hold_point(self) -> int:
+        """Index into the buffer before which no match can still grow"""
+        if not self._bounded:
+            return 0
+        size = len(self._buffer)
+        hold = size
+        for max_length, tail in self._tails:
+            # One extra character so a match's trailing \b is decided too
+            window = self._buffer[-(max_length + 1):]
+            run = tail.match(window[::-1]).end()
+            hold = min(hold, size - run)
+        return hold
+
+    def _release(self, hold: int) -> str:
+        text = self._context + self._buffer
+        base = len(self._context)
+        limit = cut = base + hold
+        pieces = []
+        last = base
+        for detector, start, end, valid in self.engine.scan(text, base):
+            if start >= limit:
+                break
+            # A match starting before the hold point is final; let it finish
+            cut = max(cut, end)
+            if not valid:
+                continue
+            pieces.append(text[last:start])
+            pieces.append(detector.replacement)
+            self.spans.append(RedactionSpan(
+                detector.name, self._offset + start - base, self._offset + end - base
+            ))
+            last = end
+        pieces.append(text[last:cut])
+        released = cut - base
+        if released:
+            self._context = text[cut - 1]
+            self._buffer = self._buffer[released:]
+            self._offset += released
+        return "".join(pieces)
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return whatever text is now safe to emit"""
+        self._buffer += chunk
+        return self._release(self._hold_point())
+
+    def close(self) -> str:
+        """Flush the remaining buffer once the stream has ended"""
+        return self._release(len(self._buffer))
+
+
+def redact_stream(
+        chunks: Iterable[str],
+        engine: Optional[RedactionEngine] = None
+) -> Iterator[str]:
+    """Redact a chunked text stream, yielding safe text as early as possible"""
+    redactor = (engine or default_engine()).stream()
+    for chunk in chunks:
+        safe = redactor.feed(chunk)
+        if safe:
+            yield safe
+    tail = redactor.close()
+    if tail:
+        yield tail
+
+
+async def aredact_stream(
+        chunks: AsyncIterable[str],
+        engine: Optional[RedactionEngine] = None
+) -> AsyncIterator[str]:
+    """Async counterpart of redact_stream"""
+    redactor = (engine or default_engine()).stream()
+    async for chunk in chunks:
+        safe = redactor.feed(chunk)
+        if safe:
+            yield safe
+    tail = redactor.close()
+    if tail:
+        yield tail
+
+
+_default_engine: Optional[RedactionEngine] = None
+
+
+def default_engine() -> RedactionEngine:
+    """Shared engine over DEFAULT_DETECTORS, compiled on first use"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RedactionEngine()
+    return _default_engine
@@ -0,0 +1,474 @@
+"""Local stand-in for the OpenAI and Ollama HTTP APIs
+
+Serves ``POST /v1/chat/completions`` (JSON or SSE streaming) and Ollama's
+``POST /api/generate`` (JSON or NDJSON streaming) so the real clients can be
+exercised end to end - pooling, streaming, retries - without network access:
+
+    python -m protocols.standin_server --mode record --upstream https://api.openai.com --cassette run.jsonl
+    python -m protocols.standin_server --mode replay --cassette run.jsonl --port 8089
+
+Modes: ``synthetic`` answers from a responder function, ``record`` proxies to
+``upstream`` and appends every exchange to a cassette, ``replay`` serves
+responses from a cassette. Latency can be shaped in any mode.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from protocols.clients.fake_client import LatencyModel, Responder, supervisor_script
+
+MODES = ("synthetic", "record", "replay")
+ENDPOINTS = ("/v1/chat/completions", "/api/generate")
+
+# Fields that change between otherwise identical requests
+_VOLATILE_FIELDS = ("user", "seed", "keep_alive")
+_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "content-encoding"}
+
+Chunks = List[Tuple[float, str]]
+
+
+def request_key(method: str, path: str, body: Dict[str, Any]) -> str:
+    """Stable key for a request: method, path and canonical JSON body"""
+    body = {key: value for key, value in body.items() if key not in _VOLATILE_FIELDS}
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{method} {path}\0{canonical}".encode()).hexdigest()
+
+
+class Cassette:
+    """Recorded exchanges in a JSONL file, one interaction per line
+
+    Each interaction keeps the response as ``(seconds since request, text)``
+    chunks, so replays can reproduce streaming timing. Identical requests
+    recorded several times are replayed in recorded order, cycling.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self._interactions.setdefault(interaction["key"], []).append(interaction)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return sum(len(recorded) for recorded in self._interactions.values())
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return recorded[index % len(recorded)]
+
+    def record(self, interaction: Dict[str, Any]) -> None:
+        line = json.dumps(interaction, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._interactions.setdefault(interaction["key"], []).append(interaction)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def _tokens(text: str) -> List[str]:
+    words = text.split(" ")
+    return [word + " " for word in words[:-1]] + [words[-1]] if text else []
+
+
+def _prompt_of(path: str, body: Dict[str, Any]) -> str:
+    if path == "/api/generate":
+        return body.get("prompt") or ""
+    messages = body.get("messages") or []
+    return "\n".join(str(message.get("content") or "") for message in messages)
+
+
+def _openai_chunks(body: Dict[str, Any], text: str, prompt_tokens: int) -> Tuple[str, List[str]]:
+    """(content type, response pieces) for a synthetic chat completion"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    model = body.get("model", "standin")
+    tokens = _tokens(text)
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens),
+    }
+    if not body.get("stream"):
+        return "application/json", [json.dumps({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })]
+
+    def event(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    events = [event({"role": "assistant", "content": ""})]
+    events += [event({"content": token}) for token in tokens]
+    events.append(event({}, "stop"))
+    if (body.get("stream_options") or {}).get("include_usage"):
+        events.append("data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [],
+            "usage": usage,
+        }) + "\n\n")
+    events.append("data: [DONE]\n\n")
+    return "text/event-stream", events
+
+
+def _ollama_chunks(body: Dict[str, Any], text: str, prompt_tokens: int) -> Tuple[str, List[str]]:
+    """(content type, response pieces) for a synthetic Ollama generation"""
+    model = body.get("model", "standin")
+    tokens = _tokens(text)
+    final = {
+        "model": model,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "done": True,
+        "done_reason": "stop",
+        "prompt_eval_count": prompt_tokens,
+        "eval_count": len(tokens),
+    }
+    # Ollama streams unless told otherwise
+    if body.get("stream") is False:
+        return "application/json", [json.dumps({**final, "response": text})]
+    lines = [
+        json.dumps({"model": model, "created_at": final["created_at"], "response": token, "done": False}) + "\n"
+        for token in tokens
+    ]
+    lines.append(json.dumps({**final, "response": ""}) + "\n")
+    return "application/x-ndjson", lines
+
+
+class StandInServer:
+    """Threaded local server speaking the OpenAI and Ollama wire formats
+
+    ``latency`` delays the first byte of every response and
+    ``tokens_per_second`` paces streamed chunks; in replay mode,
+    ``replay_timing`` instead reproduces the recorded chunk timing, scaled
+    by ``time_scale``. ``fail_first`` requests, then a seeded ``error_rate``
+    fraction, are answered with ``error_status`` (429 by default, with
+    ``Retry-After: 0``) to exercise client retries.
+    """
+
+    def __init__(
+            self,
+            mode: str = "synthetic",
+            cassette: Optional[str] = None,
+            upstream: Optional[str] = None,
+            responder: Optional[Responder] = None,
+            latency: Optional[LatencyModel] = None,
+            tokens_per_second: Optional[float] = None,
+            replay_timing: bool = False,
+            time_scale: float = 1.0,
+            error_rate: float = 0.0,
+            fail_first: int = 0,
+            error_status: int = 429,
+            seed: int = 0,
+            host: str = "127.0.0.1",
+            port: int = 0
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if mode in ("record", "replay") and cassette is None:
+            raise ValueError(f"{mode} mode needs a cassette path")
+        if mode == "record" and upstream is None:
+            raise ValueError("record mode needs an upstream URL")
+        self.mode = mode
+        self.cassette = Cassette(cassette) if cassette else None
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.responder = responder or supervisor_script()
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.replay_timing = replay_timing
+        self.time_scale = time_scale
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.error_status = error_status
+        self.requests = 0
+        self.errors_injected = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._upstream_client = httpx.Client(timeout=None) if mode == "record" else None
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        if self._upstream_client is not None:
+            self._upstream_client.close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            fail = self.requests <= self.fail_first or (
+                self.error_rate > 0 and self._rng.random() < self.error_rate
+            )
+            if fail:
+                self.errors_injected += 1
+            delay = self.latency.sample(self._rng) if self.latency else 0.0
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def _synthetic(self, path: str, body: Dict[str, Any]) -> Tuple[int, str, Chunks]:
+        prompt = _prompt_of(path, body)
+        text = self.responder(prompt)
+        build = _ollama_chunks if path == "/api/generate" else _openai_chunks
+        content_type, pieces = build(body, text, len(prompt.split()))
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second and len(pieces) > 1 else 0.0
+        return 200, content_type, [(index * interval, piece) for index, piece in enumerate(pieces)]
+
+    def _replay(self, key: str) -> Tuple[int, str, Chunks]:
+        interaction = self.cassette.find(key)
+        if interaction is None:
+            message = json.dumps({"error": {"message": "No recorded response for this request", "type": "standin"}})
+            return 404, "application/json", [(0.0, message)]
+        chunks = [(offset, text) for offset, text in interaction["chunks"]]
+        if not self.replay_timing:
+            interval = 1.0 / self.tokens_per_second if self.tokens_per_second and len(chunks) > 1 else 0.0
+            chunks = [(index * interval, text) for index, (_, text) in enumerate(chunks)]
+        else:
+            chunks = [(offset * self.time_scale, text) for offset, text in chunks]
+        return interaction["status"], interaction["content_type"], chunks
+
+    def _record(self, method: str, path: str, headers: Dict[str, str], raw: bytes) -> Iterator[Any]:
+        """Proxy upstream; yields (status, content type) once, then text chunks"""
+        forward = {key: value for key, value in headers.items() if key.lower() not in _HOP_HEADERS | {"host"}}
+        request = self._upstream_client.build_request(method, self.upstream + path, headers=forward, content=raw)
+        response = self._upstream_client.send(request, stream=True)
+        try:
+            yield response.status_code, response.headers.get("content-type", "application/json")
+            for text in response.iter_text():
+                yield text
+        finally:
+            response.close()
+
+
+def _make_handler(server: StandInServer) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so client connection pools are exercised as in production
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path in ("/v1/models", "/api/tags"):
+                self._send_json(200, {"object": "list", "data": [], "models": []})
+            else:
+                self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+        def do_POST(self) -> None:
+            raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path not in ENDPOINTS:
+                self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+                return
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError as e:
+                self._send_json(400, {"error": {"message": f"Invalid JSON body: {e}"}})
+                return
+            if server._should_fail():
+                self._send_json(
+                    server.error_status,
+                    {"error": {"message": "Injected failure", "type": "standin", "code": "rate_limit_exceeded"}},
+                    {"Retry-After": "0"},
+                )
+                return
+
+            key = request_key("POST", self.path, body)
+            if server.mode == "record":
+                self._proxy(key, raw)
+                return
+            if server.mode == "replay":
+                status, content_type, chunks = server._replay(key)
+            else:
+                status, content_type, chunks = server._synthetic(self.path, body)
+            self._send_chunks(status, content_type, chunks)
+
+        def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _start_chunked(self, status: int, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+        def _write_chunk(self, text: str) -> None:
+            data = text.encode()
+            if data:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+        def _end_chunked(self) -> None:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def _send_chunks(self, status: int, content_type: str, chunks: Chunks) -> None:
+            if len(chunks) == 1 and not content_type.startswith(("text/event-stream", "application/x-ndjson")):
+                data = chunks[0][1].encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            self._start_chunked(status, content_type)
+            start = time.monotonic()
+            try:
+                for offset, text in chunks:
+                    wait = offset - (time.monotonic() - start)
+                    if wait > 0:
+                        time.sleep(wait)
+                    self._write_chunk(text)
+                self._end_chunked()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client closed the stream early, as SafeJSONParser.parse_stream does
+                self.close_connection = True
+
+        def _proxy(self, key: str, raw: bytes) -> None:
+            start = time.monotonic()
+            relay = server._record("POST", self.path, dict(self.headers), raw)
+            try:
+                status, content_type = next(relay)
+            except httpx.HTTPError as e:
+                # Nothing reached upstream, so there is nothing to record
+                self._send_json(502, {"error": {"message": f"Upstream request failed: {e}"}})
+                return
+            chunks: Chunks = []
+            self._start_chunked(status, content_type)
+            try:
+                for text in relay:
+                    chunks.append((round(time.monotonic() - start, 6), text))
+                    self._write_chunk(text)
+                self._end_chunked()
+            except (BrokenPipeError, ConnectionResetError, httpx.HTTPError):
+                # The client left or upstream broke off: a partial answer isn't recorded
+                self.close_connection = True
+                relay.close()
+                return
+            server.cassette.record({
+                "key": key,
+                "method": "POST",
+                "path": self.path,
+                "request": json.loads(raw or b"{}"),
+                "status": status,
+                "content_type": content_type,
+                "chunks": chunks,
+            })
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=MODES, default="synthetic")
+    parser.add_argument("--cassette")
+    parser.add_argument("--upstream", help="real API base URL to proxy in record mode")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="median time to first byte")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="lognormal spread; 0 for constant")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--replay-timing", action="store_true", help="reproduce recorded chunk timing")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    latency = None
+    if args.latency_ms:
+        seconds = args.latency_ms / 1000
+        latency = (
+            LatencyModel.lognormal(seconds, args.latency_sigma) if args.latency_sigma
+            else LatencyModel.constant(seconds)
+        )
+    server = StandInServer(
+        mode=args.mode,
+        cassette=args.cassette,
+        upstream=args.upstream,
+        latency=latency,
+        tokens_per_second=args.tokens_per_second,
+        replay_timing=args.replay_timing,
+        time_scale=args.time_scale,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"{args.mode} server on {server.url} (OpenAI base URL {server.openai_base_url})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
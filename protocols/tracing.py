@@ -0,0 +1,508 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_tracer: Optional["Tracer"] = None
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of non-negative integers
+
+    Values below ``2 ** sub_bucket_bits`` are counted exactly; above that
+    each power-of-two range is split into ``2 ** sub_bucket_bits`` linear
+    buckets, so any recorded value is reported within a relative error of
+    ``2 ** -sub_bucket_bits`` (under 1% at the default 7 bits) while memory
+    stays logarithmic in the value range. Recording is O(1).
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_buckets = 1 << sub_bucket_bits
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits - 1
+        return ((shift + 1) << self.sub_bucket_bits) + ((value >> shift) - self._sub_buckets)
+
+    def _lowest(self, index: int) -> int:
+        """Smallest value that maps to ``index``"""
+        if index < self._sub_buckets:
+            return index
+        shift = (index >> self.sub_bucket_bits) - 1
+        return (self._sub_buckets + (index & (self._sub_buckets - 1))) << shift
+
+    def _highest(self, index: int) -> int:
+        return self._lowest(index + 1) - 1
+
+    def record(self, value: Union[int, float]) -> None:
+        value = max(0, int(value))
+        index = self._index(value)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        with other._lock:
+            counts = dict(other._counts)
+            count, total, low, high = other.count, other.total, other.min, other.max
+        with self._lock:
+            for index, n in counts.items():
+                self._counts[index] = self._counts.get(index, 0) + n
+            self.count += count
+            self.total += total
+            if low is not None:
+                self.min = low if self.min is None else min(self.min, low)
+                self.max = high if self.max is None else max(self.max, high)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> int:
+        """Value at or below which ``percentile`` percent of values fall"""
+        with self._lock:
+            if not self.count:
+                return 0
+            rank = max(1, -(-self.count * percentile // 100))
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= rank:
+                    return min(self._highest(index), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "min": self.min or 0,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max or 0,
+        }
+
+
+class Span:
+    """One timed operation, with OpenTelemetry-style ids and attributes"""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "start_time_ns", "end_time_ns",
+        "attributes", "error", "_start", "_parent", "_token", "_lock", "_tracer",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self._tracer = tracer
+        self._parent = parent
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_time_ns = 0
+        self.end_time_ns = 0
+        self._start = 0
+        self._token = None
+        self._lock = threading.Lock()
+
+    @property
+    def duration_us(self) -> float:
+        return (self.end_time_ns - self.start_time_ns) / 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.attributes["prompt_tokens"] = self.attributes.get("prompt_tokens", 0) + prompt_tokens
+            self.attributes["completion_tokens"] = (
+                self.attributes.get("completion_tokens", 0) + completion_tokens
+            )
+
+    def start(self) -> "Span":
+        self.start_time_ns = time.time_ns()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        # Wall-clock start plus monotonic duration, so clock steps can't skew it
+        self.end_time_ns = self.start_time_ns + (time.perf_counter_ns() - self._start)
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        # Roll token counts up so stage spans show what their calls consumed
+        if self._parent is not None and "prompt_tokens" in self.attributes:
+            self._parent.add_tokens(
+                self.attributes["prompt_tokens"], self.attributes.get("completion_tokens", 0)
+            )
+        self._tracer._finish(self)
+
+    def __enter__(self) -> "Span":
+        self.start()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        _current_span.reset(self._token)
+        self.finish(exc)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP-like field names, so exports map directly onto OTel spans"""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time_unix_nano": self.start_time_ns,
+            "end_time_unix_nano": self.end_time_ns,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is disabled; every operation does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanSink(ABC):
+    """Destination for finished spans"""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        raise NotImplementedError()
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class InMemorySink(SpanSink):
+    """Keeps the most recent ``max_spans`` spans, e.g. for tests or a debug page"""
+
+    def __init__(self, max_spans: Optional[int] = 10000):
+        self.spans: deque = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def find(self, name: str) -> List[Span]:
+        return [span for span in list(self.spans) if span.name == name]
+
+
+class JSONLSink(SpanSink):
+    """Appends one JSON object per span, buffered and flushed in batches"""
+
+    def __init__(self, path: Union[str, os.PathLike], buffer_spans: int = 256):
+        self.path = os.fspath(path)
+        self.buffer_spans = buffer_spans
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), separators=(",", ":"), default=str)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.buffer_spans:
+                self._write()
+
+    def _write(self) -> None:
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self._buffer = []
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class OpenTelemetrySink(SpanSink):
+    """Re-emits spans through an OpenTelemetry tracer
+
+    Needs ``opentelemetry-api`` (plus an SDK/exporter to send them anywhere)
+    unless a tracer is passed in. Span ids are assigned by OpenTelemetry;
+    ours are kept as attributes.
+    """
+
+    def __init__(self, tracer: Any = None, instrumentation_name: str = "protocols"):
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError(
+                    "OpenTelemetrySink requires opentelemetry-api: pip install opentelemetry-api"
+                ) from e
+            tracer = trace.get_tracer(instrumentation_name)
+        self.tracer = tracer
+
+    def export(self, span: Span) -> None:
+        attributes = {key: value for key, value in span.attributes.items() if value is not None}
+        attributes["protocols.span_id"] = span.span_id
+        if span.parent_id:
+            attributes["protocols.parent_span_id"] = span.parent_id
+        if span.error:
+            attributes["error"] = span.error
+        otel_span = self.tracer.start_span(span.name, start_time=span.start_time_ns, attributes=attributes)
+        otel_span.end(end_time=span.end_time_ns)
+
+
+class Tracer:
+    """Collects spans and per-span-name histograms
+
+    Every finished span records ``latency_us`` and, when its calls reported
+    usage, ``prompt_tokens``, ``completion_tokens`` and ``tokens_per_second``
+    into histograms keyed by span name, then goes to each sink.
+    """
+
+    def __init__(self, sinks: Iterable[SpanSink] = (), sub_bucket_bits: int = 7):
+        self.sinks = list(sinks)
+        self.sub_bucket_bits = sub_bucket_bits
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        return Span(self, name, attributes)
+
+    def histogram(self, name: str, metric: str = "latency_us") -> LatencyHistogram:
+        key = (name, metric)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram(self.sub_bucket_bits))
+        return histogram
+
+    def _finish(self, span: Span) -> None:
+        latency = span.duration_us
+        self.histogram(span.name).record(latency)
+        completion = span.attributes.get("completion_tokens")
+        if completion is not None:
+            self.histogram(span.name, "prompt_tokens").record(span.attributes.get("prompt_tokens", 0))
+            self.histogram(span.name, "completion_tokens").record(completion)
+            if latency > 0:
+                self.histogram(span.name, "tokens_per_second").record(completion * 1e6 / latency)
+        for sink in self.sinks:
+            sink.export(span)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{span name: {metric: count/min/mean/p50/p90/p99/max}}"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (name, metric), histogram in items:
+            result.setdefault(name, {})[metric] = histogram.to_dict()
+        return result
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+def enable(sinks: Iterable[SpanSink] = (), tracer: Optional[Tracer] = None) -> Tracer:
+    """Turn tracing on process-wide and return the active tracer"""
+    global _tracer
+    _tracer = tracer or Tracer(sinks)
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Turn tracing off, returning the tracer that was active"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, **attributes: Any) -> Union[Span, _NoopSpan]:
+    """Span context manager, or a shared no-op one while tracing is disabled"""
+    tracer = _tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.span(name, **attributes)
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int) -> None:
+    """Attribute token usage to the innermost active span, if any"""
+    if _tracer is None:
+        return
+    current = _current_span.get()
+    if current is not None:
+        current.add_tokens(prompt_tokens, completion_tokens)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Trace an LLM client's generate/agenerate/stream/astream method
+
+    The span is tagged with the client class and model. Streams are timed
+    from the call until they are exhausted or closed, and the span is made
+    current only while the client code runs, never across a ``yield``.
+    """
+    def decorator(method: Callable) -> Callable:
+        def new_span(self: Any) -> Span:
+            return _tracer.span(name, provider=type(self).__name__, model=getattr(self, "model", None))
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self: Any, prompt: str) -> str:
+                if _tracer is None:
+                    return await method(self, prompt)
+                with new_span(self):
+                    return await method(self, prompt)
+
+            return async_wrapper
+
+        if inspect.isasyncgenfunction(method):
+            @functools.wraps(method)
+            def astream_wrapper(self: Any, prompt: str):
+                if _tracer is None:
+                    return method(self, prompt)
+                return _traced_astream(new_span(self), method(self, prompt))
+
+            return astream_wrapper
+
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def stream_wrapper(self: Any, prompt: str):
+                if _tracer is None:
+                    return method(self, prompt)
+                return _traced_stream(new_span(self), method(self, prompt))
+
+            return stream_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self: Any, prompt: str) -> str:
+            if _tracer is None:
+                return method(self, prompt)
+            with new_span(self):
+                return method(self, prompt)
+
+        return wrapper
+
+    return decorator
+
+
+def _traced_stream(span: Span, iterator):
+    span.start()
+    error: Optional[BaseException] = None
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current_span.reset(token)
+            yield chunk
+    except GeneratorExit:
+        # Closed early: close the inner stream inside the span so its usage counts
+        token = _current_span.set(span)
+        try:
+            iterator.close()
+        finally:
+            _current_span.reset(token)
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        span.finish(error)
+
+
+async def _traced_astream(span: Span, iterator):
+    span.start()
+    error: Optional[BaseException] = None
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                _current_span.reset(token)
+            yield chunk
+    except GeneratorExit:
+        token = _current_span.set(span)
+        try:
+            await iterator.aclose()
+        finally:
+            _current_span.reset(token)
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        span.finish(error)
+
+
+def run_in_context(func: Callable) -> Callable:
+    """Bind ``func`` to a copy of the caller's context for use on another thread
+
+    Thread pools do not propagate context variables, so spans started by
+    pooled work would otherwise lose their parent.
+    """
+    if _tracer is None:
+        return func
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        # A Context can be entered by one thread at a time: copy per call
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
@@ -1,26 +1,223 @@
-import re
 import json
+import re
+
+from typing import AsyncIterable, Iterable, List, Optional, Tuple
+
+from protocols.redaction import RedactionEngine, RedactionResult, default_engine
+
+# sanitize_output's default: SSN- and card-number-shaped runs, unvalidated
+_SANITIZE_PATTERNS = (
+    re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),  # SSN
+    re.compile(r"\b(?:\d[ -]*?){13,16}\b"),  # Credit cards
+)
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_CLOSERS = {"}": "{", "]": "["}
 
 
 class SecurityUtils:
     @staticmethod
-    def sanitize_output(text: str) -> str:
-        """Remove sensitive patterns from output"""
-        patterns = [
-            r"\b\d{3}-\d{2}-\d{4}\b",  # SSN
-            r"\b(?:\d[ -]*?){13,16}\b"  # Credit cards
-        ]
-        for pattern in patterns:
-            text = re.sub(pattern, "[REDACTED]", text)
-        return text
+    def sanitize_output(text: str, engine: Optional[RedactionEngine] = None) -> str:
+        """Remove sensitive patterns from output
+
+        Without ``engine`` this keeps its original two patterns (SSNs and
+        card-number-shaped digit runs), now compiled once: it runs on every
+        supervisor response, and on digit-heavy text a RedactionEngine's six
+        detectors and checksum validation cost about twice as much. Pass
+        ``default_engine()`` to also redact phone numbers, emails, IBANs and
+        MRNs, and to leave Luhn-invalid digit runs alone.
+        """
+        if engine is None:
+            for pattern in _SANITIZE_PATTERNS:
+                text = pattern.sub("[REDACTED]", text)
+            return text
+        return engine.redact(text).text
+
+    @staticmethod
+    def redact(text: str, engine: Optional[RedactionEngine] = None) -> RedactionResult:
+        """Remove sensitive patterns and report what was redacted where"""
+        return (engine or default_engine()).redact(text)
+
+
+class JSONStreamExtractor:
+    """Find the first balanced JSON object in text that arrives in chunks
+
+    Prose and code fences around the object are skipped. Candidates are
+    checked while they arrive: a ``{`` not followed by a key or ``}``, or a
+    mismatched bracket, abandons the candidate immediately, and a balanced
+    candidate that does not parse is abandoned too, with scanning resuming
+    right after its opening brace. ``feed`` returns the object as soon as it
+    closes, so the caller can stop the generation there.
+    """
+
+    def __init__(self, max_object_chars: Optional[int] = None):
+        self.max_object_chars = max_object_chars
+        self.value: Optional[dict] = None
+        self.done = False
+        self.end: Optional[int] = None
+        self._chunks: List[str] = []
+        self._buf = ""
+        self._offset = 0
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._expect_key = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far, cut after the object once it has closed"""
+        text = "".join(self._chunks)
+        return text if self.end is None else text[:self.end]
+
+    @property
+    def object_text(self) -> Optional[str]:
+        return self._buf[self._start:self._pos] if self.done else None
+
+    def feed(self, chunk: str) -> Optional[dict]:
+        if not self.done:
+            self._chunks.append(chunk)
+            self._buf += chunk
+            self._scan()
+        return self.value
+
+    def _restart(self) -> None:
+        self._pos = self._start + 1
+        self._start = None
+        self._stack = []
+        self._in_string = False
+        self._expect_key = False
+
+    def _scan(self) -> None:
+        buf = self._buf
+        while self._pos < len(buf):
+            if self._start is None:
+                start = buf.find("{", self._pos)
+                if start < 0:
+                    # No candidate yet: nothing before here is needed again
+                    self._offset += len(buf)
+                    self._buf = buf = ""
+                    self._pos = 0
+                    return
+                self._offset += start
+                self._buf = buf = buf[start:]
+                self._start = 0
+                self._pos = 1
+                self._stack = ["{"]
+                self._expect_key = True
+                continue
+
+            if self.max_object_chars and self._pos - self._start > self.max_object_chars:
+                self._restart()
+                continue
+
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buf, self._pos)
+                if match is None:
+                    self._pos = len(buf)
+                    return
+                if match.group() == "\\":
+                    # Skip the escaped character, even if it has not arrived yet
+                    self._pos = match.end() + 1
+                else:
+                    self._in_string = False
+                    self._pos = match.end()
+                continue
+
+            if self._expect_key:
+                while self._pos < len(buf) and buf[self._pos].isspace():
+                    self._pos += 1
+                if self._pos == len(buf):
+                    return
+                if buf[self._pos] not in '"}':
+                    self._restart()
+                    continue
+                self._expect_key = False
+
+            match = _STRUCTURAL.search(buf, self._pos)
+            if match is None:
+                self._pos = len(buf)
+                return
+            char = match.group()
+            self._pos = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+                self._expect_key = char == "{"
+            elif self._stack[-1] != _CLOSERS[char]:
+                self._restart()
+            else:
+                self._stack.pop()
+                if self._stack:
+                    continue
+                try:
+                    value = json.loads(buf[self._start:self._pos])
+                except json.JSONDecodeError:
+                    self._restart()
+                    continue
+                self.value = value
+                self.done = True
+                self.end = self._offset + self._pos
+                return
 
 
 class SafeJSONParser:
     @staticmethod
     def safe_parse(text: str) -> dict:
-        """Robust JSON parsing with security checks"""
+        """Robust JSON parsing with security checks
+
+        Falls back to the first balanced JSON object in the text, so code
+        fences and prose around the object are tolerated.
+        """
+        sanitized = SecurityUtils.sanitize_output(text)
         try:
-            sanitized = SecurityUtils.sanitize_output(text)
             return json.loads(sanitized)
         except json.JSONDecodeError:
+            extractor = JSONStreamExtractor()
+            extractor.feed(sanitized)
+            if extractor.done:
+                return extractor.value
             return {"error": "Invalid JSON", "original": text}
+
+    @staticmethod
+    def parse_stream(chunks: Iterable[str], max_object_chars: Optional[int] = None) -> Tuple[dict, str]:
+        """Parse the first JSON object from streamed chunks, stopping early
+
+        Consumption stops as soon as the object closes, and a generator is
+        closed so that the client aborts the rest of the generation. Returns
+        the parsed object (as ``safe_parse`` would) and the text consumed.
+        """
+        extractor = JSONStreamExtractor(max_object_chars)
+        try:
+            for chunk in chunks:
+                if extractor.feed(chunk) is not None:
+                    break
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+        return SafeJSONParser._stream_result(extractor)
+
+    @staticmethod
+    async def aparse_stream(
+            chunks: AsyncIterable[str],
+            max_object_chars: Optional[int] = None
+    ) -> Tuple[dict, str]:
+        """Async variant of parse_stream for astream() generators"""
+        extractor = JSONStreamExtractor(max_object_chars)
+        try:
+            async for chunk in chunks:
+                if extractor.feed(chunk) is not None:
+                    break
+        finally:
+            if hasattr(chunks, "aclose"):
+                await chunks.aclose()
+        return SafeJSONParser._stream_result(extractor)
+
+    @staticmethod
+    def _stream_result(extractor: JSONStreamExtractor) -> Tuple[dict, str]:
+        text = extractor.text
+        if extractor.done:
+            # Re-parse through safe_parse so sanitization applies as before
+            return SafeJSONParser.safe_parse(extractor.object_text), text
+        return SafeJSONParser.safe_parse(text), text
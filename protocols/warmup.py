@@ -0,0 +1,167 @@
+import threading
+import time
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from protocols.clients import OllamaClient, OllamaPool
+
+EVENT_KINDS = ("loaded", "evicted", "ping", "error")
+
+
+@dataclass(frozen=True)
+class ModelEvent:
+    """Something that happened to a model on one Ollama host"""
+
+    kind: str
+    model: str
+    host: str
+    ts: float = field(default_factory=time.time)
+    # Seconds Ollama spent loading the model, for "loaded"
+    load_seconds: Optional[float] = None
+    detail: Optional[str] = None
+
+
+def _tagged(model: str) -> str:
+    """Ollama lists untagged models under ``:latest``"""
+    return model if ":" in model else f"{model}:latest"
+
+
+@dataclass
+class _Target:
+    client: OllamaClient
+    host_state: Any = None
+    resident: bool = False
+    last_activity: float = field(default_factory=time.monotonic)
+
+
+class WarmupManager:
+    """Keeps local models loaded so requests never pay the model-load time
+
+    ``start`` preloads every model (an empty-prompt generate, which only
+    loads it) with ``keep_alive`` so Ollama keeps it resident, then a
+    background thread checks every ``check_interval`` seconds. A model with
+    no traffic for ``ping_interval`` seconds gets an empty-prompt ping that
+    renews its keep-alive; one that has disappeared from the host's loaded
+    models (``ollama ps``) is reported evicted and reloaded, and one that
+    failed to load is retried on every check. Traffic is read from each
+    client's own ``last_activity`` (pool members share a usage meter, so it
+    can't tell hosts apart), so the manager adds nothing to the request
+    path. Events go to ``events`` and to ``on_event``; members of an
+    ``OllamaPool`` also have their ``model_loaded`` flag kept current.
+    """
+
+    def __init__(
+            self,
+            clients: Iterable[Union[OllamaClient, OllamaPool]],
+            keep_alive: Union[float, str] = "30m",
+            ping_interval: float = 240.0,
+            check_interval: float = 30.0,
+            on_event: Optional[Callable[[ModelEvent], None]] = None,
+            max_events: int = 1000
+    ):
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.check_interval = check_interval
+        self.on_event = on_event
+        self.events: deque = deque(maxlen=max_events)
+        self._targets: List[_Target] = []
+        for client in clients:
+            if isinstance(client, OllamaPool):
+                self._targets.extend(_Target(host.client, host) for host in client.hosts)
+            else:
+                self._targets.append(_Target(client))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "WarmupManager":
+        """Preload every model, then keep them resident in the background"""
+        with self._lock:
+            if self.running:
+                return self
+            self._stop.clear()
+            self.preload()
+            self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "WarmupManager":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def preload(self) -> None:
+        for target in self._targets:
+            self._load(target, "loaded")
+
+    def check(self) -> None:
+        """One pass of eviction detection and idle pings"""
+        now = time.monotonic()
+        loaded_by_host: Dict[str, Optional[set]] = {}
+        for target in self._targets:
+            client = target.client
+            if client.base_url not in loaded_by_host:
+                loaded_by_host[client.base_url] = self._loaded_models(target)
+            loaded = loaded_by_host[client.base_url]
+
+            if client.last_activity is not None:
+                target.last_activity = max(target.last_activity, client.last_activity)
+
+            if not target.resident:
+                # A failed load is retried on every check, not once per ping_interval
+                self._load(target, "loaded")
+            elif loaded is not None and _tagged(client.model) not in loaded:
+                target.resident = False
+                self._emit(target, "evicted")
+                self._load(target, "loaded")
+            elif now - target.last_activity >= self.ping_interval:
+                self._load(target, "ping")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.check()
+
+    def _loaded_models(self, target: _Target) -> Optional[set]:
+        try:
+            return {_tagged(model["model"]) for model in target.client.client.ps()["models"]}
+        except Exception as e:
+            self._emit(target, "error", detail=f"ps failed: {e}")
+            return None
+
+    def _load(self, target: _Target, kind: str) -> None:
+        client = target.client
+        try:
+            # An empty prompt loads the model (or renews keep_alive) without generating
+            response = client.client.generate(model=client.model, prompt="", keep_alive=self.keep_alive)
+        except Exception as e:
+            self._set_resident(target, False)
+            self._emit(target, "error", detail=f"{kind} failed: {e}")
+            return
+        target.last_activity = time.monotonic()
+        self._set_resident(target, True)
+        load_ns = response.get("load_duration")
+        self._emit(target, kind, load_seconds=load_ns / 1e9 if load_ns else None)
+
+    def _set_resident(self, target: _Target, resident: bool) -> None:
+        target.resident = resident
+        if target.host_state is not None:
+            target.host_state.model_loaded = resident
+
+    def _emit(self, target: _Target, kind: str, **details: Any) -> None:
+        event = ModelEvent(kind=kind, model=target.client.model, host=target.client.base_url, **details)
+        self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
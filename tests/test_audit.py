@@ -0,0 +1,89 @@
+import gzip
+
+import pytest
+
+from protocols.audit import AuditLogWriter, iter_audit_records, list_segments, verify_audit_chain
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "binary"])
+def test_records_are_chained_and_verifiable(tmp_path, fmt):
+    with AuditLogWriter(tmp_path, format=fmt) as log:
+        for i in range(50):
+            log.write({"context_hash": f"h{i}", "total_rounds": i})
+        assert log.flush(timeout=5)
+
+    assert verify_audit_chain(tmp_path) == 50
+    records = list(iter_audit_records(tmp_path))
+    assert [r["seq"] for r in records] == list(range(50))
+    assert records[-1]["record"] == {"context_hash": "h49", "total_rounds": 49}
+
+
+def test_tampering_breaks_the_chain(tmp_path):
+    with AuditLogWriter(tmp_path) as log:
+        for i in range(3):
+            log.write({"n": i})
+
+    path = list_segments(tmp_path)[0]
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data.replace(b'"n":1', b'"n":7'))
+
+    with pytest.raises(ValueError, match="seq 1"):
+        verify_audit_chain(tmp_path)
+
+
+def test_rotation_compresses_closed_segments(tmp_path):
+    with AuditLogWriter(tmp_path, max_segment_bytes=512, max_batch=1) as log:
+        for i in range(40):
+            log.write({"n": i, "padding": "x" * 40})
+            log.flush()
+
+    segments = list_segments(tmp_path)
+    assert len(segments) > 2
+    assert all(path.endswith(".gz") for path in segments[:-1])
+    with gzip.open(segments[0]) as f:
+        assert f.readline()
+    assert verify_audit_chain(tmp_path) == 40
+
+
+def test_restart_continues_chain_after_torn_write(tmp_path):
+    with AuditLogWriter(tmp_path, compress=False) as log:
+        log.write({"n": 0})
+        log.write({"n": 1})
+        log.flush()
+        head = log.head
+
+    path = list_segments(tmp_path)[-1]
+    with open(path, "ab") as f:
+        f.write(b'{"seq":2,"ts":1.0,"prev"')
+
+    with AuditLogWriter(tmp_path, compress=False) as log:
+        assert log.head == head
+        log.write({"n": 2})
+
+    assert verify_audit_chain(tmp_path) == 3
+    assert [r["record"]["n"] for r in iter_audit_records(tmp_path)] == [0, 1, 2]
+
+
+def test_write_after_close_raises(tmp_path):
+    log = AuditLogWriter(tmp_path)
+    log.close()
+    with pytest.raises(RuntimeError):
+        log.write({"n": 0})
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "binary"])
+def test_bad_records_do_not_stop_the_writer(tmp_path, fmt):
+    circular = {}
+    circular["self"] = circular
+    with AuditLogWriter(tmp_path, format=fmt) as log:
+        # Mixed key types can't be sorted; they are written with string keys
+        log.write({"a": {1: "x", "b": "y"}})
+        with pytest.raises(ValueError):
+            log.write(circular)
+        log.write({"n": 2})
+        assert log.flush(timeout=5)
+
+    assert verify_audit_chain(tmp_path) == 2
+    assert [r["record"] for r in iter_audit_records(tmp_path)] == [{"a": {"1": "x", "b": "y"}}, {"n": 2}]
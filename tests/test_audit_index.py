@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+
+import pytest
+
+from protocols.audit import AuditLogWriter
+from protocols.audit_index import AuditIndex
+
+
+def record(i):
+    return {
+        "context_hash": f"ctx{i % 3}",
+        "local_model": "llama3.2",
+        "remote_model": "gpt-4o" if i % 2 else "gpt-4o-mini",
+        "termination_reason": "final_decision" if i % 4 else "max_rounds",
+        "total_rounds": i,
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = AuditIndex(tmp_path / "audit.db")
+    yield index
+    index.close()
+
+
+def test_writer_indexes_batches_as_they_commit(tmp_path, index):
+    with AuditLogWriter(tmp_path / "log", index=index) as log:
+        for i in range(12):
+            log.write(record(i))
+        log.flush()
+
+    assert index.last_seq == 11
+    assert [r["record"]["total_rounds"] for r in index.find(context_hash="ctx1")] == [1, 4, 7, 10]
+    assert len(index.find(model="gpt-4o")) == 6
+    assert len(index.find(model="llama3.2", termination_reason="max_rounds")) == 3
+    assert index.find(context_hash="ctx0", limit=1)[0]["seq"] == 0
+
+
+def test_time_range_is_half_open(tmp_path, index):
+    index.add([{"seq": i, "ts": 100.0 + i, "hash": "h", "record": record(i)} for i in range(5)])
+
+    assert [r["seq"] for r in index.find(since=101, until=103)] == [1, 2]
+
+
+def test_catch_up_indexes_only_new_records(tmp_path, index):
+    log_dir = tmp_path / "log"
+    with AuditLogWriter(log_dir, max_segment_bytes=400, max_batch=1) as log:
+        for i in range(10):
+            log.write(record(i))
+            log.flush()
+
+    assert index.catch_up(log_dir) == 10
+    assert index.catch_up(log_dir) == 0
+
+    with AuditLogWriter(log_dir, max_segment_bytes=400) as log:
+        log.write(record(10))
+    assert index.catch_up(log_dir) == 1
+    assert index.last_seq == 10
+
+
+def test_catch_up_repairs_gaps(tmp_path, index):
+    log_dir = tmp_path / "log"
+    with AuditLogWriter(log_dir, max_segment_bytes=400, max_batch=1) as log:
+        for i in range(6):
+            log.write(record(i))
+            log.flush()
+    index.catch_up(log_dir)
+    with index._connection() as conn:
+        conn.execute("DELETE FROM records WHERE seq = 2")
+
+    assert index.catch_up(log_dir) == 1
+    assert len(index.find()) == 6
+
+
+def test_close_closes_every_threads_connection(tmp_path, index):
+    with AuditLogWriter(tmp_path / "log", index=index) as log:
+        log.write(record(0))
+        log.flush()
+    reader = threading.Thread(target=lambda: index.find(context_hash="ctx0"))
+    reader.start()
+    reader.join()
+
+    # This thread's, the writer thread's and the reader thread's
+    connections = list(index._connections)
+    assert len(connections) == 3
+    index.close()
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    # The index reconnects if used again
+    assert index.last_seq == 0
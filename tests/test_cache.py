@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from protocols.cache import MemoryCache, SQLiteCache, cache_key
+from protocols.clients import OllamaClient
+
+
+@pytest.fixture
+def mock_ollama():
+    """Fixture to mock both Ollama clients, counting generate calls."""
+    with patch("protocols.clients.ollama_client.ollama.Client") as sync_cls, \
+            patch("protocols.clients.ollama_client.ollama.AsyncClient") as async_cls:
+        sync_instance, async_instance = MagicMock(), MagicMock()
+        sync_instance.generate.return_value = {"response": "Mocked response"}
+        async_instance.generate = AsyncMock(return_value={"response": "Async response"})
+        sync_cls.return_value = sync_instance
+        async_cls.return_value = async_instance
+        yield sync_instance, async_instance
+
+
+def test_cache_key_depends_on_all_inputs():
+    params = {"temperature": 0.0, "top_p": 1.0}
+    key = cache_key("OllamaClient", "llama3", params, "prompt")
+    assert key == cache_key("OllamaClient", "llama3", dict(reversed(params.items())), "prompt")
+    assert key != cache_key("OllamaClient", "llama3", params, "prompt!")
+    assert key != cache_key("OllamaClient", "llama3.2", params, "prompt")
+    assert key != cache_key("OllamaClient", "llama3", {**params, "top_p": 0.9}, "prompt")
+
+
+def test_memory_cache_lru_and_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("protocols.cache.time.time", lambda: clock[0])
+    cache = MemoryCache(max_entries=2, ttl=10)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")  # evicts least recently used "b"
+    assert cache.get("b") is None
+    clock[0] += 11
+    assert cache.get("a") is None and len(cache) == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = tmp_path / "responses.db"
+    writer, reader = SQLiteCache(path), SQLiteCache(path, ttl=60)
+    writer.set("key", "value")
+    assert reader.get("key") == "value"
+    assert reader.purge_expired() == 0
+    reader.clear()
+    assert writer.get("key") is None
+    writer.close()
+    reader.close()
+
+
+def test_generate_uses_cache_when_deterministic(mock_ollama):
+    sync_client, async_client = mock_ollama
+    cache = MemoryCache()
+    client = OllamaClient(model="llama3", temperature=0.0, cache=cache)
+
+    assert client.generate("same prompt") == "Mocked response"
+    assert client.generate("same prompt") == "Mocked response"
+    assert asyncio.run(client.agenerate("same prompt")) == "Mocked response"
+    assert sync_client.generate.call_count == 1
+    async_client.generate.assert_not_called()
+    assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+
+
+def test_generate_bypasses_cache_when_sampling(mock_ollama):
+    sync_client, _ = mock_ollama
+    cache = MemoryCache()
+    client = OllamaClient(model="llama3", temperature=0.7, cache=cache)
+    client.generate("same prompt")
+    client.generate("same prompt")
+    assert sync_client.generate.call_count == 2
+    assert cache.stats.bypasses == 2 and len(cache) == 0
+
+    client = OllamaClient(model="llama3", temperature=0.7, cache=cache, cache_nondeterministic=True)
+    client.generate("same prompt")
+    client.generate("same prompt")
+    assert sync_client.generate.call_count == 3
@@ -0,0 +1,81 @@
+import pytest
+
+from protocols.chunking import (
+    SpilledChunks,
+    iter_chunks,
+    iter_paragraphs,
+    merge_worker_outputs,
+    split_into_chunks,
+)
+
+
+def word_counts(texts):
+    return [len(text.split()) for text in texts]
+
+
+def test_paragraphs_are_packed_greedily():
+    documents = ["one two three\n\nfour five", "six seven eight nine"]
+    chunks = split_into_chunks(documents, max_tokens=6, count_tokens=word_counts)
+
+    assert chunks == ["one two three\n\nfour five", "six seven eight nine"]
+
+
+def test_oversized_paragraph_is_split_on_whitespace():
+    text = " ".join(f"w{i}" for i in range(25))
+    chunks = split_into_chunks([text], max_tokens=4, count_tokens=word_counts)
+
+    assert all(len(chunk.split()) <= 4 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_empty_context_yields_no_chunks():
+    assert split_into_chunks(["", "\n\n"], max_tokens=10, count_tokens=word_counts) == []
+    with pytest.raises(ValueError):
+        split_into_chunks(["text"], max_tokens=0, count_tokens=word_counts)
+
+
+def test_merge_labels_outputs_in_order():
+    assert merge_worker_outputs(["only"]) == "only"
+    assert merge_worker_outputs(["a", "b"]) == "[Chunk 1/2]\na\n\n[Chunk 2/2]\nb"
+
+
+def test_file_paragraphs_match_in_memory_split(tmp_path):
+    text = "alpha beta\n\n  \ngamma\n\ndelta epsilon zeta"
+    path = tmp_path / "export.txt"
+    path.write_text(text)
+
+    empty = tmp_path / "empty.txt"
+    empty.touch()
+
+    assert list(iter_paragraphs(path)) == list(iter_paragraphs([text]))
+    assert list(iter_paragraphs(empty)) == []
+
+
+def test_long_file_paragraph_is_cut_without_breaking_characters(tmp_path):
+    path = tmp_path / "rows.txt"
+    path.write_text("é" * 50 + "\n" + "row " * 40, encoding="utf-8")
+
+    paragraphs = list(iter_paragraphs(path, max_paragraph_bytes=32))
+
+    assert all(len(p.encode()) <= 32 for p in paragraphs)
+    assert "".join(paragraphs).replace(" ", "").startswith("é" * 50)
+    assert "�" not in "".join(paragraphs)
+
+
+def test_spilled_chunks_read_back_lazily():
+    chunks = ["first", "", "ünïcode"]
+    with SpilledChunks(iter(chunks), digest=len) as spilled:
+        assert len(spilled) == 3
+        assert list(spilled) == chunks
+        assert spilled[-1] == "ünïcode"
+        assert spilled.digests == [5, 0, 7]
+
+
+def test_iter_chunks_is_lazy():
+    def paragraphs():
+        yield "a b"
+        yield "c d"
+        raise AssertionError("read past the first chunk")
+
+    chunks = iter_chunks(paragraphs(), max_tokens=2, count_tokens=word_counts, batch_size=1)
+    assert next(chunks) == "a b"
@@ -0,0 +1,60 @@
+import copy
+import hashlib
+import json
+import pickle
+
+import pytest
+
+from protocols import privacy_protocol
+from protocols.privacy_protocol import PrivacyDecision_v2, canonical_json
+
+
+def test_defaults_are_shared_and_read_only():
+    first, second = PrivacyDecision_v2(), PrivacyDecision_v2()
+
+    assert first.compliance_status is second.compliance_status
+    with pytest.raises(TypeError):
+        first.compliance_status["gdpr"]["article32"] = True
+    with pytest.raises(AttributeError):
+        first.confidence_score = 1.0
+    assert not hasattr(first, "__dict__")
+
+
+def test_to_dict_returns_plain_mutable_copies():
+    decision = PrivacyDecision_v2(content={"a": 1})
+    data = decision.to_dict()
+    data["compliance_status"]["gdpr"]["article32"] = True
+    data["privacy_controls"]["applied_techniques"].append("noise")
+
+    assert PrivacyDecision_v2().to_dict()["compliance_status"]["gdpr"]["article32"] is False
+    assert PrivacyDecision_v2.from_dict(decision.to_dict()) == decision
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_to_json_matches_to_dict(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(privacy_protocol, "orjson", None)
+    decision = PrivacyDecision_v2(content={"b": [1, 2], "a": "é"}, data_sources=["sha256:x"])
+
+    assert json.loads(decision.to_json()) == decision.to_dict()
+    assert decision.to_json() is decision.to_json()
+
+
+def test_integrity_uses_canonical_digest_and_accepts_legacy():
+    content = {"b": 1, "a": 2}
+    canonical = hashlib.sha256(canonical_json(content).encode()).hexdigest()
+    legacy = hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+    assert PrivacyDecision_v2(content=content, input_digest=f"sha256:{canonical}").validate_integrity()
+    assert PrivacyDecision_v2(content=content, input_digest=legacy).validate_integrity()
+    assert not PrivacyDecision_v2(content=content, input_digest="sha256:00").validate_integrity()
+    assert PrivacyDecision_v2(content=content).content_digest == canonical
+
+
+def test_replace_copy_and_pickle():
+    decision = PrivacyDecision_v2(content={"a": 1}, confidence_score=0.9)
+    changed = decision.replace(confidence_score=0.1)
+
+    assert changed.confidence_score == 0.1 and decision.confidence_score == 0.9
+    assert pickle.loads(pickle.dumps(decision)) == decision
+    assert copy.deepcopy(decision) == decision
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import random
+
+import pytest
+from protocols.clients import FakeLLM, LatencyModel, supervisor_script, worker_script
+from protocols.privacy_protocol import PrivacyProtocol_v2
+
+
+def test_latency_samples_are_repeatable_for_a_seed():
+    model = LatencyModel.lognormal(0.01, 0.5)
+    first = [model.sample(random.Random(3)) for _ in range(5)]
+    second = [model.sample(random.Random(3)) for _ in range(5)]
+
+    assert first == second
+    assert all(value > 0 for value in first)
+    assert LatencyModel.uniform(0.1, 0.2).sample(random.Random(0)) < 0.2
+
+
+def test_unknown_latency_distribution_rejected():
+    with pytest.raises(ValueError):
+        LatencyModel("pareto", 1.0)
+
+
+def test_generate_cycles_scripted_responses_and_counts_usage():
+    llm = FakeLLM(responses=["first answer", "second"])
+
+    assert [llm.generate("one two three") for _ in range(3)] == ["first answer", "second", "first answer"]
+    assert llm.calls == 3
+    assert llm.usage_stats.prompt_tokens == 9
+    assert llm.usage_stats.completion_tokens == 5
+
+
+def test_stream_matches_generate_and_paces_tokens():
+    llm = FakeLLM(responses="alpha beta  gamma", tokens_per_second=1000)
+
+    assert "".join(llm.stream("prompt")) == llm.generate("prompt")
+    assert llm.usage_stats.completion_tokens == 6
+
+
+def test_stream_closed_early_counts_only_sent_tokens():
+    llm = FakeLLM(responses="a b c d")
+    stream = llm.stream("prompt")
+    next(stream)
+    stream.close()
+
+    assert llm.usage_stats.completion_tokens == 1
+
+
+def test_async_generate_and_stream():
+    llm = FakeLLM(responses=worker_script(words=3))
+
+    async def run():
+        response = await llm.agenerate("Round 2 Directive: go")
+        chunks = [chunk async for chunk in llm.astream("Round 2 Directive: go")]
+        return response, "".join(chunks)
+
+    response, streamed = asyncio.run(run())
+    assert response == streamed == "Round 2 summary: aggregate aggregate aggregate"
+
+
+def test_scripted_roles_drive_v2_to_finalize():
+    protocol = PrivacyProtocol_v2(
+        local_llm=FakeLLM(responses=worker_script()),
+        remote_llm=FakeLLM(responses=supervisor_script(finalize_at=2)),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+    )
+    result = protocol.process_query("summarise", ["LDL 120"])
+
+    assert result["processing_rounds"] == 2
+    assert result["termination_reason"] == "final_decision"
+    assert result["final_output"] == {"verified_response": {"content": "aggregated summary"}}
+    assert json.loads(protocol.remote_llm.generate("Privacy-First Task Orchestration"))["directive"]
@@ -0,0 +1,82 @@
+import pytest
+
+from protocols.history import LazyRecord, ProcessingHistory, SpillFile, field_digest
+from protocols.privacy_protocol import PrivacyDecision_v2, PrivacyProtocol_v2
+
+
+def entry(round_number):
+    return {
+        "round": round_number,
+        "directive": f"directive {round_number}",
+        "worker_response": "x" * 1000,
+        "decision": PrivacyDecision_v2(content={"answer": round_number}, confidence_score=0.5),
+    }
+
+
+@pytest.fixture
+def protocol_history():
+    def build(retention, **kwargs):
+        protocol = PrivacyProtocol_v2(None, None, "Test Record", ["medical"], history_retention=retention, **kwargs)
+        return protocol._new_history()
+    return build
+
+
+def test_full_retention_keeps_entries_as_given(protocol_history):
+    history = protocol_history("full")
+    history.append(entry(1))
+
+    assert history[0]["decision"].content == {"answer": 1}
+
+
+def test_digest_retention_keeps_only_hashes(protocol_history):
+    history = protocol_history("digests")
+    history.append(entry(1))
+
+    record = history[0]
+    assert record["round"] == 1
+    assert record["worker_response"] == field_digest("x" * 1000)
+    assert record["decision"].startswith("sha256:")
+
+
+def test_spill_retention_loads_payload_lazily(tmp_path, protocol_history):
+    history = protocol_history("spill", history_spill_path=tmp_path / "history.jsonl")
+    history.append(entry(1))
+    history.append(entry(2))
+
+    record = history[1]
+    assert isinstance(record, LazyRecord)
+    assert record["round"] == 2
+    assert record["directive"] == "directive 2"
+    assert record["decision"] == PrivacyDecision_v2(content={"answer": 2}, confidence_score=0.5)
+    assert list(record) == ["round", "directive", "worker_response", "decision"]
+    assert [r["round"] for r in history] == [1, 2]
+    assert (tmp_path / "history.jsonl").read_text().count("\n") == 2
+
+
+def test_histories_share_one_spill_file():
+    spill = SpillFile()
+    first, second = ProcessingHistory("spill", spill), ProcessingHistory("spill", spill)
+    first.append({"round": 1, "text": "a"})
+    second.append({"round": 1, "text": "b"})
+    first.append({"round": 2, "text": "c"})
+
+    assert [r["text"] for r in first] == ["a", "c"]
+    assert second[0].load() == {"round": 1, "text": "b"}
+    spill.close()
+
+
+def test_protocol_close_releases_spill_file():
+    with PrivacyProtocol_v2(None, None, "Test Record", ["medical"], history_retention="spill") as protocol:
+        spill = protocol.history_spill
+        protocol._new_history().append(entry(1))
+        assert not spill._file.closed
+
+    assert spill._file.closed
+    protocol.close()
+
+
+def test_invalid_retention_is_rejected():
+    with pytest.raises(ValueError):
+        PrivacyProtocol_v2(None, None, "Test Record", [], history_retention="some")
+    with pytest.raises(ValueError):
+        ProcessingHistory("spill")
@@ -0,0 +1,76 @@
+import asyncio
+import random
+
+from protocols.utils import JSONStreamExtractor, SafeJSONParser
+
+RESPONSE = (
+    'Sure! Ignore {this} and {"bad": ]} then\n```json\n'
+    '{"resolution": {"type": "finalize", "note": "brace } and quote \\" inside"}, "checks": [1, [2]]}\n'
+    '```\nLet me know if you need anything else {"extra": 1}'
+)
+EXPECTED = {"resolution": {"type": "finalize", "note": 'brace } and quote " inside'}, "checks": [1, [2]]}
+
+
+def test_extractor_finds_first_valid_object_across_any_chunking():
+    rng = random.Random(3)
+    for _ in range(200):
+        extractor = JSONStreamExtractor()
+        position = 0
+        while extractor.feed(RESPONSE[position:position + rng.randint(1, 9)]) is None:
+            position = len(extractor.text)
+        assert extractor.value == EXPECTED
+        assert extractor.text.endswith('[1, [2]]}')
+
+
+def test_extractor_abandons_oversized_candidates():
+    extractor = JSONStreamExtractor(max_object_chars=20)
+    extractor.feed('{"long": "' + "x" * 50 + '"} {"ok": 1}')
+
+    assert extractor.value == {"ok": 1}
+
+
+def test_safe_parse_tolerates_fences_and_prose():
+    assert SafeJSONParser.safe_parse(RESPONSE) == EXPECTED
+    assert SafeJSONParser.safe_parse('{"plain": true}') == {"plain": True}
+    assert SafeJSONParser.safe_parse("no json here")["error"] == "Invalid JSON"
+
+
+def test_parse_stream_stops_generation_once_object_closes():
+    consumed = []
+    closed = []
+
+    def generate():
+        try:
+            for chunk in ['Here: {"a"', ': 1}', " and then", " a long tail"]:
+                consumed.append(chunk)
+                yield chunk
+        finally:
+            closed.append(True)
+
+    value, text = SafeJSONParser.parse_stream(generate())
+
+    assert value == {"a": 1}
+    assert text == 'Here: {"a": 1}'
+    assert consumed == ['Here: {"a"', ": 1}"]
+    assert closed == [True]
+
+
+def test_aparse_stream_stops_generation_once_object_closes():
+    consumed = []
+
+    async def generate():
+        for chunk in ['{"a": ', "[1]}", " tail"]:
+            consumed.append(chunk)
+            yield chunk
+
+    value, text = asyncio.run(SafeJSONParser.aparse_stream(generate()))
+
+    assert value == {"a": [1]}
+    assert consumed == ['{"a": ', "[1]}"]
+
+
+def test_parse_stream_without_object_returns_error():
+    value, text = SafeJSONParser.parse_stream(iter(["no", " json"]))
+
+    assert value["error"] == "Invalid JSON"
+    assert text == "no json"
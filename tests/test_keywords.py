@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import MagicMock
+from protocols.keywords import KeywordAutomaton, SensitiveTermDictionary, load_terms
+from protocols.privacy_protocol import PrivacyProtocol_v1
+
+
+def test_automaton_finds_overlapping_terms():
+    """Terms sharing prefixes and suffixes are all reported in one pass."""
+    automaton = KeywordAutomaton({"he": 0.1, "she": 0.2, "hers": 0.3, "his": 0.4}, whole_words=False)
+    found = [(m.term, m.start, m.end) for m in automaton.find("uSHErs")]
+    assert found == [("she", 1, 4), ("he", 2, 4), ("hers", 2, 6)]
+
+
+def test_automaton_whole_words_and_scoring():
+    automaton = KeywordAutomaton({"ace": 0.5, "warfarin": 0.5, "hiv": 0.9})
+    assert automaton.score("Take your place") == 0.0
+    assert automaton.score("On Warfarin and ACE inhibitors") == pytest.approx(0.75)
+    assert automaton.score("warfarin warfarin") == pytest.approx(0.5)
+    assert automaton.score("hiv warfarin ace", stop_at=0.8) == pytest.approx(0.9)
+    with pytest.raises(ValueError):
+        KeywordAutomaton({"bad": 1.5})
+
+
+def test_load_terms_keeps_commas_that_are_not_weights(tmp_path):
+    path = tmp_path / "terms.csv"
+    path.write_text("Doe, Jane\nSmith, John,0.8\nAcme, Inc.\t0.4\n")
+    assert load_terms(path) == {"Doe, Jane": 1.0, "Smith, John": 0.8, "Acme, Inc.": 0.4}
+
+    path.write_text("warfarin\tlots\n")
+    with pytest.raises(ValueError, match=":1: invalid weight"):
+        load_terms(path)
+
+
+def test_dictionary_loads_and_reloads_files(tmp_path):
+    path = tmp_path / "terms.tsv"
+    path.write_text("# drug names\nwarfarin\t0.6\nmetformin,0.3\nproject falcon\n")
+    assert load_terms(path) == {"warfarin": 0.6, "metformin": 0.3, "project falcon": 1.0}
+
+    dictionary = SensitiveTermDictionary({"ssn": 1.0}, paths=[path])
+    assert dictionary.score("Project Falcon roadmap") == 1.0
+    automaton = dictionary.automaton
+    assert dictionary.reload_if_changed() is False
+    assert dictionary.automaton is automaton
+
+    path.write_text("insulin\t0.8\n")
+    dictionary.reload()
+    assert dictionary.score("project falcon") == 0.0
+    assert dictionary.score("insulin and ssn") == 1.0
+
+
+def test_protocol_v1_uses_threshold():
+    terms = SensitiveTermDictionary({"diagnosis": 0.5, "lab result": 0.5})
+    protocol = PrivacyProtocol_v1(MagicMock(), MagicMock(), sensitivity_threshold=0.7, sensitive_terms=terms)
+    assert protocol.sensitivity_score("diagnosis pending") == 0.5
+    assert not protocol.detect_sensitive_data("diagnosis pending")
+    assert protocol.detect_sensitive_data("diagnosis and lab result")
+
+    protocol.process_query("diagnosis and lab result")
+    protocol.local_llm.generate.assert_called_once()
+    protocol.remote_llm.generate.assert_not_called()
+
+
+def test_protocol_v1_default_terms():
+    protocol = PrivacyProtocol_v1(MagicMock(), MagicMock())
+    assert protocol.detect_sensitive_data("What is my Credit Card limit?")
+    assert not protocol.detect_sensitive_data("Explain quantum computing")
+
+
+@pytest.mark.parametrize("prompt", [
+    "reset all user passwords",
+    "export patient SSNs",
+    "credit cards on file",
+    "MedicalHistory",
+])
+def test_protocol_v1_default_terms_match_substrings(prompt):
+    """Plural and compound forms route locally, as substring matching always did."""
+    protocol = PrivacyProtocol_v1(MagicMock(), MagicMock())
+    assert protocol.detect_sensitive_data(prompt)
+
+    protocol.process_query(prompt)
+    protocol.local_llm.generate.assert_called_once()
+    protocol.remote_llm.generate.assert_not_called()
+
+
+def test_match_offsets_survive_length_changing_lowercase():
+    """Offsets index the original text even when lower() would lengthen it."""
+    automaton = KeywordAutomaton({"ssn": 1.0})
+    text = "İstanbul İD SSN"
+    (match,) = automaton.find(text)
+    assert text[match.start:match.end] == "SSN"
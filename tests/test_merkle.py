@@ -0,0 +1,23 @@
+from protocols.merkle import MerkleTree, leaf_digest
+
+
+def test_editing_one_chunk_keeps_other_leaves():
+    original = MerkleTree.from_chunks(["a", "b", "c", "d", "e"])
+    edited = MerkleTree.from_chunks(["a", "b", "C", "d", "e"])
+
+    assert original.root != edited.root
+    changed = [i for i, (x, y) in enumerate(zip(original.leaves, edited.leaves)) if x != y]
+    assert changed == [2]
+
+
+def test_root_is_stable_and_single_leaf_is_its_own_root():
+    assert MerkleTree.from_chunks(["x", "y"]).root == MerkleTree.from_chunks(["x", "y"]).root
+    assert MerkleTree.from_chunks(["x"]).root == leaf_digest("x")
+    assert MerkleTree.from_chunks([]).root == leaf_digest("")
+
+
+def test_inclusion_proofs_verify():
+    tree = MerkleTree.from_chunks([str(i) for i in range(7)])
+    for index, leaf in enumerate(tree.leaves):
+        assert MerkleTree.verify(leaf, tree.proof(index), tree.root)
+    assert not MerkleTree.verify(leaf_digest("forged"), tree.proof(3), tree.root)
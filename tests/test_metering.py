@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+from protocols.clients import FakeLLM
+from protocols.metering import ModelPrice, PriceTable, UsageMeter, UsageRegistry, usage_registry
+
+
+def test_concurrent_records_are_not_lost():
+    meter = UsageMeter()
+
+    def work():
+        for _ in range(5000):
+            meter.record(2, 1, 0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = meter.snapshot()
+    assert (stats.prompt_tokens, stats.completion_tokens, stats.calls) == (80000, 40000, 40000)
+    assert stats.total_cost == pytest.approx(20000.0)
+    # Exited threads are folded into the retired total
+    assert meter._counters == []
+    assert meter.snapshot().prompt_tokens == 80000
+
+
+def test_price_table_prefers_longest_prefix():
+    table = PriceTable({
+        "gpt-4o": ModelPrice.per_million(2.5, 10.0),
+        "gpt-4o-mini": ModelPrice.per_million(0.15, 0.6),
+    })
+
+    assert table.lookup("gpt-4o-2024-08-06").input == pytest.approx(2.5e-6)
+    assert table.lookup("gpt-4o-mini-2024-07-18").output == pytest.approx(0.6e-6)
+    assert table.lookup("llama3.2").cost(1000, 1000) == 0.0
+
+
+def test_client_charges_input_and_output_prices():
+    prices = PriceTable({"priced": ModelPrice(input=0.01, output=0.03)})
+    llm = FakeLLM(model="priced", responses="a b", prices=prices)
+    llm.generate("one two three")
+
+    assert llm.usage_stats.total_cost == pytest.approx(3 * 0.01 + 2 * 0.03)
+    legacy = FakeLLM(responses="a b", cost_per_token=0.5)
+    legacy.generate("one two three")
+    assert legacy.usage_stats.total_cost == pytest.approx(2.5)
+
+
+def test_registry_reports_rates_since_last_report():
+    registry = UsageRegistry()
+    meter = registry.meter("m")
+    meter.record(100, 50, 1.5)
+    time.sleep(0.01)
+    first = registry.report()["m"]
+
+    assert first["calls"] == 1
+    assert first["tokens_per_second"] > 0
+    assert first["cost_per_second"] > 0
+    assert registry.report()["m"]["tokens_per_second"] == 0
+
+
+def test_clients_record_into_process_registry():
+    llm = FakeLLM(model="registry-test-model", responses="x y z")
+    before = usage_registry.meter("registry-test-model").snapshot().completion_tokens
+    llm.generate("prompt")
+
+    assert usage_registry.meter("registry-test-model").snapshot().completion_tokens == before + 3
@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from protocols.clients import OllamaClient
 
 ollama_model = "deepscaler:latest"
@@ -86,3 +87,121 @@ def test_ollama_client_stream(mock_ollama_client, ollama_client):
         },
         stream=True
     )
+
+
+@pytest.fixture
+def mock_ollama_async_client():
+    """Fixture to mock the async Ollama client entirely."""
+    with patch("protocols.clients.ollama_client.ollama.AsyncClient") as mock_async_client:
+        mock_instance = MagicMock()
+        mock_instance.generate = AsyncMock()
+        mock_async_client.return_value = mock_instance
+        yield mock_instance
+
+
+def test_ollama_client_agenerate(mock_ollama_client, mock_ollama_async_client):
+    """Test agenerate() uses the async client and tracks usage."""
+    mock_ollama_async_client.generate.return_value = {"response": "Async response"}
+    client = OllamaClient(model=ollama_model, base_url="http://mock-url:11434")
+
+    response = asyncio.run(client.agenerate("Test prompt"))
+
+    assert response == "Async response"
+    mock_ollama_client.generate.assert_not_called()
+    assert client.usage_stats.prompt_tokens == 2
+    assert client.usage_stats.completion_tokens == 2
+
+
+def test_ollama_client_astream(mock_ollama_client, mock_ollama_async_client):
+    """Test astream() yields chunks from the async client."""
+    async def chunks():
+        for text in ("Chunk1 ", "Chunk2"):
+            yield {"response": text}
+
+    mock_ollama_async_client.generate.return_value = chunks()
+    client = OllamaClient(model=ollama_model, base_url="http://mock-url:11434")
+
+    async def collect():
+        return [chunk async for chunk in client.astream("Stream prompt")]
+
+    assert "".join(asyncio.run(collect())) == "Chunk1 Chunk2"
+    assert mock_ollama_async_client.generate.call_args.kwargs["stream"] is True
+    assert client.usage_stats.completion_tokens == 2
+
+
+def test_ollama_client_prefers_eval_counts(mock_ollama_client, ollama_client):
+    """Server-reported eval counts replace local token counting."""
+    mock_ollama_client.generate.return_value = {
+        "response": "Mocked response", "prompt_eval_count": 17, "eval_count": 5
+    }
+    ollama_client.generate("Test prompt")
+
+    mock_ollama_client.generate.return_value = [
+        {"response": "Chunk1 "},
+        {"response": "Chunk2", "done": True, "prompt_eval_count": 3, "eval_count": 2},
+    ]
+    assert "".join(ollama_client.stream("Stream prompt")) == "Chunk1 Chunk2"
+
+    assert ollama_client.usage_stats.prompt_tokens == 20
+    assert ollama_client.usage_stats.completion_tokens == 7
+
+
+def test_ollama_client_stream_closed_early(mock_ollama_client, ollama_client):
+    """Stopping a stream early closes the HTTP stream and still records usage."""
+    closed = []
+
+    def chunks():
+        try:
+            for text in ("one ", "two ", "three"):
+                yield {"response": text}
+        finally:
+            closed.append(True)
+
+    mock_ollama_client.generate.return_value = chunks()
+    stream = ollama_client.stream("Stream prompt")
+    assert next(stream) == "one "
+    stream.close()
+
+    assert closed == [True]
+    assert ollama_client.usage_stats.completion_tokens == 1
+
+
+def test_ollama_session_sends_back_context_and_counts_reuse(mock_ollama_client):
+    """Later session turns send the returned context and report reused tokens."""
+    client = OllamaClient(model=ollama_model, base_url="http://mock-url:11434", keep_alive="30m")
+    mock_ollama_client.generate.side_effect = [
+        {"response": "first", "context": list(range(50)), "prompt_eval_count": 45, "eval_count": 5},
+        {"response": "second", "context": list(range(60)), "prompt_eval_count": 6, "eval_count": 4},
+        # The runner lost its cache and evaluated the whole conversation again
+        {"response": "third", "context": list(range(70)), "prompt_eval_count": 66, "eval_count": 4},
+    ]
+    session = client.session()
+
+    assert session.generate("long context prompt") == "first"
+    assert session.generate("Round 2") == "second"
+    session.generate("Round 3")
+
+    first, second, _ = mock_ollama_client.generate.call_args_list
+    assert first.kwargs["context"] is None
+    assert second.kwargs["context"] == list(range(50))
+    assert second.kwargs["keep_alive"] == "30m"
+    assert session.stats.to_dict() == {
+        "prefill_tokens": 117,
+        "reused_tokens": 50,
+        "calls": 3,
+        "cache_misses": 1,
+        "saved_ratio": 50 / 167,
+    }
+    assert client.prefill_stats.reused_tokens == 50
+    assert client.usage_stats.prompt_tokens == 117
+
+
+def test_keep_alive_only_sent_when_configured(mock_ollama_client, ollama_client):
+    """Calls carry keep_alive only if the client was given one."""
+    mock_ollama_client.generate.return_value = {"response": "ok"}
+    ollama_client.generate("prompt")
+    assert "keep_alive" not in mock_ollama_client.generate.call_args.kwargs
+
+    client = OllamaClient(model=ollama_model, base_url="http://mock-url:11434", keep_alive=-1)
+    client.generate("prompt")
+    assert mock_ollama_client.generate.call_args.kwargs["keep_alive"] == -1
@@ -0,0 +1,110 @@
+import httpx
+import ollama
+import pytest
+from unittest.mock import MagicMock, patch
+from protocols.clients import OllamaPool
+
+hosts = ["http://ollama-a:11434", "http://ollama-b:11434", "http://ollama-c:11434"]
+
+
+@pytest.fixture
+def mock_ollama_clients():
+    """Fixture to mock one ollama.Client per host, keyed by host URL."""
+    clients = {}
+
+    def make_client(host, **kwargs):
+        client = clients[host] = MagicMock()
+        client.generate.return_value = {"response": f"from {host}"}
+        return client
+
+    with patch("protocols.clients.ollama_client.ollama.Client", side_effect=make_client), \
+            patch("protocols.clients.ollama_client.ollama.AsyncClient"):
+        yield clients
+
+
+def test_pool_spreads_requests_and_aggregates_usage(mock_ollama_clients):
+    pool = OllamaPool(hosts, model="llama3", cold_penalty=0)
+    responses = {pool.generate("one two") for _ in range(3)}
+    assert responses == {f"from {host}" for host in hosts}
+    assert pool.usage_stats.prompt_tokens == 6
+    assert [stats["requests"] for stats in pool.host_stats()] == [1, 1, 1]
+
+
+def test_pool_prefers_warm_hosts(mock_ollama_clients):
+    pool = OllamaPool(hosts, model="llama3")
+    pool.hosts[1].model_loaded = True
+    for _ in range(3):
+        assert pool.generate("prompt") == f"from {hosts[1]}"
+
+
+def test_pool_least_outstanding(mock_ollama_clients):
+    pool = OllamaPool(hosts, model="llama3", cold_penalty=0)
+    pool.hosts[0].outstanding = 2
+    pool.hosts[1].outstanding = 1
+    assert pool.generate("prompt") == f"from {hosts[2]}"
+
+
+def test_pool_ejects_and_restores_failing_host(mock_ollama_clients, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("protocols.clients.ollama_pool.time.monotonic", lambda: clock[0])
+    pool = OllamaPool(hosts[:2], model="llama3", failure_threshold=2, ejection_time=10, cold_penalty=0)
+    broken = mock_ollama_clients[hosts[0]]
+    broken.generate.side_effect = ConnectionError("down")
+
+    # Failures fail over to the healthy host until the broken one is ejected
+    for _ in range(4):
+        assert pool.generate("prompt") == f"from {hosts[1]}"
+    assert broken.generate.call_count == 2
+    assert pool.host_stats()[0]["healthy"] is False
+
+    broken.generate.side_effect = None
+    clock[0] += 11
+    pool.hosts[1].outstanding = 1  # make the recovered host the preferred choice
+    assert pool.generate("prompt") == f"from {hosts[0]}"
+    assert pool.host_stats()[0]["healthy"] is True
+
+
+def test_pool_stream_fails_over_before_first_chunk(mock_ollama_clients):
+    pool = OllamaPool(hosts[:2], model="llama3", cold_penalty=0)
+    mock_ollama_clients[hosts[0]].generate.side_effect = ConnectionError("down")
+    mock_ollama_clients[hosts[1]].generate.return_value = iter([{"response": "a"}, {"response": "b"}])
+    assert "".join(pool.stream("prompt")) == "ab"
+    assert [stats["outstanding"] for stats in pool.host_stats()] == [0, 0]
+
+
+def test_pool_does_not_fail_over_on_request_errors(mock_ollama_clients):
+    pool = OllamaPool(hosts[:2], model="llama3", failure_threshold=1, cold_penalty=0)
+    for client in mock_ollama_clients.values():
+        client.generate.side_effect = ollama.ResponseError('{"error": "model not found"}', 404)
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="model not found"):
+            pool.generate("prompt")
+        with pytest.raises(RuntimeError, match="model not found"):
+            list(pool.stream("prompt"))
+
+    # Each request went to one host only, and no host was blamed
+    assert sum(client.generate.call_count for client in mock_ollama_clients.values()) == 6
+    assert [(h["failures"], h["healthy"], h["outstanding"]) for h in pool.host_stats()] == [(0, True, 0)] * 2
+
+
+@pytest.mark.parametrize("error", [
+    ollama.ResponseError("overloaded", 503),
+    httpx.ReadTimeout("timed out"),
+])
+def test_pool_fails_over_on_server_errors_and_timeouts(mock_ollama_clients, error):
+    pool = OllamaPool(hosts[:2], model="llama3", cold_penalty=0)
+    mock_ollama_clients[hosts[0]].generate.side_effect = error
+
+    assert pool.generate("prompt") == f"from {hosts[1]}"
+    assert [stats["failures"] for stats in pool.host_stats()] == [1, 0]
+
+
+def test_pool_raises_when_all_hosts_fail(mock_ollama_clients):
+    pool = OllamaPool(hosts[:2], model="llama3")
+    for client in mock_ollama_clients.values():
+        client.generate.side_effect = ConnectionError("down")
+    with pytest.raises(RuntimeError, match="All Ollama hosts failed"):
+        pool.generate("prompt")
+    with pytest.raises(ValueError):
+        OllamaPool([], model="llama3")
@@ -1,10 +1,22 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from protocols.clients import OpenAIClient
+from protocols.clients.openai_client import encoder_for_model
 
 openai_model = "gpt-4o"
 
 
+@pytest.fixture(autouse=True)
+def mock_encoder():
+    """Fixture to keep tokenization offline: one token per whitespace-separated word."""
+    encoder = MagicMock()
+    encoder.encode.side_effect = lambda text: text.split()
+    encoder.encode_batch.side_effect = lambda texts: [text.split() for text in texts]
+    with patch("protocols.clients.openai_client.encoder_for_model", return_value=encoder):
+        yield encoder
+
+
 @pytest.fixture
 def mock_openai_client():
     """Fixture to mock the OpenAI client with proper response structure."""
@@ -92,6 +104,7 @@ def test_openai_client_stream(openai_client, mock_openai_client):
     )
 
 
+@patch("protocols.clients.openai_client.encoder_for_model", encoder_for_model)
 @patch("protocols.clients.openai_client.tiktoken")
 def test_openai_client_get_num_tokens(mock_tiktoken, openai_client):
     """Test token counting with mocked tokenizer."""
@@ -100,9 +113,137 @@ def test_openai_client_get_num_tokens(mock_tiktoken, openai_client):
     # Configure mock tokenizer
     mock_encoder = MagicMock()
     mock_encoder.encode.return_value = [1, 2, 3, 4, 5, 6]
-    mock_tiktoken.get_encoding.return_value = mock_encoder
+    mock_encoder.encode_batch.return_value = [[1, 2], [1, 2, 3]]
+    mock_tiktoken.encoding_for_model.return_value = mock_encoder
+
+    encoder_for_model.cache_clear()
+    try:
+        # Test token count
+        text = "This is a test sentence."
+        assert openai_client.get_num_tokens(text) == 6
+        mock_encoder.encode.assert_called_once_with(text)
+        assert openai_client.count_tokens_batch(["a b", "c d e"]) == [2, 3]
+
+        # The encoder is resolved once per model and then cached
+        mock_tiktoken.encoding_for_model.assert_called_once_with(openai_model)
+    finally:
+        encoder_for_model.cache_clear()
+
+
+@patch("protocols.clients.openai_client.tiktoken")
+def test_encoder_for_model_fallbacks(mock_tiktoken):
+    """Unknown model names fall back to encoding names, then the default encoding."""
+    def get_encoding(name):
+        if name not in ("cl100k_base", "o200k_base"):
+            raise ValueError(name)
+        return MagicMock(name=name)
+
+    mock_tiktoken.encoding_for_model.side_effect = KeyError("unknown")
+    mock_tiktoken.get_encoding.side_effect = get_encoding
+    encoder_for_model.cache_clear()
+    try:
+        encoder_for_model("cl100k_base")
+        encoder_for_model("my-finetune")
+        requested = [call.args[0] for call in mock_tiktoken.get_encoding.call_args_list]
+        assert requested == ["cl100k_base", "my-finetune", "o200k_base"]
+    finally:
+        encoder_for_model.cache_clear()
+
+
+def test_openai_client_prefers_reported_usage(openai_client, mock_openai_client, mock_encoder):
+    """Server-reported usage is recorded without tokenizing locally."""
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock(message=MagicMock(content="four words of output"))]
+    mock_completion.usage = MagicMock(prompt_tokens=11, completion_tokens=4)
+    mock_openai_client.chat.completions.create.return_value = mock_completion
 
-    # Test token count
-    text = "This is a test sentence."
-    assert openai_client.get_num_tokens(text) == 6
-    mock_encoder.encode.assert_called_once_with(text)
+    openai_client.generate("Test prompt")
+    assert openai_client.usage_stats.prompt_tokens == 11
+    assert openai_client.usage_stats.completion_tokens == 4
+    mock_encoder.encode.assert_not_called()
+    mock_encoder.encode_batch.assert_not_called()
+
+
+def test_openai_client_stream_usage(mock_openai_client, mock_encoder):
+    """Streams use include_usage counts when enabled and tokenize otherwise."""
+    mock_chunks = [
+        MagicMock(choices=[MagicMock(delta=MagicMock(content="Chunk1 "))]),
+        MagicMock(choices=[MagicMock(delta=MagicMock(content="Chunk2"))]),
+        MagicMock(choices=[], usage=MagicMock(prompt_tokens=7, completion_tokens=2)),
+    ]
+    mock_openai_client.chat.completions.create.return_value = mock_chunks
+    client = OpenAIClient(model=openai_model, api_key="mock-api-key", stream_usage=True)
+
+    assert "".join(client.stream("Stream prompt")) == "Chunk1 Chunk2"
+    assert mock_openai_client.chat.completions.create.call_args.kwargs["stream_options"] == {"include_usage": True}
+    assert (client.usage_stats.prompt_tokens, client.usage_stats.completion_tokens) == (7, 2)
+    mock_encoder.encode_batch.assert_not_called()
+
+    mock_openai_client.chat.completions.create.return_value = mock_chunks[:2]
+    client = OpenAIClient(model=openai_model, api_key="mock-api-key")
+    assert "".join(client.stream("Stream prompt")) == "Chunk1 Chunk2"
+    assert (client.usage_stats.prompt_tokens, client.usage_stats.completion_tokens) == (2, 2)
+
+
+@pytest.fixture
+def mock_async_openai_client():
+    """Fixture to mock the async OpenAI client."""
+    with patch("protocols.clients.openai_client.openai.AsyncOpenAI") as mock_client:
+        mock_instance = MagicMock()
+        mock_instance.chat.completions.create = AsyncMock()
+        mock_client.return_value = mock_instance
+        yield mock_instance
+
+
+def test_openai_client_agenerate(mock_openai_client, mock_async_openai_client):
+    """Test agenerate() awaits the async client with the same parameters."""
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock(message=MagicMock(content="Async response"))]
+    mock_async_openai_client.chat.completions.create.return_value = mock_completion
+    client = OpenAIClient(model=openai_model, temperature=0.7, api_key="mock-api-key")
+
+    assert asyncio.run(client.agenerate("Test prompt")) == "Async response"
+    mock_openai_client.chat.completions.create.assert_not_called()
+    mock_async_openai_client.chat.completions.create.assert_awaited_once_with(
+        model=openai_model,
+        messages=[{"role": "user", "content": "Test prompt"}],
+        temperature=0.7,
+        max_tokens=None,
+        top_p=1.0,
+        frequency_penalty=0.0,
+        presence_penalty=0.0,
+        stop=None
+    )
+
+
+def test_openai_client_astream(mock_openai_client, mock_async_openai_client):
+    """Test astream() skips empty deltas from the async stream."""
+    async def chunks():
+        for text in ("Chunk1 ", None, "Chunk2"):
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=text))])
+
+    mock_async_openai_client.chat.completions.create.return_value = chunks()
+    client = OpenAIClient(model=openai_model, api_key="mock-api-key")
+
+    async def collect():
+        return [chunk async for chunk in client.astream("Stream prompt")]
+
+    assert "".join(asyncio.run(collect())) == "Chunk1 Chunk2"
+
+
+def test_openai_client_does_not_cache_empty_content(mock_openai_client, tmp_path):
+    """Replies without text (tool calls, content filter) are returned but not cached."""
+    from protocols.cache import SQLiteCache
+
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock(message=MagicMock(content=None))]
+    mock_completion.usage = MagicMock(prompt_tokens=3, completion_tokens=0)
+    mock_openai_client.chat.completions.create.return_value = mock_completion
+    cache = SQLiteCache(tmp_path / "responses.db")
+    with patch("protocols.clients.openai_client.openai.AsyncOpenAI") as async_cls:
+        async_cls.return_value.chat.completions.create = AsyncMock(return_value=mock_completion)
+        client = OpenAIClient(model=openai_model, temperature=0.0, api_key="mock-api-key", cache=cache)
+        assert client.generate("call a tool") is None
+        assert asyncio.run(client.agenerate("call a tool")) is None
+    assert cache.get(client._response_cache_key("call a tool")) is None
+    cache.close()
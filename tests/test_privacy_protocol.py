@@ -0,0 +1,458 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+from protocols.clients import FakeLLM, supervisor_script, worker_script
+from protocols.merkle import leaf_digest
+from protocols.privacy_protocol import PrivacyProtocol_v2, _BoundedLLM
+
+
+class ConcurrencyTrackingLLM:
+    """Minimal LLM stand-in recording peak concurrent generate() calls."""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return prompt
+
+
+@pytest.fixture
+def protocol():
+    return PrivacyProtocol_v2(
+        local_llm=ConcurrencyTrackingLLM(),
+        remote_llm=ConcurrencyTrackingLLM(),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+    )
+
+
+def test_process_batch_reports_per_item_errors(protocol):
+    """A failing item yields an error result without aborting the batch."""
+    def fake_process_query(self, task, context, risk_threshold="medium"):
+        if task == "bad":
+            raise ValueError("boom")
+        return {"final_output": task}
+
+    items = [("good-1", ["a"]), ("bad", ["b"]), ("good-2", ["c"])]
+    with patch.object(PrivacyProtocol_v2, "process_query", fake_process_query):
+        results = sorted(protocol.process_batch(items, max_workers=2), key=lambda r: r.index)
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[0].result == {"final_output": "good-1"}
+    assert results[1].error == "ValueError: boom"
+
+
+def test_process_batch_bounds_llm_concurrency(protocol):
+    """Local and remote LLMs are limited independently of the worker count."""
+    def fake_process_query(self, task, context, risk_threshold="medium"):
+        self.local_llm.generate(task)
+        return {"final_output": self.remote_llm.generate(task)}
+
+    items = [(f"task-{i}", []) for i in range(12)]
+    with patch.object(PrivacyProtocol_v2, "process_query", fake_process_query):
+        results = list(protocol.process_batch(
+            items, max_workers=6, local_concurrency=1, remote_concurrency=3
+        ))
+
+    assert len(results) == 12 and all(r.ok for r in results)
+    assert protocol.local_llm.peak == 1
+    assert 1 < protocol.remote_llm.peak <= 3
+
+
+def test_process_batch_runs_real_queries():
+    """process_batch drives the real process_query end to end, not a patched one."""
+    protocol = PrivacyProtocol_v2(
+        local_llm=FakeLLM(responses=worker_script(words=4)),
+        remote_llm=FakeLLM(responses=supervisor_script(finalize_at=2)),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+    )
+    items = [(f"summarise {i}", [f"LDL {100 + i}"]) for i in range(6)]
+    results = sorted(protocol.process_batch(items, max_workers=3, local_concurrency=2), key=lambda r: r.index)
+
+    assert [r.error for r in results] == [None] * 6
+    assert {r.result["processing_rounds"] for r in results} == {2}
+    assert {r.result["termination_reason"] for r in results} == {"final_decision"}
+    assert all(r.result["final_output"] == {"verified_response": {"content": "aggregated summary"}} for r in results)
+    assert len({r.result["audit_trail"]["context_hash"] for r in results}) == 6
+    # Two rounds of (directive, validation) plus the final call per item
+    assert protocol.remote_llm.calls == 6 * 5
+
+
+class SessionTrackingLLM(ConcurrencyTrackingLLM):
+    """Concurrency tracker whose sessions count towards the same peak."""
+
+    def session(self):
+        llm = self
+
+        class Session:
+            started = False
+
+            @property
+            def stats(self):
+                from protocols.clients import PrefillStats
+                return PrefillStats()
+
+            def generate(self, prompt):
+                return llm.generate(prompt)
+
+        return Session()
+
+    def count_tokens_batch(self, texts):
+        return [len(text.split()) for text in texts]
+
+
+def test_process_batch_bounds_worker_session_calls():
+    """Session calls go through the same local_concurrency limit."""
+    local = SessionTrackingLLM(delay=0.01)
+    protocol = PrivacyProtocol_v2(
+        local_llm=local,
+        remote_llm=ScriptedSupervisor(finalize_at=1),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        worker_sessions=True,
+    )
+    items = [(f"task-{i}", ["LDL 120"]) for i in range(8)]
+    results = list(protocol.process_batch(items, max_workers=8, local_concurrency=1))
+
+    assert len(results) == 8 and all(r.ok for r in results)
+    assert all("prefill" in r.result for r in results)
+    assert local.peak == 1
+
+
+def test_bounded_llm_async_calls_share_the_limit():
+    local = ConcurrencyTrackingLLM(delay=0.01)
+
+    async def agenerate(prompt):
+        return await asyncio.get_running_loop().run_in_executor(None, local.generate, prompt)
+
+    async def astream(prompt):
+        yield await agenerate(prompt)
+
+    local.agenerate = agenerate
+    local.astream = astream
+    bounded = _BoundedLLM(local, threading.BoundedSemaphore(1))
+
+    async def run():
+        async def streamed(prompt):
+            return "".join([chunk async for chunk in bounded.astream(prompt)])
+        return await asyncio.gather(*(bounded.agenerate(f"p{i}") for i in range(4)), streamed("s"))
+
+    assert asyncio.run(run()) == ["p0", "p1", "p2", "p3", "s"]
+    assert local.peak == 1
+    assert not hasattr(bounded, "session")
+
+
+def test_process_batch_rejects_invalid_worker_count(protocol):
+    with pytest.raises(ValueError):
+        list(protocol.process_batch([], max_workers=0))
+
+
+def test_worker_fans_out_over_chunks_in_parallel():
+    """Each chunk gets its own worker call; outputs merge in context order."""
+    local = ConcurrencyTrackingLLM(delay=0.05)
+    local.count_tokens_batch = lambda texts: [len(text.split()) for text in texts]
+    protocol = PrivacyProtocol_v2(
+        local_llm=local,
+        remote_llm=ConcurrencyTrackingLLM(),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        chunk_tokens=3,
+    )
+
+    chunks = protocol._chunk_context(["a b c", "d e f", "g h i"])
+    merged = protocol._run_worker(1, "summarise", chunks)
+
+    assert len(chunks) == 3
+    assert local.peak == 3
+    assert merged.index("(part 1/3): a b c") < merged.index("(part 3/3): g h i")
+
+
+def test_worker_cache_only_reruns_changed_chunks():
+    """Re-running an edited context sends only the edited chunk to the worker."""
+    from protocols.cache import MemoryCache
+
+    local = ConcurrencyTrackingLLM(delay=0)
+    local.count_tokens_batch = lambda texts: [len(text.split()) for text in texts]
+    calls = []
+    generate = local.generate
+    local.generate = lambda prompt: calls.append(prompt) or generate(prompt)
+    protocol = PrivacyProtocol_v2(
+        local_llm=local,
+        remote_llm=ConcurrencyTrackingLLM(),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        chunk_tokens=3,
+        worker_cache=MemoryCache(),
+    )
+
+    first = protocol._run_worker(1, "summarise", protocol._chunk_context(["a b c", "d e f", "g h i"]))
+    calls.clear()
+    second = protocol._run_worker(1, "summarise", protocol._chunk_context(["a b c", "d E f", "g h i"]))
+
+    assert len(calls) == 1 and "d E f" in calls[0]
+    assert first.replace("d e f", "d E f") == second
+
+
+def test_worker_cache_is_not_shared_across_privacy_configurations():
+    """A shared cache never serves outputs produced under other metadata or settings."""
+    from protocols.cache import MemoryCache
+
+    cache = MemoryCache()
+    calls = []
+
+    def make_protocol(data_types, temperature=0.0):
+        local = ConcurrencyTrackingLLM(delay=0)
+        local.count_tokens_batch = lambda texts: [len(text.split()) for text in texts]
+        local.sampling_params = lambda: {"temperature": temperature}
+        generate = local.generate
+        local.generate = lambda prompt: calls.append(prompt) or generate(prompt)
+        return PrivacyProtocol_v2(
+            local_llm=local,
+            remote_llm=ConcurrencyTrackingLLM(),
+            doc_metadata="Test Record",
+            data_types=data_types,
+            worker_cache=cache,
+        )
+
+    medical = make_protocol(["medical"])
+    medical._run_worker(1, "summarise", ["a b c"], system_prompt="Authorized Data Types: ['medical']")
+    medical._run_worker(1, "summarise", ["a b c"], system_prompt="Authorized Data Types: ['medical']")
+    assert len(calls) == 1
+
+    financial = make_protocol(["financial"])
+    financial._run_worker(1, "summarise", ["a b c"], system_prompt="Authorized Data Types: ['financial']")
+    assert len(calls) == 2
+
+    sampled = make_protocol(["medical"], temperature=0.9)
+    sampled._run_worker(1, "summarise", ["a b c"], system_prompt="Authorized Data Types: ['medical']")
+    assert len(calls) == 3
+
+    # The same chunk in another position has a different prompt
+    medical._run_worker(1, "summarise", ["x y z", "a b c"], system_prompt="Authorized Data Types: ['medical']")
+    assert len(calls) == 5
+
+
+def test_file_context_is_spilled_with_same_digests_as_list(tmp_path):
+    """File input chunks and hashes exactly like the equivalent in-memory list."""
+    local = ConcurrencyTrackingLLM(delay=0)
+    local.count_tokens_batch = lambda texts: [len(text.split()) for text in texts]
+    protocol = PrivacyProtocol_v2(
+        local_llm=local,
+        remote_llm=ConcurrencyTrackingLLM(),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        chunk_tokens=3,
+    )
+    documents = ["a b c", "d e f", "g h i"]
+    path = tmp_path / "context.txt"
+    path.write_text("\n\n".join(documents))
+
+    with protocol._prepare_context(path) as spilled, protocol._prepare_context(documents) as listed:
+        assert list(spilled) == list(listed)
+        assert spilled.digests == [leaf_digest(chunk) for chunk in listed]
+        assert protocol._run_worker(1, "go", spilled) == protocol._run_worker(1, "go", listed)
+
+
+def test_supervisor_output_is_cut_after_its_json_object():
+    """With early_stop_json the supervisor stream stops once the object closes."""
+    remote = ConcurrencyTrackingLLM(delay=0)
+    consumed = []
+
+    def stream(prompt):
+        for chunk in ['{"directive": ', '{"objective": "x"}}', " Hope this helps!"]:
+            consumed.append(chunk)
+            yield chunk
+
+    remote.stream = stream
+    protocol = PrivacyProtocol_v2(
+        local_llm=ConcurrencyTrackingLLM(),
+        remote_llm=remote,
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        early_stop_json=True,
+    )
+
+    assert protocol._supervise("prompt") == '{"directive": {"objective": "x"}}'
+    assert len(consumed) == 2
+
+
+class ScriptedSupervisor:
+    """Remote LLM stand-in that finalizes at a given round."""
+
+    def __init__(self, finalize_at: int, delay: float = 0.0):
+        self.finalize_at = finalize_at
+        self.delay = delay
+        self.prompts = []
+        self.validations = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        time.sleep(self.delay)
+        with self._lock:
+            self.prompts.append(prompt)
+        if prompt.startswith("Privacy-First Task Orchestration"):
+            return '{"directive": {"objective": "summarise"}}'
+        if prompt.startswith("Iterative Analysis Protocol"):
+            with self._lock:
+                self.validations += 1
+                kind = "finalize" if self.validations >= self.finalize_at else "clarify"
+            return f'{{"resolution": {{"type": "{kind}", "confidence_score": 0.9}}}}'
+        return '{"verified_response": {"content": "done"}}'
+
+
+def scripted_protocol(finalize_at: int, speculative: bool, delay: float = 0.0, max_rounds: int = 3):
+    return PrivacyProtocol_v2(
+        local_llm=ConcurrencyTrackingLLM(delay=0),
+        remote_llm=ScriptedSupervisor(finalize_at, delay),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        max_rounds=max_rounds,
+        speculative=speculative,
+    )
+
+
+def test_process_query_runs_until_finalize():
+    protocol = scripted_protocol(finalize_at=2, speculative=False)
+    result = protocol.process_query("summarise", ["LDL 120"])
+
+    assert result["processing_rounds"] == 2
+    assert result["termination_reason"] == "final_decision"
+    assert result["final_output"] == {"verified_response": {"content": "done"}}
+    assert [entry["decision"].decision_type for entry in result["processing_history"]] == ["clarify", "finalize"]
+    assert "speculation" not in result
+
+
+def test_speculative_rounds_report_wasted_directive():
+    protocol = scripted_protocol(finalize_at=2, speculative=True, delay=0.02)
+    result = protocol.process_query("summarise", ["LDL 120"])
+
+    assert result["processing_rounds"] == 2
+    # Directive 3 was requested during round 2's validation and then discarded
+    assert result["speculation"] == {
+        "speculative_calls": 2,
+        "wasted_calls": 1,
+        "remote_calls": 6,
+        "wasted_call_ratio": 1 / 6,
+    }
+    assert protocol.speculation_stats.wasted_calls == 1
+
+
+def test_speculation_overlaps_directive_with_validation():
+    protocol = scripted_protocol(finalize_at=3, speculative=True, delay=0.05)
+    supervisor = protocol.remote_llm
+    calls = []
+
+    def generate(prompt):
+        start = time.perf_counter()
+        response = ScriptedSupervisor.generate(supervisor, prompt)
+        calls.append((prompt.split()[0], start, time.perf_counter()))
+        return response
+
+    supervisor.generate = generate
+    result = protocol.process_query("summarise", ["LDL 120"])
+
+    # 3 rounds end at max_rounds, so nothing is speculated past the end
+    assert result["speculation"]["wasted_calls"] == 0
+    # Checked by ordering rather than wall time: some directive call was in
+    # flight while a validation call was
+    directives = [(start, end) for kind, start, end in calls if kind == "Privacy-First"]
+    validations = [(start, end) for kind, start, end in calls if kind == "Iterative"]
+    assert any(
+        d_start < v_end and v_start < d_end
+        for d_start, d_end in directives
+        for v_start, v_end in validations
+    )
+
+
+class SessionLLM:
+    """Local LLM stand-in whose sessions remember the prompts they were sent."""
+
+    def __init__(self):
+        self.sessions = []
+
+    def session(self):
+        llm = self
+
+        class Session:
+            def __init__(self):
+                self.prompts = []
+                self.started = False
+                llm.sessions.append(self)
+
+            @property
+            def stats(self):
+                from protocols.clients import PrefillStats
+                stats = PrefillStats()
+                for index, prompt in enumerate(self.prompts):
+                    stats.add(len(prompt.split()), 10 * index)
+                return stats
+
+            def generate(self, prompt):
+                self.prompts.append(prompt)
+                self.started = True
+                return f"Round {len(self.prompts)} summary"
+
+        return Session()
+
+    def count_tokens_batch(self, texts):
+        return [len(text.split()) for text in texts]
+
+
+def test_worker_sessions_send_context_only_once():
+    protocol = PrivacyProtocol_v2(
+        local_llm=SessionLLM(),
+        remote_llm=ScriptedSupervisor(finalize_at=3),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        chunk_tokens=3,
+        worker_sessions=True,
+    )
+    result = protocol.process_query("summarise", ["a b c\n\nd e f"])
+
+    sessions = protocol.local_llm.sessions
+    assert len(sessions) == 2
+    for session in sessions:
+        first, *later = session.prompts
+        assert "Context (part" in first
+        assert later == [
+            'Round 2 Directive: {"directive": {"objective": "summarise"}}',
+            'Round 3 Directive: {"directive": {"objective": "summarise"}}',
+        ]
+    assert result["prefill"]["reused_tokens"] == 2 * (10 + 20)
+    assert result["prefill"]["calls"] == 6
+
+
+def test_worker_sessions_bypass_worker_cache():
+    """Session replies depend on earlier turns, so they are neither cached nor served from cache."""
+    from protocols.cache import MemoryCache
+
+    cache = MemoryCache()
+    protocol = PrivacyProtocol_v2(
+        local_llm=SessionLLM(),
+        remote_llm=ScriptedSupervisor(finalize_at=2),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        worker_cache=cache,
+        worker_sessions=True,
+    )
+    protocol.process_query("summarise", ["a b c"])
+    protocol.remote_llm = ScriptedSupervisor(finalize_at=2)
+    protocol.process_query("summarise", ["a b c"])
+
+    sessions = protocol.local_llm.sessions
+    assert len(sessions) == 2
+    assert all(len(session.prompts) == 2 for session in sessions)
+    assert len(cache) == 0
@@ -0,0 +1,133 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import MagicMock, patch
+from protocols.clients import OpenAIClient
+from protocols.ratelimit import RateLimiter, RetryPolicy, TokenBucket, retry_after
+
+
+def api_error(status: int, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    error_cls = openai.RateLimitError if status == 429 else openai.InternalServerError
+    if status < 500 and status != 429:
+        error_cls = openai.BadRequestError
+    return error_cls("error", response=response, body=None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; sleeping advances it instead of blocking."""
+    now = [1000.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr("protocols.ratelimit.time.monotonic", lambda: now[0])
+    monkeypatch.setattr("protocols.ratelimit.time.sleep", sleep)
+    monkeypatch.setattr("protocols.clients.openai_client.time.sleep", sleep)
+    return sleeps
+
+
+def test_token_bucket_reservations(clock):
+    bucket = TokenBucket(capacity=60, refill_per_second=1)
+    assert bucket.reserve(50) == 0
+    assert bucket.reserve(20) == pytest.approx(10)
+    bucket.credit(10)
+    assert bucket.reserve(0) == 0
+
+
+def test_rate_limiter_enforces_rpm_and_tpm(clock):
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=600)
+    for _ in range(3):
+        limiter.acquire(100)
+    assert clock == [pytest.approx(30)]  # third request waits for the RPM bucket
+    limiter.acquire(500)
+    assert clock[-1] == pytest.approx(30)  # 300 tokens short at 10 tokens/s
+
+
+def test_rate_limiter_pause(clock):
+    limiter = RateLimiter(tokens_per_minute=600)
+    limiter.pause(5)
+    assert limiter.reserve(0) == pytest.approx(5)
+
+
+def test_reconcile_credits_only_what_was_charged(clock):
+    limiter = RateLimiter(tokens_per_minute=600)
+    # An estimate larger than the bucket only ever takes the bucket's capacity
+    limiter.acquire(1000)
+    limiter.reconcile(1000, 400)
+    assert limiter.tokens._tokens == pytest.approx(200)
+
+
+def test_retry_after_headers():
+    assert retry_after(api_error(429, {"retry-after": "3"})) == 3
+    assert retry_after(api_error(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(ValueError()) is None
+    assert retry_after(api_error(429, {"retry-after": "soon"})) is None
+    policy = RetryPolicy(base_delay=1, max_delay=8)
+    assert all(0 <= policy.delay(attempt) <= 8 for attempt in range(10))
+    assert policy.delay(0, api_error(429, {"retry-after": "20"})) == 8
+
+
+def test_openai_client_retries_transient_errors(clock):
+    completion = MagicMock()
+    completion.choices = [MagicMock(message=MagicMock(content="ok"))]
+    completion.usage = MagicMock(prompt_tokens=5, completion_tokens=1)
+    with patch("protocols.clients.openai_client.openai.OpenAI") as openai_cls, \
+            patch("protocols.clients.openai_client.openai.AsyncOpenAI"):
+        create = openai_cls.return_value.chat.completions.create
+        create.side_effect = [api_error(429, {"retry-after": "2"}), api_error(503), completion]
+        limiter = RateLimiter(requests_per_minute=600)
+        client = OpenAIClient(api_key="key", rate_limiter=limiter, retry_policy=RetryPolicy(max_retries=3))
+
+        assert client.generate("prompt") == "ok"
+        assert create.call_count == 3
+        assert clock[0] == 2  # honoured Retry-After
+        assert openai_cls.call_args.kwargs["max_retries"] == 0
+
+        create.side_effect = [api_error(400)]
+        with pytest.raises(RuntimeError):
+            client.generate("prompt")
+        assert create.call_count == 4
+
+
+def test_openai_client_charges_estimated_tokens(clock):
+    completion = MagicMock()
+    completion.choices = [MagicMock(message=MagicMock(content="ok"))]
+    completion.usage = MagicMock(prompt_tokens=10, completion_tokens=2)
+    with patch("protocols.clients.openai_client.openai.OpenAI") as openai_cls, \
+            patch("protocols.clients.openai_client.openai.AsyncOpenAI"), \
+            patch.object(OpenAIClient, "get_num_tokens", return_value=10):
+        openai_cls.return_value.chat.completions.create.return_value = completion
+        limiter = RateLimiter(tokens_per_minute=120)
+        client = OpenAIClient(api_key="key", max_tokens=50, rate_limiter=limiter)
+
+        client.generate("prompt")
+        # 60 estimated tokens were reserved, then 48 refunded against real usage
+        assert limiter.tokens.reserve(0) == 0
+        assert limiter.tokens._tokens == pytest.approx(108)
+
+
+def test_openai_client_refunds_estimate_when_giving_up(clock):
+    with patch("protocols.clients.openai_client.openai.OpenAI") as openai_cls, \
+            patch("protocols.clients.openai_client.openai.AsyncOpenAI"), \
+            patch.object(OpenAIClient, "get_num_tokens", return_value=10):
+        create = openai_cls.return_value.chat.completions.create
+        limiter = RateLimiter(tokens_per_minute=120)
+        client = OpenAIClient(
+            api_key="key", max_tokens=50, rate_limiter=limiter, retry_policy=RetryPolicy(max_retries=1)
+        )
+
+        create.side_effect = [api_error(400)]
+        with pytest.raises(RuntimeError):
+            client.generate("prompt")
+        assert limiter.tokens._tokens == pytest.approx(120)
+
+        create.side_effect = [api_error(503), api_error(503)]
+        with pytest.raises(RuntimeError):
+            client.generate("prompt")
+        assert create.call_count == 3
+        assert limiter.tokens._tokens == pytest.approx(120)
@@ -0,0 +1,134 @@
+import asyncio
+import random
+
+import pytest
+from unittest.mock import MagicMock
+from protocols.base import BaseLLM
+from protocols.redaction import (
+    Detector,
+    RedactionEngine,
+    default_engine,
+    iban_valid,
+    luhn_valid,
+    redact_stream,
+)
+from protocols.utils import SecurityUtils
+
+
+@pytest.mark.parametrize("text, detector", [
+    ("SSN 123-45-6789 on file", "ssn"),
+    ("card 4111 1111 1111 1111 expires", "pan"),
+    ("card 4111-1111-1111-1111 expires", "pan"),
+    ("iban GB82 WEST 1234 5698 7654 32 ok", "iban"),
+    ("mail john.doe@example.org today", "email"),
+    ("call (555) 123-4567 now", "phone"),
+    ("call +1 555-123-4567 now", "phone"),
+    ("record MRN: 00123456 reviewed", "mrn"),
+])
+def test_default_detectors(text, detector):
+    """Each default detector redacts its pattern and reports the span."""
+    result = default_engine().redact(text)
+    assert [span.detector for span in result.spans] == [detector]
+    span = result.spans[0]
+    assert "[REDACTED]" in result.text
+    assert result.text == text[:span.start] + "[REDACTED]" + text[span.end:]
+
+
+def test_validators_reject_invalid_numbers():
+    """Luhn and mod-97 checks keep lookalike numbers intact."""
+    assert luhn_valid("4111111111111111")
+    assert not luhn_valid("4111111111111112")
+    assert iban_valid("GB82WEST12345698765432")
+    assert not iban_valid("GB00WEST12345698765432")
+
+    text = "lab ids 4111111111111112 and GB00 WEST 1234 5698 7654 32"
+    assert default_engine().redact(text).text == text
+
+
+def test_multiple_spans_single_pass():
+    text = "SSN 123-45-6789, email a@b.io, card 4111111111111111."
+    result = default_engine().redact(text)
+    assert [span.detector for span in result.spans] == ["ssn", "email", "pan"]
+    assert result.text == "SSN [REDACTED], email [REDACTED], card [REDACTED]."
+
+
+def test_custom_detectors():
+    engine = RedactionEngine([Detector("project", r"\bPROJECT-\d+\b", replacement="<project>")])
+    result = engine.redact("see PROJECT-42 and 123-45-6789")
+    assert result.text == "see <project> and 123-45-6789"
+    with pytest.raises(ValueError):
+        RedactionEngine([])
+
+
+def test_sanitize_output_engine_is_opt_in():
+    text = "SSN 123-45-6789, card 4111 1111 1111 1111, mail a@b.io"
+    assert SecurityUtils.sanitize_output(text) == "SSN [REDACTED], card [REDACTED], mail a@b.io"
+    assert SecurityUtils.sanitize_output(text, engine=default_engine()) == (
+        "SSN [REDACTED], card [REDACTED], mail [REDACTED]"
+    )
+    assert SecurityUtils.redact("nothing here").redacted is False
+
+
+def test_text_without_triggers_is_not_scanned():
+    engine = RedactionEngine()
+    engine._compiled.clear()
+    text = '{"resolution": {"type": "clarify", "confidence_score": 0.9}}'
+    assert engine.redact(text).text == text
+    assert list(engine.scan(text)) == []
+    assert not engine._compiled
+    # One detector without a trigger disables the pre-filter
+    assert RedactionEngine([Detector("any", r"x")]).redact("x").redacted
+
+
+def test_stream_redactor_catches_split_pii():
+    """PII split across chunks is redacted and never partially emitted."""
+    chunks = ["Patient SSN is 123-4", "5-6789 and card 4111 1111 ", "1111 1111 on file"]
+    emitted = list(redact_stream(chunks))
+    assert "".join(emitted) == "Patient SSN is [REDACTED] and card [REDACTED] on file"
+    assert not any("123" in chunk or "4111" in chunk for chunk in emitted)
+
+
+def test_stream_redactor_emits_prose_early():
+    redactor = default_engine().stream()
+    assert redactor.feed("Hello there, the patient ") == "Hello there, the patient"
+    assert redactor.feed("SSN is 123-4") == " SSN is"
+    assert redactor.feed("5-6789 and") == " [REDACTED] "
+    assert redactor.close() == "and"
+    assert [(s.detector, s.start, s.end) for s in redactor.spans] == [("ssn", 32, 43)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stream_redactor_matches_single_pass(seed):
+    """Any chunking of the input yields the same text as redact()."""
+    rng = random.Random(seed)
+    pieces = ["SSN 123-45-6789 ", "4111 1111 1111 1111 ", "4111111111111112 ",
+              "a.b@example.org ", "(555) 123-4567 ", "MRN: 00123456 ", "note 12 34 "]
+    text = "".join(rng.choice(pieces) for _ in range(30))
+    cuts = sorted(rng.sample(range(len(text)), 40))
+    chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+    assert "".join(redact_stream(chunks)) == default_engine().redact(text).text
+
+
+def test_stream_redactor_without_bounds_buffers_until_close():
+    engine = RedactionEngine([Detector("project", r"\bPROJECT-\d+\b")])
+    redactor = engine.stream()
+    assert redactor.feed("see PROJECT-4") == ""
+    assert redactor.feed("2 now") == ""
+    assert redactor.close() == "see [REDACTED] now"
+
+
+def test_llm_stream_redacted():
+    llm = MagicMock(spec=BaseLLM)
+    llm.stream.return_value = iter(["SSN 123-", "45-6789."])
+    assert "".join(BaseLLM.stream_redacted(llm, "prompt")) == "SSN [REDACTED]."
+
+    async def chunks():
+        for chunk in ["SSN 123-", "45-6789."]:
+            yield chunk
+
+    llm.astream.return_value = chunks()
+
+    async def collect():
+        return [chunk async for chunk in BaseLLM.astream_redacted(llm, "prompt")]
+
+    assert "".join(asyncio.run(collect())) == "SSN [REDACTED]."
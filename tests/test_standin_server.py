@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from protocols.clients import OllamaClient, OpenAIClient
+from protocols.ratelimit import RetryPolicy
+from protocols.standin_server import Cassette, StandInServer
+
+
+def answer(prompt: str) -> str:
+    return f"echo {prompt}"
+
+
+@pytest.fixture
+def server():
+    with StandInServer(responder=answer) as server:
+        yield server
+
+
+def openai_client(server, **kwargs):
+    # With server-reported usage no tiktoken encoding has to be downloaded
+    return OpenAIClient(
+        model="gpt-4o", api_key="test", base_url=server.openai_base_url, stream_usage=True, **kwargs
+    )
+
+
+def test_openai_generate_and_stream_with_usage(server):
+    client = openai_client(server)
+
+    assert client.generate("hello there") == "echo hello there"
+    assert "".join(client.stream("hello there")) == "echo hello there"
+    assert client.usage_stats.prompt_tokens == 4
+    assert client.usage_stats.completion_tokens == 6
+    assert server.requests == 2
+
+
+def test_openai_async_stream(server):
+    client = openai_client(server)
+
+    async def run():
+        return "".join([chunk async for chunk in client.astream("async prompt")])
+
+    assert asyncio.run(run()) == "echo async prompt"
+
+
+def test_ollama_generate_and_stream(server):
+    client = OllamaClient(model="llama3.2", base_url=server.url)
+
+    assert client.generate("hi") == "echo hi"
+    assert "".join(client.stream("hi")) == "echo hi"
+    assert client.usage_stats.prompt_tokens == 2
+    assert client.usage_stats.completion_tokens == 4
+
+
+def test_injected_rate_limits_are_retried():
+    with StandInServer(responder=answer, fail_first=2) as server:
+        client = openai_client(server, retry_policy=RetryPolicy(max_retries=3, base_delay=0))
+
+        assert client.generate("retry me") == "echo retry me"
+        assert server.requests == 3
+        assert server.errors_injected == 2
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    with StandInServer(responder=answer) as upstream:
+        with StandInServer(mode="record", cassette=path, upstream=upstream.url) as recorder:
+            client = openai_client(recorder)
+            assert client.generate("recorded") == "echo recorded"
+            assert "".join(client.stream("streamed")) == "echo streamed"
+            ollama = OllamaClient(model="llama3.2", base_url=recorder.url)
+            assert ollama.generate("local") == "echo local"
+
+    assert len(Cassette(path)) == 3
+    with open(path) as f:
+        assert json.loads(f.readline())["path"] == "/v1/chat/completions"
+
+    # The replay server has no responder of its own to fall back on
+    with StandInServer(mode="replay", cassette=path, responder=lambda prompt: "wrong") as replay:
+        client = openai_client(replay)
+        assert client.generate("recorded") == "echo recorded"
+        assert "".join(client.stream("streamed")) == "echo streamed"
+        assert OllamaClient(model="llama3.2", base_url=replay.url).generate("local") == "echo local"
+        with pytest.raises(RuntimeError):
+            client.generate("never recorded")
+
+
+def test_record_answers_502_when_upstream_is_down(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    with StandInServer(responder=answer) as upstream:
+        dead_url = upstream.url
+    with StandInServer(mode="record", cassette=path, upstream=dead_url) as recorder:
+        response = httpx.post(f"{recorder.openai_base_url}/chat/completions", json={"messages": []})
+
+    assert response.status_code == 502
+    assert "Upstream request failed" in response.json()["error"]["message"]
+    assert len(Cassette(path)) == 0
+
+
+def test_mode_requirements_validated():
+    with pytest.raises(ValueError):
+        StandInServer(mode="replay")
+    with pytest.raises(ValueError):
+        StandInServer(mode="record", cassette="unused.jsonl")
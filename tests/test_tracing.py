@@ -0,0 +1,154 @@
+import json
+
+import pytest
+from unittest.mock import MagicMock, patch
+from protocols import tracing
+from protocols.clients import OllamaClient
+from protocols.tracing import InMemorySink, JSONLSink, LatencyHistogram, OpenTelemetrySink
+from tests.test_privacy_protocol import scripted_protocol
+
+
+@pytest.fixture
+def sink():
+    """Enable tracing into an in-memory sink for the duration of a test."""
+    sink = InMemorySink()
+    tracing.enable([sink])
+    yield sink
+    tracing.disable()
+
+
+@pytest.fixture
+def ollama_client():
+    with patch("protocols.clients.ollama_client.ollama.Client") as mock_client:
+        mock_instance = MagicMock()
+        mock_client.return_value = mock_instance
+        mock_instance.generate.return_value = {
+            "response": "ok", "prompt_eval_count": 12, "eval_count": 3
+        }
+        yield OllamaClient(model="llama3.2", base_url="http://mock-url:11434"), mock_instance
+
+
+def test_histogram_percentiles_within_bucket_precision():
+    histogram = LatencyHistogram()
+    for value in range(1, 10001):
+        histogram.record(value)
+
+    assert histogram.count == 10000
+    assert histogram.min == 1 and histogram.max == 10000
+    for percentile in (50, 90, 99):
+        expected = 10000 * percentile / 100
+        assert abs(histogram.percentile(percentile) - expected) / expected < 0.01
+
+
+def test_histogram_merge():
+    left, right = LatencyHistogram(), LatencyHistogram()
+    left.record(5)
+    right.record(5000)
+    left.merge(right)
+
+    assert left.count == 2
+    assert left.max == 5000
+    assert left.percentile(50) == 5
+
+
+def test_disabled_tracing_returns_shared_noop():
+    assert tracing.get_tracer() is None
+    assert tracing.span("anything") is tracing.NOOP_SPAN
+
+
+def test_generate_span_carries_tokens_and_rolls_up(sink, ollama_client):
+    client, _ = ollama_client
+    with tracing.span("stage") as stage:
+        client.generate("hello")
+        client.generate("again")
+
+    calls = sink.find("llm.generate")
+    assert len(calls) == 2
+    assert calls[0].parent_id == stage.span_id
+    assert calls[0].trace_id == stage.trace_id
+    assert calls[0].attributes["model"] == "llama3.2"
+    assert calls[0].attributes["prompt_tokens"] == 12
+    assert stage.attributes["prompt_tokens"] == 24
+    assert stage.attributes["completion_tokens"] == 6
+
+    summary = tracing.get_tracer().summary()
+    assert summary["llm.generate"]["latency_us"]["count"] == 2
+    assert summary["llm.generate"]["completion_tokens"]["p50"] == 3
+
+
+def test_stream_span_does_not_leak_across_yields(sink, ollama_client):
+    client, mock_instance = ollama_client
+    mock_instance.generate.return_value = iter([{"response": "a"}, {"response": "b"}])
+
+    stream = client.stream("prompt")
+    assert next(stream) == "a"
+    # The stream's span is not current while the caller holds a chunk
+    with tracing.span("caller") as caller:
+        assert caller.parent_id is None
+    assert list(stream) == ["b"]
+
+    (span,) = sink.find("llm.stream")
+    assert span.error is None
+    assert span.attributes["completion_tokens"] > 0
+
+
+def test_failed_call_records_error(sink, ollama_client):
+    client, mock_instance = ollama_client
+    mock_instance.generate.side_effect = Exception("boom")
+
+    with pytest.raises(RuntimeError):
+        client.generate("prompt")
+
+    (span,) = sink.find("llm.generate")
+    assert "boom" in span.error
+
+
+def test_protocol_stage_spans_share_one_trace(sink):
+    protocol = scripted_protocol(finalize_at=2, speculative=True)
+    protocol.chunk_tokens = 4
+    protocol.local_llm.count_tokens_batch = lambda texts: [len(text.split()) for text in texts]
+    protocol.process_query("summarise", ["alpha beta\n\ngamma delta\n\nepsilon zeta"])
+
+    (root,) = sink.find("protocol.process_query")
+    assert root.attributes["rounds"] == 2
+    names = {span.name for span in sink.spans}
+    assert {"protocol.directive", "protocol.worker", "protocol.validation",
+            "protocol.analyze", "protocol.finalize"} <= names
+    # Spans from worker threads and speculative directives keep their parents
+    assert all(span.trace_id == root.trace_id for span in sink.spans)
+    speculative = [s for s in sink.find("protocol.directive") if s.attributes.get("speculative")]
+    assert speculative and all(s.parent_id == root.span_id for s in speculative)
+
+
+def test_jsonl_sink_writes_otel_shaped_spans(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    sink = JSONLSink(path, buffer_spans=10)
+    tracing.enable([sink])
+    try:
+        with tracing.span("outer", round=1):
+            with tracing.span("inner"):
+                pass
+    finally:
+        tracing.disable().close()
+
+    inner, outer = [json.loads(line) for line in path.read_text().splitlines()]
+    assert inner["parent_span_id"] == outer["span_id"]
+    assert outer["attributes"] == {"round": 1}
+    assert outer["end_time_unix_nano"] >= outer["start_time_unix_nano"]
+    assert outer["status"] == {"code": "OK"}
+
+
+def test_opentelemetry_sink_replays_spans_on_given_tracer(sink):
+    otel_tracer = MagicMock()
+    tracing.get_tracer().sinks.append(OpenTelemetrySink(tracer=otel_tracer))
+
+    with tracing.span("stage", round=2):
+        pass
+
+    (span,) = sink.spans
+    otel_tracer.start_span.assert_called_once()
+    args, kwargs = otel_tracer.start_span.call_args
+    assert args == ("stage",)
+    assert kwargs["start_time"] == span.start_time_ns
+    assert kwargs["attributes"]["round"] == 2
+    otel_tracer.start_span.return_value.end.assert_called_once_with(end_time=span.end_time_ns)
@@ -0,0 +1,74 @@
+import threading
+
+import httpx
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from protocols.clients import OllamaClient, OpenAIClient, TransportConfig, TransportRegistry
+from protocols.clients.transport import endpoint_key
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_endpoint_key_normalises_urls():
+    assert endpoint_key("https://api.openai.com/v1") == "https://api.openai.com:443"
+    assert endpoint_key("http://localhost:11434/") == endpoint_key("http://localhost:11434/api")
+
+
+def test_clients_share_one_connection(server_url):
+    """Separate httpx clients on the same endpoint reuse a pooled connection."""
+    registry = TransportRegistry(TransportConfig(max_connections=4))
+    first = httpx.Client(base_url=server_url, transport=registry.get(server_url))
+    second = httpx.Client(base_url=server_url, transport=registry.get(server_url + "/other"))
+
+    for client in (first, second, first):
+        assert client.get("/").text == "ok"
+    first.close()  # must not close the shared pool
+    assert second.get("/").text == "ok"
+
+    stats = registry.stats()[endpoint_key(server_url)]
+    assert stats.requests == 4
+    assert stats.connections == 1 and stats.idle_connections == 1
+    registry.close()
+    assert registry.stats() == {}
+
+
+def test_llm_clients_use_registry_transports():
+    registry = TransportRegistry()
+    with patch("protocols.clients.ollama_client.ollama.Client") as ollama_cls, \
+            patch("protocols.clients.ollama_client.ollama.AsyncClient"):
+        OllamaClient(base_url="http://ollama:11434", transport_registry=registry)
+        OllamaClient(base_url="http://ollama:11434", transport_registry=registry)
+        transports = [call.kwargs["transport"] for call in ollama_cls.call_args_list]
+        assert transports[0] is transports[1] is registry.get("http://ollama:11434")
+
+        OllamaClient(base_url="http://ollama:11434", shared_transport=False)
+        assert "transport" not in ollama_cls.call_args.kwargs
+
+    with patch("protocols.clients.openai_client.openai.OpenAI") as openai_cls, \
+            patch("protocols.clients.openai_client.openai.AsyncOpenAI"):
+        OpenAIClient(api_key="key", transport_registry=registry)
+        http_client = openai_cls.call_args.kwargs["http_client"]
+        assert http_client._transport is registry.get("https://api.openai.com/v1")
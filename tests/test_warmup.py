@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+from protocols.clients import OllamaClient, OllamaPool
+from protocols.privacy_protocol import PrivacyProtocol_v2
+from protocols.warmup import WarmupManager
+
+
+@pytest.fixture
+def mock_ollama_client():
+    with patch("protocols.clients.ollama_client.ollama.Client") as mock_client:
+        mock_instance = MagicMock()
+        mock_client.return_value = mock_instance
+        mock_instance.generate.return_value = {"response": "", "load_duration": 2_500_000_000}
+        mock_instance.ps.return_value = {"models": [{"model": "llama3.2:latest"}]}
+        yield mock_instance
+
+
+def test_start_preloads_with_keep_alive(mock_ollama_client):
+    client = OllamaClient(model="llama3.2", base_url="http://mock-url:11434")
+    events = []
+    with WarmupManager([client], keep_alive="1h", check_interval=60, on_event=events.append) as manager:
+        assert manager.running
+
+    mock_ollama_client.generate.assert_called_once_with(model="llama3.2", prompt="", keep_alive="1h")
+    (event,) = events
+    assert (event.kind, event.model, event.load_seconds) == ("loaded", "llama3.2", 2.5)
+    assert not manager.running
+
+
+def test_idle_model_is_pinged_and_busy_model_is_not(mock_ollama_client):
+    client = OllamaClient(model="llama3.2", base_url="http://mock-url:11434")
+    manager = WarmupManager([client], ping_interval=0)
+    manager.preload()
+    manager.check()
+    assert manager.events[-1].kind == "ping"
+
+    manager.ping_interval = 3600
+    client.generate("real traffic")
+    manager.check()
+    assert manager.events[-1].kind == "ping"
+    assert len(manager.events) == 2
+
+
+def test_traffic_to_one_pool_host_does_not_keep_another_warm(mock_ollama_client):
+    pool = OllamaPool(model="llama3.2", hosts=["http://host-a:11434", "http://host-b:11434"])
+    manager = WarmupManager([pool], ping_interval=0.2)
+    manager.preload()
+    time.sleep(0.3)
+
+    # Pool members share one usage meter, so only per-member activity tells them apart
+    pool.hosts[0].client.generate("real traffic")
+    manager.check()
+
+    pings = [event.host for event in manager.events if event.kind == "ping"]
+    assert pings == ["http://host-b:11434"]
+
+
+def test_eviction_is_reported_and_model_reloaded(mock_ollama_client):
+    pool = OllamaPool(model="llama3.2", hosts=["http://mock-url:11434"])
+    manager = WarmupManager([pool], ping_interval=3600)
+    manager.preload()
+    assert pool.hosts[0].model_loaded
+
+    mock_ollama_client.ps.return_value = {"models": []}
+    mock_ollama_client.generate.side_effect = Exception("connection refused")
+    manager.check()
+
+    assert [event.kind for event in manager.events] == ["loaded", "evicted", "error"]
+    assert not pool.hosts[0].model_loaded
+
+
+def test_failed_preload_is_retried_on_next_check(mock_ollama_client):
+    pool = OllamaPool(model="llama3.2", hosts=["http://mock-url:11434"])
+    manager = WarmupManager([pool], ping_interval=3600)
+    mock_ollama_client.generate.side_effect = Exception("connection refused")
+    manager.preload()
+    assert not pool.hosts[0].model_loaded
+
+    mock_ollama_client.generate.side_effect = None
+    manager.check()
+
+    assert [event.kind for event in manager.events] == ["error", "loaded"]
+    assert pool.hosts[0].model_loaded
+
+
+def test_protocol_starts_warmup(mock_ollama_client):
+    local = OllamaClient(model="llama3.2", base_url="http://mock-url:11434")
+    manager = WarmupManager([local], check_interval=60)
+    protocol = PrivacyProtocol_v2(
+        local_llm=local,
+        remote_llm=MagicMock(),
+        doc_metadata="Test Record",
+        data_types=["medical"],
+        warmup=manager,
+    )
+    with protocol:
+        assert protocol.warmup.running
+        assert manager.events[0].kind == "loaded"
+
+    assert not manager.running